@@ -0,0 +1,94 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+# 💾 답변 캐시 설정
+ANSWER_CACHE_SIZE = 500  # 보관할 답변 수 (초과하면 가장 오래 사용하지 않은 답변부터 삭제)
+SIMILARITY_THRESHOLD = 0.95  # 질문 임베딩 코사인 유사도가 이 값 이상이면 같은 질문으로 취급
+
+_PUNCT_RE = re.compile(r"[\s?!.,~…]+")
+
+def normalize_question(question):
+    """정확히 일치하는 질문을 찾기 위한 정규화 (NFC, 소문자, 공백/문장부호 정리)"""
+    return _PUNCT_RE.sub(" ", unicodedata.normalize("NFC", question).lower()).strip()
+
+class AnswerCache:
+    """같은 질문(정규화 후 일치)이나 거의 같은 질문(임베딩 유사도)에 대한 답변을 재사용하는 캐시
+
+    인덱싱된 문서가 바뀌면(index_version이 달라지면) 전체를 비운다.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, threshold=SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # 정규화된 질문 → {"answer", "docs", "vector"}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, index_version):
+        if index_version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = index_version
+
+    def lookup_exact(self, question, index_version):
+        """정규화된 질문이 정확히 같은 답변 (없으면 None)"""
+        with self._lock:
+            self._check_version(index_version)
+            entry = self._entries.get(normalize_question(question))
+            if entry is not None:
+                self._entries.move_to_end(normalize_question(question))
+                self.exact_hits += 1
+            return entry
+
+    def lookup_similar(self, query_vector, index_version):
+        """질문 임베딩이 threshold 이상으로 비슷한 답변 (없으면 None, 미스로 집계)"""
+        with self._lock:
+            self._check_version(index_version)
+            if self._entries:
+                keys = list(self._entries)
+                matrix = np.stack([self._entries[key]["vector"] for key in keys])
+                similarities = matrix @ _unit(query_vector)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.semantic_hits += 1
+                    return self._entries[keys[best]]
+            self.misses += 1
+            return None
+
+    def store(self, question, answer, docs, query_vector, index_version):
+        """생성이 끝난 답변을 저장하는 함수"""
+        with self._lock:
+            self._check_version(index_version)
+            key = normalize_question(question)
+            self._entries[key] = {"answer": answer, "docs": docs, "vector": _unit(query_vector)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """정확 일치/유사 질문 적중 수, 미스 수, 적중률"""
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_executor import OllamaBatchEmbeddings
+from stub_ollama import StubConfig, start_stub_server
+
+# 📊 단건 요청 vs 배치 실행기 임베딩 처리량 비교 (가짜 Ollama 서버 사용)
+def run(name, embedder, texts):
+    start = time.perf_counter()
+    vectors = embedder.embed_documents(texts)
+    seconds = time.perf_counter() - start
+    assert len(vectors) == len(texts)
+    stats = embedder.stats() if hasattr(embedder, "stats") else {}
+    print(f"{name:<28} {seconds:7.2f}s  {len(texts) / seconds:8.1f} texts/s  {stats}")
+    return seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 실행기 벤치마크")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--base-latency", type=float, default=0.02, help="가짜 서버의 요청당 고정 지연(초)")
+    parser.add_argument("--per-item-latency", type=float, default=0.001, help="가짜 서버의 텍스트당 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 서버의 503 응답 비율")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(StubConfig(
+        base_latency=args.base_latency, per_item_latency=args.per_item_latency, error_rate=args.error_rate,
+    ))
+    texts = [f"농업 보고서 청크 {i} - 작물 생육 및 병해충 방제 기록" for i in range(args.texts)]
+
+    # 요청 1회에 텍스트 1개, 동시 요청 1개 = 기존 OllamaEmbeddings와 같은 호출 패턴
+    baseline = run("one-request-per-text", OllamaBatchEmbeddings(
+        "stub", base_url=url, max_in_flight=1, batch_size=1, max_batch_size=1, backoff=0.01), texts)
+    batched = run("batched (fixed 64, 1 in-flight)", OllamaBatchEmbeddings(
+        "stub", base_url=url, max_in_flight=1, batch_size=64, min_batch_size=64, max_batch_size=64, backoff=0.01), texts)
+    adaptive = run("adaptive (4 in-flight)", OllamaBatchEmbeddings(
+        "stub", base_url=url, max_in_flight=4, target_latency=0.5, backoff=0.01), texts)
+
+    print(f"⚡ speedup vs baseline: batched x{baseline / batched:.1f}, adaptive x{baseline / adaptive:.1f}")
+    server.shutdown()
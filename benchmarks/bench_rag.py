@@ -0,0 +1,302 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import make_pdf_corpus, make_text_corpus, sample_questions
+from stub_ollama import StubConfig, start_stub_server
+
+# 📊 전체 RAG 벤치마크 (가짜 Ollama 서버 + 합성 문서, 실제 모델/데이터 없이 실행)
+# 벡터 DB, 키워드 색인, 임베딩 캐시, 매니페스트는 모두 임시 폴더에 만들고 끝나면 삭제한다.
+
+def percentiles(values):
+    """p50/p95/p99 (nearest-rank), 평균, 최대 (밀리초)"""
+    values = sorted(v * 1000 for v in values if v is not None)
+    if not values:
+        return {}
+
+    def rank(p):
+        return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+    return {
+        "p50_ms": rank(50),
+        "p95_ms": rank(95),
+        "p99_ms": rank(99),
+        "mean_ms": sum(values) / len(values),
+        "max_ms": values[-1],
+    }
+
+@contextlib.contextmanager
+def _quiet(enabled):
+    # 파이프라인의 문서/질문별 출력 숨김 (--verbose면 그대로 출력)
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+class Stores:
+    """임시 폴더에 만든 벡터 DB/키워드 색인/임베딩 캐시/매니페스트 묶음"""
+
+    def __init__(self, directory, url):
+        from langchain_community.vectorstores import Chroma
+        from embedding_cache import CachedEmbeddings
+        from embedding_executor import OllamaBatchEmbeddings
+        from sparse_index import SparseIndex
+
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, "ingest_manifest.json")
+        self.embeddings = CachedEmbeddings(OllamaBatchEmbeddings("stub", base_url=url), model_name="stub:embed",
+                                           path=os.path.join(directory, "embedding_cache.sqlite"))
+        self.vectorstore = Chroma(persist_directory=os.path.join(directory, "chroma_db"),
+                                  embedding_function=self.embeddings)
+        self.sparse_index = SparseIndex(path=os.path.join(directory, "sparse_index.sqlite"))
+
+# 📥 수집(인덱싱) 처리량
+def bench_extract(pdf_paths):
+    """PDF 텍스트 추출만 (extract_text_from_pdf와 같은 경로)"""
+    from pdf_extractor import iter_pdf_pages
+
+    pages = 0
+    start = time.perf_counter()
+    for path in pdf_paths:
+        stats = {}
+        for _ in iter_pdf_pages(path, stats=stats):
+            pass
+        pages += stats["pages"]
+    seconds = time.perf_counter() - start
+    return {"files": len(pdf_paths), "pages": pages, "seconds": seconds, "pages_per_sec": pages / seconds}
+
+def bench_index(paths, stores):
+    """파일을 하나씩 추출 → 분할 → 임베딩 → 저장 (process_pdf/process_txt와 같은 경로)"""
+    from indexer import document_id, file_sha256, index_chunks
+    from pdf_extractor import iter_pdf_pages
+    from pdf_processor import iter_chunks
+    from structured_processor import iter_text_chunks
+
+    chunks = pages = 0
+    start = time.perf_counter()
+    for path in paths:
+        stats = {}
+        if path.endswith(".pdf"):
+            stream = iter_chunks(iter_pdf_pages(path, stats=stats))
+        else:
+            stream = iter_text_chunks(path, stats=stats)
+        result = index_chunks(stores.vectorstore, document_id(path), file_sha256(path), stream,
+                              path=stores.manifest_path, sparse_index=stores.sparse_index)
+        chunks += result["chunks"]
+        pages += stats.get("pages", 0)
+    seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in paths)
+    return {
+        "files": len(paths),
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": seconds,
+        "pages_per_sec": pages / seconds,
+        "chunks_per_sec": chunks / seconds,
+        "mb_per_sec": size / seconds / 1024 / 1024,
+    }
+
+def bench_pipeline(pdf_paths, stores, extract_workers):
+    """여러 PDF를 단계별 파이프라인(run_pipeline)으로 인덱싱"""
+    from ingest_pipeline import run_pipeline
+
+    summary = run_pipeline(pdf_paths, vectorstore=stores.vectorstore, embeddings=stores.embeddings,
+                           sparse_index=stores.sparse_index, extract_workers=extract_workers,
+                           manifest_path=stores.manifest_path)
+    return {key: summary[key] for key in ("pages", "chunks", "seconds", "pages_per_sec", "chunks_per_sec")}
+
+# 💬 질문 응답 지연 시간
+def bench_queries(questions, stores, url, concurrency, rerank):
+    """동시 요청 concurrency개로 모든 질문을 끝까지 스트리밍하고 지연 시간 분포를 측정"""
+    from langchain_community.llms import Ollama
+    from rag_pipeline import stream_answer
+    from reranker import LexicalOverlapScorer, Reranker
+
+    llm = Ollama(model="stub", base_url=url)
+    reranker = Reranker(LexicalOverlapScorer()) if rerank else None
+    samples = []
+    lock = threading.Lock()
+
+    def ask(question):
+        stats = {}
+        start = time.perf_counter()
+        for _ in stream_answer(question, stores.vectorstore, stores.embeddings, llm, stats=stats,
+                               sparse_index=stores.sparse_index, reranker=reranker):
+            pass
+        with lock:
+            samples.append({"latency": time.perf_counter() - start, "ttft": stats.get("ttft"),
+                            "timings": stats.get("timings", {})})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(ask, questions))
+    seconds = time.perf_counter() - start
+
+    stages = sorted({stage for sample in samples for stage in sample["timings"]})
+    return {
+        "concurrency": concurrency,
+        "queries": len(samples),
+        "seconds": seconds,
+        "qps": len(samples) / seconds,
+        "latency": percentiles([sample["latency"] for sample in samples]),
+        "ttft": percentiles([sample["ttft"] for sample in samples]),
+        "stages": {stage: percentiles([s["timings"].get(stage) for s in samples]) for stage in stages},
+    }
+
+# 🧾 결과 저장 & 비교
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def flatten(results, prefix=""):
+    """중첩된 결과 dict → {"ingest.index.chunks_per_sec": 값} (숫자만)"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(base, current):
+    """두 실행 결과의 같은 지표를 나란히 출력 (처리량은 클수록, 시간은 작을수록 좋음)"""
+    base_flat, current_flat = flatten(base["results"]), flatten(current["results"])
+    print(f"{'metric':<48} {'base':>12} {'current':>12} {'change':>9}")
+    for name in sorted(base_flat.keys() & current_flat.keys()):
+        old, new = base_flat[name], current_flat[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+        print(f"{name:<48} {old:12.2f} {new:12.2f} {change:>9}")
+    print(f"(base {base['meta'].get('commit')} @ {base['meta'].get('time')}, "
+          f"current {current['meta'].get('commit')} @ {current['meta'].get('time')})")
+
+def _print_query(result):
+    latency, ttft = result["latency"], result["ttft"]
+    print(
+        f"💬 동시 {result['concurrency']:>3} | {result['qps']:6.1f} q/s | "
+        f"latency p50 {latency['p50_ms']:.0f} / p95 {latency['p95_ms']:.0f} / p99 {latency['p99_ms']:.0f} ms | "
+        f"TTFT p50 {ttft.get('p50_ms', 0):.0f} / p95 {ttft.get('p95_ms', 0):.0f} / p99 {ttft.get('p99_ms', 0):.0f} ms"
+    )
+
+def run(args):
+    config = StubConfig(dim=args.dim, base_latency=args.embed_latency, per_item_latency=args.per_item_latency,
+                        first_token_latency=args.first_token_latency, token_latency=args.token_latency,
+                        answer_tokens=args.answer_tokens)
+    server, url = start_stub_server(config)
+    workdir = tempfile.mkdtemp(prefix="rag-bench-") if args.workdir is None else args.workdir
+    corpus_dir = os.path.join(workdir, "corpus")
+    results = {}
+    try:
+        start = time.perf_counter()
+        pdfs = make_pdf_corpus(corpus_dir, args.pdfs, args.pages, args.seed)
+        texts = make_text_corpus(corpus_dir, args.texts, args.paragraphs, args.seed)
+        results["corpus"] = {
+            "pdfs": len(pdfs),
+            "texts": len(texts),
+            "mb": sum(os.path.getsize(path) for path in pdfs + texts) / 1024 / 1024,
+            "seconds": time.perf_counter() - start,
+        }
+        print(f"📚 합성 문서: PDF {len(pdfs)}개 x {args.pages}쪽, 텍스트 {len(texts)}개 ({results['corpus']['mb']:.1f}MB)")
+
+        ingest = results["ingest"] = {}
+        with _quiet(not args.verbose):
+            ingest["extract"] = bench_extract(pdfs)
+        print(f"📄 추출      {ingest['extract']['pages_per_sec']:8.1f} pages/s")
+
+        stores = Stores(os.path.join(workdir, "index"), url)
+        with _quiet(not args.verbose):
+            ingest["index"] = bench_index(pdfs + texts, stores)
+        print(f"📥 인덱싱    {ingest['index']['pages_per_sec']:8.1f} pages/s {ingest['index']['chunks_per_sec']:8.1f} chunks/s")
+
+        if pdfs and not args.skip_pipeline:
+            with _quiet(not args.verbose):
+                ingest["pipeline"] = bench_pipeline(pdfs, Stores(os.path.join(workdir, "pipeline"), url),
+                                                    args.extract_workers)
+            print(f"🚚 파이프라인 {ingest['pipeline']['pages_per_sec']:8.1f} pages/s "
+                  f"{ingest['pipeline']['chunks_per_sec']:8.1f} chunks/s")
+
+        questions = sample_questions(args.queries, args.seed)
+        with _quiet(not args.verbose):
+            bench_queries(questions[:2], stores, url, 1, args.rerank)  # 워밍업 (측정에서 제외)
+        results["query"] = {}
+        for concurrency in args.concurrency:
+            with _quiet(not args.verbose):
+                result = bench_queries(questions, stores, url, concurrency, args.rerank)
+            results["query"][f"c{concurrency}"] = result
+            _print_query(result)
+    finally:
+        server.shutdown()
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+# 🛠️ CLI: python benchmarks/bench_rag.py [--pdfs 5 --pages 20] [--concurrency 1 4 8] [--output run.json] [--compare base.json]
+#          python benchmarks/bench_rag.py --compare base.json new.json  (실행 없이 두 결과만 비교)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 Ollama 서버로 수집 처리량과 질문 응답 지연 시간 측정")
+    parser.add_argument("--pdfs", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20, help="PDF 하나의 페이지 수")
+    parser.add_argument("--texts", type=int, default=5)
+    parser.add_argument("--paragraphs", type=int, default=200, help="텍스트 파일 하나의 문단 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=100, help="동시성 단계마다 보낼 질문 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rerank", action="store_true", help="재정렬 포함")
+    parser.add_argument("--extract-workers", type=int, default=2, help="파이프라인 추출 프로세스 수")
+    parser.add_argument("--skip-pipeline", action="store_true", help="run_pipeline 측정 생략")
+    parser.add_argument("--dim", type=int, default=384, help="가짜 임베딩 차원")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="임베딩 요청당 고정 지연(초)")
+    parser.add_argument("--per-item-latency", type=float, default=0.0005, help="임베딩 텍스트당 지연(초)")
+    parser.add_argument("--first-token-latency", type=float, default=0.1, help="생성 첫 토큰 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="생성 토큰 사이 지연(초)")
+    parser.add_argument("--answer-tokens", type=int, default=32)
+    parser.add_argument("--workdir", help="임시 폴더 대신 사용할 작업 폴더 (끝나도 삭제하지 않음)")
+    parser.add_argument("--verbose", action="store_true", help="문서/질문별 로그 출력")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="비교할 이전 결과 (두 개면 실행 없이 비교만)")
+    args = parser.parse_args()
+
+    loaded = []
+    for path in args.compare or []:
+        with open(path, "r", encoding="utf-8") as f:
+            loaded.append(json.load(f))
+    if len(loaded) >= 2:
+        compare(loaded[0], loaded[1])
+        sys.exit(0)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+    if loaded:
+        compare(loaded[0], report)
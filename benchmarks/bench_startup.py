@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 📊 모듈별 import 시간 측정 (매번 새 프로세스에서 측정해서 캐시된 import의 영향 제거)
+MODULES = ["resources", "pdf_processor", "ingest_pipeline", "query", "rag_pipeline", "rag_ui"]
+
+_TIMER = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+def time_import(module, repeats):
+    """새 프로세스에서 모듈을 import하는 데 걸린 시간(초) 목록 (실패하면 None)"""
+    seconds = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", _TIMER.format(module=module)], cwd=ROOT,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        seconds.append(float(result.stdout.strip().splitlines()[-1]))
+    return seconds
+
+def slowest_imports(module, top):
+    """python -X importtime 결과에서 누적 시간이 가장 긴 import 목록"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def run_in_process():
+    """같은 프로세스에서 공유 객체 첫 생성 시간(지연 생성 비용) 측정"""
+    import time
+    sys.path.insert(0, ROOT)
+    import resources
+    for name in ["get_embeddings", "get_vectorstore", "get_sparse_index", "get_llm"]:
+        start = time.perf_counter()
+        try:
+            getattr(resources, name)()
+        except Exception as e:
+            print(f"{name:<20} 실패 ({e})")
+            continue
+        print(f"{name:<20} {time.perf_counter() - start:7.3f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="시작 시간 벤치마크")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="모듈별로 가장 느린 import N개 출력")
+    parser.add_argument("--modules", nargs="*", default=MODULES)
+    parser.add_argument("--singletons", action="store_true", help="공유 객체(임베딩/벡터 DB/LLM) 첫 생성 시간도 측정")
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'min':>8} {'median':>8}")
+    for module in args.modules:
+        seconds = time_import(module, args.repeats)
+        if seconds is None:
+            print(f"{module:<20} import 실패 (의존성 확인)")
+            continue
+        print(f"{module:<20} {min(seconds):7.3f}s {statistics.median(seconds):7.3f}s")
+        for cumulative, name in slowest_imports(module, args.top):
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.singletons:
+        run_in_process()
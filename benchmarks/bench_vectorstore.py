@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from index_compaction import directory_bytes
+
+# 📊 Chroma vs NumPy 저장소(float32/float16/int8, 양자화 코드 + float32 재계산 quantized-int8/pq) 검색 지연·정확도·크기 비교
+# 청크 임베딩과 비슷하게 군집이 있는 정규화 벡터를 만들어 같은 데이터를 각 저장소에 넣고
+# rag_pipeline.retrieve가 쓰는 similarity_search_by_vector로 검색한다.
+BATCH_SIZE = 500
+
+def make_vectors(count, dim, clusters=200, seed=0):
+    """군집 중심 주변에 퍼진 정규화 벡터"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def make_queries(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), count, replace=False)]
+    queries = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_top_k(vectors, queries, k):
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+def _fill(store_name, directory, ids, vectors):
+    if store_name == "chroma":
+        from langchain_community.vectorstores import Chroma
+        store = Chroma(persist_directory=directory)
+        for start in range(0, len(ids), BATCH_SIZE):
+            store._collection.upsert(ids=ids[start:start + BATCH_SIZE], embeddings=vectors[start:start + BATCH_SIZE],
+                                     documents=ids[start:start + BATCH_SIZE],
+                                     metadatas=[{"source": "bench"}] * len(ids[start:start + BATCH_SIZE]))
+        return store
+    if store_name.startswith("quantized"):
+        from quantization import QuantizedVectorStore
+        store = QuantizedVectorStore(directory, quantization=store_name.split("-")[1])
+    else:
+        from numpy_store import NumpyVectorStore
+        store = NumpyVectorStore(directory, dtype=store_name.split("-")[1])
+    for start in range(0, len(ids), BATCH_SIZE):
+        store.upsert_vectors(ids[start:start + BATCH_SIZE], ids[start:start + BATCH_SIZE],
+                             [{"source": "bench"}] * len(ids[start:start + BATCH_SIZE]), vectors[start:start + BATCH_SIZE])
+    if store_name.startswith("quantized"):
+        store.train()  # 기존 저장소를 migrate로 전환할 때처럼 다 넣은 뒤 한 번 학습
+    return store
+
+def _reopen(store_name, directory):
+    if store_name == "chroma":
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory=directory)
+    if store_name.startswith("quantized"):
+        from quantization import QuantizedVectorStore
+        return QuantizedVectorStore(directory)
+    from numpy_store import NumpyVectorStore
+    return NumpyVectorStore(directory)
+
+def bench_store(store_name, directory, ids, vectors, queries, truth, k):
+    start = time.perf_counter()
+    _fill(store_name, directory, ids, vectors)
+    build_seconds = time.perf_counter() - start
+
+    # 디스크에서 다시 열어서 첫 검색까지 (서버 재시작 후 첫 질문에 해당)
+    start = time.perf_counter()
+    store = _reopen(store_name, directory)
+    store.similarity_search_by_vector(queries[0].tolist(), k=k)
+    open_seconds = time.perf_counter() - start
+
+    timings, hits = [], 0
+    index = {cid: row for row, cid in enumerate(ids)}
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(query.tolist(), k=k)
+        timings.append((time.perf_counter() - start) * 1000)
+        found = {index[doc.metadata.get("chunk_id") or doc.id or doc.page_content] for doc in docs}
+        hits += len(found & expected)
+
+    result = {
+        "build_seconds": build_seconds,
+        "open_seconds": open_seconds,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "recall": hits / (len(queries) * k),
+        "disk_mb": directory_bytes(directory) / 1024 / 1024,
+    }
+    if hasattr(store, "search_batch"):
+        # 여러 질의를 한 번의 행렬 곱으로 검색할 때의 질의당 시간
+        start = time.perf_counter()
+        store.search_batch(queries, k)
+        result["batch_ms_per_query"] = (time.perf_counter() - start) * 1000 / len(queries)
+        result["matrix_mb"] = store.memory_bytes() / 1024 / 1024
+        result["bytes_per_chunk"] = store.memory_bytes() / store.count()
+    return result
+
+# 🛠️ CLI: python benchmarks/bench_vectorstore.py [--vectors 20000] [--dim 1024] [--stores chroma numpy-float32 ...]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chroma vs NumPy 벡터 저장소 검색 벤치마크")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024, help="mxbai-embed-large와 같은 1024차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20, help="하이브리드 검색 후보 수와 같은 20")
+    parser.add_argument("--stores", nargs="+", default=["chroma", "numpy-float32", "numpy-float16", "numpy-int8",
+                                                       "quantized-int8", "quantized-pq"])
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.vectors, args.dim)
+    queries = make_queries(vectors, args.queries)
+    truth = exact_top_k(vectors, queries, args.k)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    print(f"📦 벡터 {args.vectors}개 x {args.dim}차원, 질의 {args.queries}개, k={args.k}")
+
+    workdir = tempfile.mkdtemp(prefix="vectorstore-bench-")
+    results = {}
+    try:
+        for name in args.stores:
+            results[name] = bench_store(name, os.path.join(workdir, name), ids, vectors, queries, truth, args.k)
+            r = results[name]
+            batch = f" | batch {r['batch_ms_per_query']:.2f} ms/q" if "batch_ms_per_query" in r else ""
+            print(f"{name:<14} build {r['build_seconds']:6.1f}s | open {r['open_seconds']:5.2f}s | "
+                  f"p50 {r['p50_ms']:6.2f} / p95 {r['p95_ms']:6.2f} ms{batch} | "
+                  f"recall@{args.k} {r['recall']:.3f} | disk {r['disk_mb']:6.1f} MB"
+                  + (f" | 검색 행렬/코드만 {r['bytes_per_chunk']:.0f} B/청크" if "bytes_per_chunk" in r else ""))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+
+# 📚 벤치마크용 합성 문서 (농업 보고서 형식의 한글/영어 문장을 시드로 결정적으로 생성)
+CROPS = ["고추", "벼", "배추", "사과", "감자", "딸기", "콩", "옥수수"]
+DISEASES = ["탄저병", "도열병", "무름병", "갈색무늬병", "역병", "잿빛곰팡이병", "진딧물", "노균병"]
+ACTIONS = ["방제", "예찰", "시비", "관수", "수확", "정식"]
+SEASONS = ["장마 전후", "정식 후 2주", "개화기", "수확 30일 전", "4월 하순", "9월 초순"]
+CROPS_EN = ["pepper", "rice", "cabbage", "apple", "potato", "strawberry", "soybean", "maize"]
+DISEASES_EN = ["anthracnose", "blast", "soft rot", "leaf spot", "late blight", "gray mold", "aphids", "downy mildew"]
+
+KO_TEMPLATES = [
+    "{crop} {disease} {action} 시기는 {season}이며, 약제는 {dose}배 희석액을 10a당 {amount}L 살포합니다.",
+    "{region} 지역 {crop} 재배 농가의 {disease} 발생률은 {rate}%로 전년 대비 {delta}%p 증가하였습니다.",
+    "{crop} 생육 초기에는 토양 수분을 {moisture}% 내외로 유지하고, 질소 비료는 {amount}kg을 나누어 줍니다.",
+    "농약 등록 번호 {code}는 {crop} {disease}에 사용할 수 있으며 안전사용기준은 수확 {days}일 전까지입니다.",
+]
+EN_TEMPLATES = [
+    "Apply NPK {npk} at {amount} kg per 10a before transplanting {crop_en} to reduce {disease_en} risk.",
+    "Field trial {code} recorded a {rate}% incidence of {disease_en} on {crop_en} under {moisture}% soil moisture.",
+    "Scout {crop_en} fields every {days} days during {season_en} and remove infected leaves immediately.",
+]
+REGIONS = ["경기", "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주"]
+SEASONS_EN = ["the rainy season", "early flowering", "the first month after planting", "harvest"]
+
+QUESTION_TEMPLATES = [
+    "{crop} {disease} {action} 시기는 언제인가요?",
+    "{region} 지역 {crop}의 {disease} 발생률은 얼마인가요?",
+    "{crop} 질소 비료는 얼마나 주어야 하나요?",
+    "농약 등록 번호 {code}의 안전사용기준은?",
+    "How much NPK {npk} should be applied for {crop_en}?",
+    "When should {crop_en} fields be scouted for {disease_en}?",
+]
+
+def _fields(rng):
+    return {
+        "crop": rng.choice(CROPS),
+        "disease": rng.choice(DISEASES),
+        "action": rng.choice(ACTIONS),
+        "season": rng.choice(SEASONS),
+        "region": rng.choice(REGIONS),
+        "crop_en": rng.choice(CROPS_EN),
+        "disease_en": rng.choice(DISEASES_EN),
+        "season_en": rng.choice(SEASONS_EN),
+        "dose": rng.choice([500, 1000, 2000]),
+        "amount": rng.randint(5, 200),
+        "rate": rng.randint(1, 60),
+        "delta": rng.randint(1, 15),
+        "moisture": rng.randint(40, 80),
+        "days": rng.choice([7, 14, 21, 30]),
+        "code": f"PR-{rng.randint(1000, 9999)}",
+        "npk": rng.choice(["10-5-5", "15-15-15", "21-17-17", "12-6-8"]),
+    }
+
+def make_paragraph(rng, sentences=6, english_ratio=0.3):
+    """한글 문장 사이에 영어 문장이 english_ratio 비율로 섞인 문단 하나"""
+    lines = []
+    for _ in range(sentences):
+        templates = EN_TEMPLATES if rng.random() < english_ratio else KO_TEMPLATES
+        lines.append(rng.choice(templates).format(**_fields(rng)))
+    return " ".join(lines)
+
+def sample_questions(count, seed=0):
+    """합성 문서와 같은 어휘로 만든 질문 목록 (키워드/숫자가 문서와 겹치도록)"""
+    rng = random.Random(f"questions:{seed}")
+    return [rng.choice(QUESTION_TEMPLATES).format(**_fields(rng)) for _ in range(count)]
+
+def make_text_corpus(directory, files=10, paragraphs=200, seed=0, english_ratio=0.3):
+    """paragraphs개 문단짜리 UTF-8 텍스트 파일을 files개 만들고 경로 목록을 반환하는 함수"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        rng = random.Random(f"text:{seed}:{index}")
+        path = os.path.join(directory, f"bench_{seed}_{index:04d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(paragraphs):
+                f.write(make_paragraph(rng, english_ratio=english_ratio) + "\n\n")
+        paths.append(path)
+    return paths
+
+def make_pdf_corpus(directory, files=5, pages=20, seed=0, english_ratio=0.3):
+    """텍스트 레이어가 있는 A4 PDF(페이지마다 문단 몇 개)를 files개 만들고 경로 목록을 반환하는 함수"""
+    import fitz  # PyMuPDF
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        rng = random.Random(f"pdf:{seed}:{index}")
+        path = os.path.join(directory, f"bench_{seed}_{index:04d}.pdf")
+        with fitz.open() as doc:
+            for _ in range(pages):
+                page = doc.new_page()  # A4
+                text = "\n\n".join(make_paragraph(rng, english_ratio=english_ratio) for _ in range(4))
+                # 한글 글꼴은 PyMuPDF 내장 CJK 글꼴 사용 (넘치는 부분은 잘림)
+                page.insert_textbox(fitz.Rect(50, 50, 545, 792), text, fontname="korea", fontsize=10)
+            doc.save(path, garbage=3, deflate=True)
+        paths.append(path)
+    return paths
+
+# 🛠️ CLI: python benchmarks/corpus.py 출력폴더 [--pdfs 5 --pages 20] [--texts 10 --paragraphs 200]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 PDF/텍스트 문서 생성")
+    parser.add_argument("directory")
+    parser.add_argument("--pdfs", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20, help="PDF 하나의 페이지 수")
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=200, help="텍스트 파일 하나의 문단 수")
+    parser.add_argument("--english-ratio", type=float, default=0.3, help="영어 문장 비율")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pdfs = make_pdf_corpus(args.directory, args.pdfs, args.pages, args.seed, args.english_ratio)
+    texts = make_text_corpus(args.directory, args.texts, args.paragraphs, args.seed, args.english_ratio)
+    size = sum(os.path.getsize(path) for path in pdfs + texts)
+    print(f"📚 PDF {len(pdfs)}개 ({args.pages}쪽씩), 텍스트 {len(texts)}개 생성 ({size / 1024 / 1024:.1f}MB): {args.directory}")
@@ -0,0 +1,228 @@
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from index_compaction import directory_bytes
+
+# 🕸️ HNSW 설정별 검색 품질 vs 지연 시간 평가
+# 저장된 임베딩을 NumPy로 전수 비교한 결과를 정답으로 두고, 설정마다 새 컬렉션을 만들어
+# recall@k, MRR, 검색 지연, 색인 생성 시간, 색인 크기를 측정한다. (원본 컬렉션은 읽기만 함)
+DEFAULT_M = [8, 16, 32]
+DEFAULT_CONSTRUCTION_EF = [100, 200]
+DEFAULT_SEARCH_EF = [10, 50, 100]
+DEFAULT_K = [1, 4, 10]
+LOAD_BATCH_SIZE = 1000  # 원본 컬렉션에서 한 번에 읽고 새 컬렉션에 넣을 벡터 수
+EXACT_BATCH_SIZE = 256  # 전수 비교 시 한 번에 계산할 질의 수
+
+# 📥 데이터 준비
+def load_vectors(collection, batch_size=LOAD_BATCH_SIZE):
+    """컬렉션의 모든 (ID, 임베딩)을 (ID 목록, float32 행렬)로 읽는 함수"""
+    ids, rows = [], []
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=["embeddings"])
+        if not len(page["ids"]):
+            break
+        ids.extend(page["ids"])
+        rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+    matrix = np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+    return ids, matrix
+
+def collection_space(collection):
+    """컬렉션의 거리 함수 (l2 / cosine / ip, 지정하지 않았으면 Chroma 기본값 l2)"""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+def load_gold(path, embeddings):
+    """정답 세트(JSONL: {"question": 질문, "relevant": [청크 ID, ...]})를 (질의 행렬, 정답 ID 집합 목록)으로 읽는 함수"""
+    questions, relevant = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                questions.append(item["question"])
+                relevant.append(set(item["relevant"]))
+    queries = np.asarray([embeddings.embed_query(question) for question in questions], dtype=np.float32)
+    return queries, relevant
+
+def synthetic_gold(ids, matrix, samples, noise=0.05, seed=0):
+    """정답 세트가 없을 때: 저장된 벡터에 잡음을 섞은 질의와 원래 청크를 정답으로 쓰는 세트"""
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(ids), size=min(samples, len(ids)), replace=False)
+    scale = noise * np.linalg.norm(matrix[picked], axis=1, keepdims=True) / np.sqrt(matrix.shape[1])
+    queries = matrix[picked] + rng.standard_normal((len(picked), matrix.shape[1])).astype(np.float32) * scale
+    return queries.astype(np.float32), [{ids[i]} for i in picked]
+
+# 🎯 정답(전수 비교) & 지표
+def exact_neighbours(matrix, queries, k, space="l2", batch_size=EXACT_BATCH_SIZE):
+    """질의마다 거리가 가장 가까운 k개 행 번호 (가까운 순서)"""
+    if space == "cosine":
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    square_norms = np.einsum("ij,ij->i", matrix, matrix) if space == "l2" else None
+    k = min(k, len(matrix))
+    result = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), batch_size):
+        scores = queries[start:start + batch_size] @ matrix.T
+        if space == "l2":
+            # ||q - x||² = ||q||² - 2q·x + ||x||² 에서 질의마다 같은 ||q||²는 순위에 영향 없음
+            scores = 2 * scores - square_norms
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        result[start:start + batch_size] = np.take_along_axis(top, order, axis=1)
+    return result
+
+def ann_recall(found, exact, k):
+    """HNSW 상위 k개 중 전수 비교 상위 k개와 겹치는 비율의 평균"""
+    return float(np.mean([len(set(f[:k]) & set(e[:k])) / max(1, min(k, len(e))) for f, e in zip(found, exact)]))
+
+def gold_metrics(found, relevant, k):
+    """정답 세트 기준 recall@k(정답 청크 중 찾은 비율)와 MRR@k(첫 정답 순위의 역수) 평균"""
+    recalls, reciprocal_ranks = [], []
+    for ranked, answers in zip(found, relevant):
+        top = ranked[:k]
+        recalls.append(len(set(top) & answers) / len(answers) if answers else 0.0)
+        rank = next((i for i, cid in enumerate(top, start=1) if cid in answers), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return float(np.mean(recalls)), float(np.mean(reciprocal_ranks))
+
+def _latency(seconds):
+    values = np.asarray(seconds) * 1000
+    return {"p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95))}
+
+# 🏗️ HNSW 색인 생성 & 검색
+def build_collection(directory, ids, matrix, space, m, construction_ef, search_ef, batch_size=LOAD_BATCH_SIZE):
+    """주어진 HNSW 설정으로 새 컬렉션을 만들어 벡터를 넣고 (컬렉션, 생성 시간)을 반환하는 함수"""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=directory)
+    metadata = {"hnsw:space": space, "hnsw:M": m, "hnsw:construction_ef": construction_ef, "hnsw:search_ef": search_ef}
+    collection = client.create_collection("hnsw_eval", metadata=metadata, embedding_function=None)
+    start = time.perf_counter()
+    for offset in range(0, len(ids), batch_size):
+        collection.add(ids=ids[offset:offset + batch_size], embeddings=matrix[offset:offset + batch_size])
+    collection.query(query_embeddings=[matrix[0]], n_results=1)  # 색인이 실제로 준비될 때까지 포함
+    return collection, time.perf_counter() - start
+
+def search(collection, queries, k):
+    """질의를 하나씩 검색해 (결과 ID 목록, 질의별 소요 시간)을 반환하는 함수"""
+    found, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        seconds.append(time.perf_counter() - start)
+        found.append(result["ids"][0])
+    return found, seconds
+
+def _evaluate(row, found_by_k, seconds_by_k, exact_ids, relevant, ks):
+    rows = []
+    for k in ks:
+        recall, mrr = gold_metrics(found_by_k[k], relevant, k)
+        rows.append(dict(row, k=k, recall=ann_recall(found_by_k[k], exact_ids, k), gold_recall=recall, mrr=mrr,
+                         **_latency(seconds_by_k[k])))
+    return rows
+
+def sweep(ids, matrix, queries, relevant, space, workdir, ms=DEFAULT_M, construction_efs=DEFAULT_CONSTRUCTION_EF,
+          search_efs=DEFAULT_SEARCH_EF, ks=DEFAULT_K):
+    """NumPy 전수 비교(정답) 1행 + HNSW 설정 조합마다 k별 1행씩의 결과 목록"""
+    max_k = max(ks)
+    start = time.perf_counter()
+    exact = exact_neighbours(matrix, queries, max_k, space)
+    exact_seconds = (time.perf_counter() - start) / max(1, len(queries))  # 배치 계산의 질의당 평균
+    exact_ids = [[ids[i] for i in row] for row in exact]
+
+    found_by_k = {k: [row[:k] for row in exact_ids] for k in ks}
+    seconds_by_k = {k: [exact_seconds] * len(queries) for k in ks}
+    base = {"index": "exact", "M": None, "construction_ef": None, "search_ef": None, "build_seconds": 0.0,
+            "index_bytes": matrix.nbytes}
+    rows = _evaluate(base, found_by_k, seconds_by_k, exact_ids, relevant, ks)
+
+    # search_ef는 chromadb에서 collection.modify로 바꿔도 이미 메모리에 올라간 색인에는 반영되지 않으므로
+    # 설정 조합마다 새로 만든다 (생성 시간도 조합마다 측정)
+    for m, construction_ef, search_ef in itertools.product(ms, construction_efs, search_efs):
+        directory = os.path.join(workdir, f"m{m}_efc{construction_ef}_ef{search_ef}")
+        collection, build_seconds = build_collection(directory, ids, matrix, space, m, construction_ef, search_ef)
+        index_bytes = sum(directory_bytes(entry.path) for entry in os.scandir(directory) if entry.is_dir())
+        found_by_k, seconds_by_k = {}, {}
+        for k in ks:
+            found_by_k[k], seconds_by_k[k] = search(collection, queries, k)
+        row = {"index": "hnsw", "M": m, "construction_ef": construction_ef, "search_ef": search_ef,
+               "build_seconds": build_seconds, "index_bytes": index_bytes}
+        rows.extend(_evaluate(row, found_by_k, seconds_by_k, exact_ids, relevant, ks))
+        print(f"🕸️ M={m} construction_ef={construction_ef} search_ef={search_ef} 완료 ({build_seconds:.1f}s)")
+    return rows
+
+def format_rows(rows):
+    """결과 표 (recall은 전수 비교 대비, gold_recall/MRR은 정답 세트 기준)"""
+    lines = [f"{'index':<6} {'M':>4} {'c_ef':>5} {'s_ef':>5} {'k':>3} {'recall':>7} {'gold_r':>7} {'mrr':>6} "
+             f"{'p50ms':>7} {'p95ms':>7} {'build_s':>8} {'size_mb':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['index']:<6} {row['M'] or '-':>4} {row['construction_ef'] or '-':>5} {row['search_ef'] or '-':>5} "
+            f"{row['k']:>3} {row['recall']:7.3f} {row['gold_recall']:7.3f} {row['mrr']:6.3f} "
+            f"{row['p50_ms']:7.2f} {row['p95_ms']:7.2f} {row['build_seconds']:8.1f} "
+            f"{row['index_bytes'] / 1024 / 1024:8.1f}"
+        )
+    return "\n".join(lines)
+
+# 🛠️ CLI: python benchmarks/eval_hnsw.py [--gold gold.jsonl | --samples 200] [--m 8 16 32] [--search-ef 10 50 100]
+if __name__ == "__main__":
+    from resources import CHROMA_DB_PATH, active_collection_name
+
+    parser = argparse.ArgumentParser(description="HNSW 설정별 recall@k/MRR/검색 지연/생성 시간/색인 크기 평가")
+    parser.add_argument("--persist-directory", default=CHROMA_DB_PATH, help="평가할 벡터 DB 경로 (읽기만 함)")
+    parser.add_argument("--collection", help="컬렉션 이름 (기본: 지금 검색에 사용하는 컬렉션)")
+    parser.add_argument("--gold", help="정답 세트 JSONL ({\"question\": ..., \"relevant\": [청크 ID, ...]})")
+    parser.add_argument("--samples", type=int, default=200, help="정답 세트가 없을 때 만들 질의 수")
+    parser.add_argument("--noise", type=float, default=0.05, help="합성 질의에 섞을 잡음 크기")
+    parser.add_argument("--m", type=int, nargs="+", default=DEFAULT_M)
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=DEFAULT_CONSTRUCTION_EF)
+    parser.add_argument("--search-ef", type=int, nargs="+", default=DEFAULT_SEARCH_EF)
+    parser.add_argument("--k", type=int, nargs="+", default=DEFAULT_K)
+    parser.add_argument("--workdir", help="평가용 컬렉션을 만들 폴더 (기본: 임시 폴더, 끝나면 삭제)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    import chromadb
+
+    name = args.collection or active_collection_name(args.persist_directory)
+    source = chromadb.PersistentClient(path=args.persist_directory).get_collection(name, embedding_function=None)
+    space = collection_space(source)
+    ids, matrix = load_vectors(source)
+    if not ids:
+        print("❌ 평가할 벡터가 없습니다.")
+        sys.exit(1)
+    if args.gold:
+        from resources import get_embeddings
+        queries, relevant = load_gold(args.gold, get_embeddings())
+    else:
+        queries, relevant = synthetic_gold(ids, matrix, args.samples, args.noise)
+    print(f"📦 벡터 {len(ids)}개 x {matrix.shape[1]}차원 ({space}), 질의 {len(queries)}개")
+
+    workdir = tempfile.mkdtemp(prefix="hnsw-eval-") if args.workdir is None else args.workdir
+    try:
+        rows = sweep(ids, matrix, queries, relevant, space, workdir, args.m, args.construction_ef, args.search_ef,
+                     args.k)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_rows(rows))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(ids), "dim": int(matrix.shape[1]), "space": space, "queries": len(queries),
+                       "rows": rows}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
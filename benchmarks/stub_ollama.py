@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 🧪 로컬 벤치마크용 가짜 Ollama 서버 (실제 모델 없이 같은 API 형태로 응답)
+DEFAULT_DIM = 1024
+
+# 생성 응답에 사용할 단어 (질문마다 결정적으로 섞어서 토큰으로 스트리밍)
+_ANSWER_WORDS = ["고추", "탄저병", "방제", "시기", "는", "장마", "전후", "이며", "약제", "를", "살포", "합니다", ".",
+                 "rice", "blast", "NPK", "10-5-5", "비료", "토양", "관리", "가", "중요", "합니다", "."]
+
+def fake_embedding(text, dim=DEFAULT_DIM):
+    """텍스트 해시로 만든 결정적(항상 같은) 단위 벡터"""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        block = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(v / 2**31 - 1.0 for v in struct.unpack("<8I", block))
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+class StubConfig:
+    """응답 지연과 오류율 설정"""
+
+    def __init__(self, dim=DEFAULT_DIM, base_latency=0.02, per_item_latency=0.002, error_rate=0.0,
+                 first_token_latency=0.1, token_latency=0.01, answer_tokens=64):
+        self.dim = dim
+        self.base_latency = base_latency  # 요청 1회 고정 지연(초)
+        self.per_item_latency = per_item_latency  # 텍스트 1개당 추가 지연(초)
+        self.error_rate = error_rate  # 503을 돌려줄 확률 (재시도 테스트용)
+        self.first_token_latency = first_token_latency  # 생성: 첫 토큰까지 지연(초, prefill에 해당)
+        self.token_latency = token_latency  # 생성: 토큰 사이 지연(초)
+        self.answer_tokens = answer_tokens  # 생성: 답변 토큰 수
+        self.requests = 0
+        self.lock = threading.Lock()
+
+def fake_answer(prompt, tokens):
+    """프롬프트 해시로 정해지는(항상 같은) 답변 토큰 목록"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    return [rng.choice(_ANSWER_WORDS) + " " for _ in range(tokens)]
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_generate(self, payload):
+            # /api/generate 스트리밍: 줄마다 JSON 하나 (NDJSON), 마지막 줄은 done=true
+            prompt = payload.get("prompt", "")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            if prompt:
+                time.sleep(config.first_token_latency)
+                for i, token in enumerate(fake_answer(prompt, config.answer_tokens)):
+                    if i:
+                        time.sleep(config.token_latency)
+                    line = {"model": payload.get("model"), "response": token, "done": False}
+                    self.wfile.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+            # 프롬프트가 없으면 모델 로딩(워밍업) 요청으로 보고 바로 done만 보냄
+            done = {"model": payload.get("model"), "response": "", "done": True, "eval_count": config.answer_tokens}
+            self.wfile.write(json.dumps(done).encode("utf-8") + b"\n")
+
+        def do_POST(self):
+            with config.lock:
+                config.requests += 1
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if random.random() < config.error_rate:
+                self._reply(503, {"error": "stub overloaded"})
+                return
+
+            if self.path == "/api/embed":
+                inputs = payload.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                time.sleep(config.base_latency + config.per_item_latency * len(inputs))
+                self._reply(200, {"model": payload.get("model"), "embeddings": [fake_embedding(t, config.dim) for t in inputs]})
+            elif self.path == "/api/embeddings":
+                # 구버전 단건 엔드포인트 (langchain OllamaEmbeddings가 사용)
+                time.sleep(config.base_latency + config.per_item_latency)
+                self._reply(200, {"embedding": fake_embedding(payload.get("prompt", ""), config.dim)})
+            elif self.path == "/api/generate":
+                if payload.get("stream", True):
+                    self._stream_generate(payload)
+                else:
+                    answer = "".join(fake_answer(payload.get("prompt", ""), config.answer_tokens))
+                    time.sleep(config.first_token_latency + config.token_latency * config.answer_tokens)
+                    self._reply(200, {"model": payload.get("model"), "response": answer, "done": True})
+            else:
+                self._reply(404, {"error": f"unknown path {self.path}"})
+
+    return Handler
+
+def start_stub_server(config=None, host="127.0.0.1", port=0):
+    """가짜 Ollama 서버를 백그라운드 스레드로 시작하고 (server, base_url)을 반환하는 함수"""
+    config = StubConfig() if config is None else config
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 Ollama 서버 실행")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-item-latency", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.1)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    stub_config = StubConfig(args.dim, args.base_latency, args.per_item_latency, args.error_rate,
+                             args.first_token_latency, args.token_latency, args.answer_tokens)
+    server, url = start_stub_server(stub_config, port=args.port)
+    print(f"🧪 Stub Ollama server: {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,95 @@
+import re
+
+# 📦 프롬프트 문맥 설정
+CONTEXT_TOKEN_BUDGET = 2048  # 문서 내용에 쓸 최대 토큰 수 (gemma2 8k 문맥 중 prefill이 빠른 범위)
+MIN_OVERLAP_CHARS = 20  # 이보다 짧게 겹치는 건 우연으로 보고 병합하지 않음
+MAX_OVERLAP_CHARS = 400  # 겹침을 찾을 최대 길이 (chunk_overlap=200의 여유분 포함)
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+def estimate_tokens(text):
+    """토크나이저 없이 토큰 수를 어림하는 함수 (한글은 글자당 약 1토큰, 그 외는 4글자당 1토큰)"""
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+def _overlap(left, right):
+    """left의 끝부분과 right의 앞부분이 겹치는 길이 (MIN_OVERLAP_CHARS 미만이면 0)"""
+    for size in range(min(len(left), len(right), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _merge(first, second):
+    """같은 페이지의 두 청크를 겹치는 부분 없이 하나로 합치는 함수 (이어지지 않으면 None)"""
+    if second in first:
+        return first
+    if first in second:
+        return second
+    size = _overlap(first, second)
+    if size:
+        return first + second[size:]
+    size = _overlap(second, first)
+    if size:
+        return second + first[size:]
+    return None
+
+def _truncate(text, budget):
+    """토큰 예산에 맞게 텍스트 뒷부분을 자르는 함수"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+def pack_context(docs, budget=CONTEXT_TOKEN_BUDGET, stats=None):
+    """관련도 순서의 청크들을 토큰 예산 안의 문맥 블록 목록으로 만드는 함수
+
+    - 같은 문서·페이지에서 이어지는 청크(chunk_overlap으로 겹치는 청크)는 겹침을 제거하고 하나로 합침
+    - 블록은 가장 관련도가 높은 청크의 순서대로 배치
+    - 예산을 넘는 청크는 건너뜀 (가장 관련도가 높은 청크가 혼자 예산을 넘으면 잘라서 사용)
+    stats(dict)를 넘기면 사용/병합/제외된 청크 수와 예상 토큰 수를 기록한다.
+    """
+    blocks = []  # {"group": (source, page), "text": 텍스트}
+    used = merged = skipped = 0
+    for doc in docs:
+        text = doc.page_content.strip()
+        group = (doc.metadata.get("source"), doc.metadata.get("page"))
+
+        # 이어지는 블록을 모두 합침 (두 블록 사이를 잇는 청크면 세 조각이 하나가 됨)
+        absorbed, new_text = [], text
+        for block in blocks:
+            if block["group"] == group:
+                combined = _merge(block["text"], new_text)
+                if combined is not None:
+                    absorbed.append(block)
+                    new_text = combined
+
+        cost = estimate_tokens(new_text) - sum(estimate_tokens(block["text"]) for block in absorbed)
+        if used + cost > budget:
+            if blocks:
+                skipped += 1
+                continue
+            new_text = _truncate(text, budget)
+            cost = estimate_tokens(new_text)
+
+        if absorbed:
+            # 합친 블록은 그중 가장 관련도가 높은(앞에 있는) 블록 자리에 둠
+            absorbed[0]["text"] = new_text
+            blocks = [block for block in blocks if not any(block is other for other in absorbed[1:])]
+            merged += 1
+        else:
+            blocks.append({"group": group, "text": new_text})
+        used += cost
+
+    if stats is not None:
+        stats.update({
+            "chunks": len(docs),
+            "blocks": len(blocks),
+            "merged": merged,
+            "skipped": skipped,
+            "tokens": used,
+        })
+    return [block["text"] for block in blocks]
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+# 📂 임베딩 캐시 저장 경로
+EMBEDDING_CACHE_PATH = "C:/rag-project/embedding_cache.sqlite"
+
+# 메모리 LRU에 유지할 벡터 개수
+DEFAULT_LRU_SIZE = 10000
+
+# SQLite IN (...) 조회 한 번에 넣을 키 개수
+_SQL_BATCH = 500
+
+def normalize_text(text):
+    """캐시 키 계산용 텍스트 정규화 (유니코드 NFC + 앞뒤 공백 제거)"""
+    return unicodedata.normalize("NFC", text).strip()
+
+def text_hash(text):
+    """정규화된 텍스트의 SHA-256 해시"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 객체를 감싸서 (모델명, 텍스트 해시) 단위로 결과를 재사용하는 캐시
+
+    메모리 LRU → SQLite(float32 BLOB) → 실제 임베딩 모델 순서로 조회한다.
+    문서용/질문용 임베딩은 모델에 따라 다를 수 있으므로 따로 저장한다.
+    """
+
+    def __init__(self, base, model_name, path=EMBEDDING_CACHE_PATH, lru_size=DEFAULT_LRU_SIZE):
+        self.base = base
+        self.model_name = model_name
+        self.lru_size = lru_size
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, kind, text_hash)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.commit()
+
+    # 🔎 조회 & 저장
+    def _lru_get(self, key):
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, kind, hashes):
+        found = {}
+        for i in range(0, len(hashes), _SQL_BATCH):
+            batch = hashes[i:i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                [self.model_name, kind, *batch],
+            ).fetchall()
+            for digest, blob in rows:
+                found[digest] = array("f", blob).tolist()
+        return found
+
+    def _disk_put(self, kind, items):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, vector) VALUES (?, ?, ?, ?)",
+            [(self.model_name, kind, digest, array("f", vector).tobytes()) for digest, vector in items],
+        )
+        self._conn.commit()
+
+    def _embed(self, kind, texts, embed_missing):
+        hashes = [text_hash(text) for text in texts]
+        vectors = {}
+
+        with self._lock:
+            for digest in hashes:
+                vector = self._lru_get((kind, digest))
+                if vector is not None:
+                    vectors[digest] = vector
+            pending = list(dict.fromkeys(d for d in hashes if d not in vectors))
+            if pending:
+                for digest, vector in self._disk_get(kind, pending).items():
+                    vectors[digest] = vector
+                    self._lru_put((kind, digest), vector)
+
+        # 캐시에 없는 텍스트만 모델에 요청 (같은 배치 내 중복 텍스트는 한 번만)
+        missing = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in vectors:
+                missing.setdefault(digest, text)
+        if missing:
+            computed = embed_missing(list(missing.values()))
+            new_items = list(zip(missing.keys(), computed))
+            with self._lock:
+                self._disk_put(kind, new_items)
+                for digest, vector in new_items:
+                    vectors[digest] = vector
+                    self._lru_put((kind, digest), vector)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [vectors[digest] for digest in hashes]
+
+    # 🧠 Embeddings 인터페이스
+    def embed_documents(self, texts):
+        return self._embed("document", list(texts), self.base.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda missing: [self.base.embed_query(missing[0])])[0]
+
+    def stats(self):
+        """캐시 적중/미스 횟수와 적중률"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "lru_size": len(self._lru),
+            }
@@ -0,0 +1,135 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from tracing import count, span
+
+# 🌐 Ollama 서버 주소
+OLLAMA_BASE_URL = "http://localhost:11434"
+
+# ⚙️ 배치 & 동시성 기본값
+MAX_IN_FLIGHT = 4  # 동시에 보낼 임베딩 요청 수
+INITIAL_BATCH_SIZE = 32
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 256
+TARGET_LATENCY = 2.0  # 요청 1회의 목표 응답 시간(초), 이를 기준으로 배치 크기를 조절
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+
+# 재시도할 HTTP 상태 코드 (과부하/일시적 오류)
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+class OllamaBatchEmbeddings(Embeddings):
+    """Ollama /api/embed 배치 엔드포인트로 여러 텍스트를 한 번에 임베딩하는 실행기
+
+    - 요청 1회에 여러 텍스트를 보내 요청당 오버헤드를 줄임
+    - 동시에 진행 중인 요청 수를 max_in_flight로 제한 (여러 스레드에서 호출해도 합산)
+    - 관측된 응답 시간에 따라 배치 크기를 늘리거나 줄임
+    - 일시적 오류는 지수 백오프로 재시도
+
+    OllamaEmbeddings와 같은 문서/질문 접두어를 붙이지만, /api/embed는 L2 정규화된 벡터를 반환하므로
+    예전 /api/embeddings로 만든 벡터와 크기가 다르다 (같은 컬렉션에 섞지 않도록
+    indexer.EMBEDDING_VERSION을 매니페스트에 기록하고 reembed_collection으로 기존 벡터를 교체).
+    """
+
+    def __init__(self, model, base_url=OLLAMA_BASE_URL, max_in_flight=MAX_IN_FLIGHT,
+                 batch_size=INITIAL_BATCH_SIZE, min_batch_size=MIN_BATCH_SIZE, max_batch_size=MAX_BATCH_SIZE,
+                 target_latency=TARGET_LATENCY, max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                 timeout=120, embed_instruction="passage: ", query_instruction="query: "):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/api/embed"
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.batch_size = max(min_batch_size, min(batch_size, max_batch_size))
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.embed_instruction = embed_instruction
+        self.query_instruction = query_instruction
+
+        self.requests = 0
+        self.retries = 0
+        self.texts = 0
+        self.request_seconds = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embed")
+
+    # 🌐 HTTP 요청 (재시도 포함)
+    def _post(self, inputs):
+        body = json.dumps({"model": self.model, "input": inputs}).encode("utf-8")
+        for attempt in range(self.max_retries + 1):
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())["embeddings"]
+            except urllib.error.HTTPError as e:
+                if e.code not in _RETRY_STATUS or attempt == self.max_retries:
+                    raise
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+            with self._lock:
+                self.retries += 1
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    # 📏 배치 크기 조절: 목표보다 느리면 절반으로, 충분히 빠르면 25%씩 늘림
+    def _observe(self, size, seconds):
+        with self._lock:
+            self.requests += 1
+            self.texts += size
+            self.request_seconds += seconds
+            if size < self.batch_size:
+                return  # 마지막 자투리 배치는 조절 기준에서 제외
+            if seconds > self.target_latency:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            elif seconds < self.target_latency / 2:
+                self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 4))
+
+    def _run_batch(self, inputs):
+        try:
+            start = time.perf_counter()
+            with span("embed.batch"):
+                vectors = self._post(inputs)
+            self._observe(len(inputs), time.perf_counter() - start)
+            count("embedded_texts", len(inputs))
+            return vectors
+        finally:
+            self._slots.release()
+
+    # 🧠 Embeddings 인터페이스
+    def embed_documents(self, texts):
+        inputs = [f"{self.embed_instruction}{text}" for text in texts]
+        futures = []
+        start = 0
+        while start < len(inputs):
+            self._slots.acquire()  # 진행 중인 요청이 max_in_flight개면 하나가 끝날 때까지 대기
+            with self._lock:
+                size = self.batch_size
+            futures.append(self._pool.submit(self._run_batch, inputs[start:start + size]))
+            start += size
+
+        vectors = []
+        for future in futures:
+            vectors.extend(future.result())
+        return vectors
+
+    def embed_query(self, text):
+        self._slots.acquire()
+        return self._run_batch([f"{self.query_instruction}{text}"])[0]
+
+    def stats(self):
+        """요청 수, 재시도 수, 현재 배치 크기, 평균 응답 시간"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "texts": self.texts,
+                "batch_size": self.batch_size,
+                "avg_request_seconds": self.request_seconds / self.requests if self.requests else 0.0,
+            }
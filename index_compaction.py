@@ -0,0 +1,237 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+import numpy as np
+from indexer import (MANIFEST_PATH, needs_legacy_cleanup, needs_reembed, reembed_collection, remove_legacy_chunks,
+                     reset_tombstones, tombstone_count)
+from resources import HNSW_SETTINGS, set_active_collection
+
+# 🧹 압축 설정
+COMPACT_THRESHOLD = 0.2  # 삭제 표시 비율이 이 값을 넘으면 HNSW 색인을 다시 만듦
+COPY_BATCH_SIZE = 500  # 컬렉션 복사 시 한 번에 옮길 청크 수
+LATENCY_SAMPLES = 20  # 압축 전후 검색 지연 측정에 사용할 질의 수
+LATENCY_TOP_K = 4
+GENERATION_SEPARATOR = "__"  # 압축으로 만든 컬렉션 이름: <기본 이름>__<세대 ID>
+BACKUP_SUFFIX = "__compact_backup"  # 예전 방식(지우고 다시 만들기) 압축이 남긴 백업 컬렉션 이름 접미사
+
+def directory_bytes(path):
+    """디렉터리 아래 모든 파일의 크기 합"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def tombstone_ratio(vectorstore, path=MANIFEST_PATH):
+    """(삭제 표시 수) / (살아 있는 청크 수 + 삭제 표시 수)"""
+    tombstones = tombstone_count(path)
+    total = vectorstore._collection.count() + tombstones
+    return tombstones / total if total else 0.0
+
+def _collection_names(client):
+    # chromadb 버전에 따라 이름 또는 Collection 객체 목록을 반환
+    return {getattr(collection, "name", collection) for collection in client.list_collections()}
+
+def _copy(source, target, batch_size):
+    """source 컬렉션의 청크(임베딩 포함)를 재임베딩 없이 target으로 복사하는 함수"""
+    offset = 0
+    while True:
+        page = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not len(page["ids"]):
+            return offset
+        target.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"],
+                   metadatas=page["metadatas"])
+        offset += len(page["ids"])
+
+def _cleanup(client, name, base, metadata, batch_size):
+    """이전 압축이 중간에 끊겨 남은 컬렉션을 정리하는 함수 (검색 중인 name 컬렉션은 그대로 둠)
+
+    예전 방식의 백업 컬렉션이 검색 중인 컬렉션보다 크면 (원본을 지운 뒤 끊긴 경우) 백업 내용으로 복구한다.
+    """
+    for leftover in sorted(_collection_names(client)):
+        if leftover == name:
+            continue
+        if leftover == name + BACKUP_SUFFIX:
+            backup = client.get_collection(leftover, embedding_function=None)
+            current = client.get_or_create_collection(name, metadata=metadata, embedding_function=None)
+            if current.count() < backup.count():
+                print(f"🔁 중단된 압축을 복구합니다: {backup.count()}개 청크")
+                client.delete_collection(name)
+                _copy(backup, client.create_collection(name, metadata=metadata, embedding_function=None), batch_size)
+        elif not leftover.startswith(base + GENERATION_SEPARATOR):
+            continue
+        print(f"🧹 이전 압축이 남긴 컬렉션을 지웁니다: {leftover}")
+        client.delete_collection(leftover)
+
+def rebuild_collection(vectorstore, batch_size=COPY_BATCH_SIZE):
+    """삭제 표시가 없는 새 HNSW 세그먼트로 컬렉션을 다시 만드는 함수
+
+    새 이름의 컬렉션에 복사하고 청크 수를 확인한 뒤 검색 대상을 새 컬렉션으로 바꾸고 나서 이전 컬렉션을 지운다.
+    복사하는 동안에도 검색은 이전 컬렉션에서 계속되고, 중간에 종료되면 이전 컬렉션이 그대로 사용되며
+    다음 실행에서 만들다 만 컬렉션을 지운다. 새 컬렉션에는 resources.HNSW_SETTINGS의 HNSW 설정이 적용된다.
+    """
+    client = vectorstore._client
+    persist_directory = vectorstore._persist_directory
+    current = vectorstore._collection
+    name = current.name
+    base = name.split(GENERATION_SEPARATOR)[0]
+    metadata = {**(current.metadata or {}), **HNSW_SETTINGS} or None
+    _cleanup(client, name, base, metadata, batch_size)
+
+    new_name = f"{base}{GENERATION_SEPARATOR}{uuid.uuid4().hex[:8]}"
+    collection = client.create_collection(new_name, metadata=metadata, embedding_function=None)
+    try:
+        copied = _copy(current, collection, batch_size)
+        # 복사 중에 추가/삭제가 있었거나 복사가 덜 되었으면 전환하지 않음 (압축은 인덱싱 작업과 같은 대기열에서 실행)
+        if collection.count() != current.count():
+            raise RuntimeError(f"복사한 청크 수 {collection.count()}개가 원본 {current.count()}개와 다릅니다.")
+    except Exception:
+        client.delete_collection(new_name)
+        raise
+
+    set_active_collection(new_name, persist_directory)
+    vectorstore._collection = collection
+    client.delete_collection(name)
+    return copied
+
+def _vacuum(persist_directory):
+    """Chroma SQLite 파일에서 삭제된 행이 차지하던 공간을 회수하는 함수"""
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(db_path):
+        return
+    try:
+        with sqlite3.connect(db_path, timeout=30) as conn:
+            conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ chroma.sqlite3 VACUUM 실패: {e}")
+
+def _remove_orphan_segments(persist_directory):
+    """삭제된 컬렉션의 HNSW 세그먼트 디렉터리를 지우는 함수 (chromadb가 디스크에 남겨 두는 경우가 있음)"""
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(db_path):
+        return 0
+    with sqlite3.connect(db_path, timeout=30) as conn:
+        live = {row[0] for row in conn.execute("SELECT id FROM segments")}
+    removed = 0
+    for name in os.listdir(persist_directory):
+        path = os.path.join(persist_directory, name)
+        # 세그먼트 디렉터리 이름은 세그먼트 UUID
+        if not os.path.isdir(path) or len(name) != 36 or name.count("-") != 4 or name in live:
+            continue
+        try:
+            shutil.rmtree(path)
+            removed += 1
+        except OSError as e:
+            print(f"⚠️ 세그먼트 디렉터리 삭제 실패: {name} ({e})")
+    return removed
+
+def _sample_queries(collection, samples):
+    result = collection.get(limit=samples, include=["embeddings"])
+    return [list(vector) for vector in result["embeddings"]]
+
+def measure_latency(collection, queries, k=LATENCY_TOP_K):
+    """저장된 임베딩을 질의로 사용해 검색 지연(ms)을 측정하는 함수"""
+    if not queries:
+        return {"p50_ms": 0.0, "mean_ms": 0.0}
+    timings = []
+    for vector in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[vector], n_results=k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": float(np.percentile(timings, 50)), "mean_ms": float(np.mean(timings))}
+
+def compact(vectorstore, sparse_index=None, path=MANIFEST_PATH, batch_size=COPY_BATCH_SIZE, samples=LATENCY_SAMPLES):
+    """벡터 DB(HNSW)와 키워드 색인을 압축하고 회수한 용량과 전후 검색 지연을 반환하는 함수"""
+    persist_directory = vectorstore._persist_directory
+    tombstones = tombstone_count(path)
+    queries = _sample_queries(vectorstore._collection, samples)
+    bytes_before = directory_bytes(persist_directory)
+    latency_before = measure_latency(vectorstore._collection, queries)
+
+    start = time.perf_counter()
+    if hasattr(vectorstore, "compact"):
+        chunks = vectorstore.compact()  # NumPy 저장소는 삭제된 행을 빼고 파일을 다시 씀
+    else:
+        chunks = rebuild_collection(vectorstore, batch_size)
+    if sparse_index is not None:
+        sparse_index.compact()
+    _remove_orphan_segments(persist_directory)
+    _vacuum(persist_directory)
+    reset_tombstones(path)
+    seconds = time.perf_counter() - start
+
+    bytes_after = directory_bytes(persist_directory)
+    latency_after = measure_latency(vectorstore._collection, queries)
+    return {
+        "chunks": chunks,
+        "tombstones": tombstones,
+        "seconds": seconds,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "reclaimed_bytes": bytes_before - bytes_after,
+        "latency_before": latency_before,
+        "latency_after": latency_after,
+    }
+
+def maybe_compact(vectorstore, sparse_index=None, threshold=COMPACT_THRESHOLD, path=MANIFEST_PATH):
+    """삭제 표시 비율이 threshold를 넘을 때만 압축하는 함수 (압축하지 않으면 None)"""
+    if tombstone_ratio(vectorstore, path) <= threshold:
+        return None
+    return compact(vectorstore, sparse_index, path)
+
+def format_report(report):
+    """압축 결과를 사람이 읽기 쉬운 문자열로 만드는 함수"""
+    mb = 1024 * 1024
+    before, after = report["latency_before"], report["latency_after"]
+    return (
+        f"🧹 압축 완료: 청크 {report['chunks']}개, 삭제 표시 {report['tombstones']}개 제거 ({report['seconds']:.1f}s)\n"
+        f"💾 {report['bytes_before'] / mb:.1f} MB → {report['bytes_after'] / mb:.1f} MB "
+        f"({report['reclaimed_bytes'] / mb:.1f} MB 회수)\n"
+        f"⏱️ 검색 지연 p50 {before['p50_ms']:.2f} ms → {after['p50_ms']:.2f} ms "
+        f"(평균 {before['mean_ms']:.2f} ms → {after['mean_ms']:.2f} ms)"
+    )
+
+# 🛠️ CLI: python index_compaction.py stats | compact [--force] [--threshold 0.2] | reembed | cleanup-legacy
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 DB 삭제 표시 확인/압축")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="삭제 표시 수와 비율 출력")
+    compact_parser = commands.add_parser("compact", help="삭제 표시 비율이 기준을 넘으면 압축")
+    compact_parser.add_argument("--threshold", type=float, default=COMPACT_THRESHOLD, help="압축 기준 비율")
+    compact_parser.add_argument("--force", action="store_true", help="비율과 상관없이 압축")
+    commands.add_parser("reembed", help="임베딩 방식이 바뀐 기존 청크를 모두 다시 임베딩")
+    commands.add_parser("cleanup-legacy", help="매니페스트 도입 전에 저장된 (source 메타데이터 없는) 청크 삭제")
+    args = parser.parse_args()
+
+    from resources import get_sparse_index, get_vectorstore
+    vectorstore, sparse_index = get_vectorstore(), get_sparse_index()
+
+    if args.command == "stats":
+        print(f"🧾 청크 {vectorstore._collection.count()}개, 삭제 표시 {tombstone_count()}개 "
+              f"(비율 {tombstone_ratio(vectorstore):.1%})")
+        print(f"💾 {directory_bytes(vectorstore._persist_directory) / 1024 / 1024:.1f} MB")
+        if needs_reembed():
+            print("⚠️ 예전 임베딩 방식으로 저장된 벡터가 있습니다: python index_compaction.py reembed")
+        if needs_legacy_cleanup():
+            print("⚠️ 예전 청크 정리를 아직 하지 않았습니다: python index_compaction.py cleanup-legacy")
+    elif args.command == "cleanup-legacy":
+        print(f"🧹 source 없는 예전 청크 {remove_legacy_chunks(vectorstore, sparse_index)}개를 삭제했습니다. "
+              "해당 문서는 다시 업로드하거나 폴더에 다시 넣어 인덱싱하세요.")
+    elif args.command == "reembed":
+        from resources import get_embeddings
+        print(f"✅ 청크 {reembed_collection(vectorstore, get_embeddings())}개를 다시 임베딩했습니다.")
+    else:
+        if args.force:
+            result = compact(vectorstore, sparse_index)
+        else:
+            result = maybe_compact(vectorstore, sparse_index, threshold=args.threshold)
+        if result is None:
+            print(f"⏭️ 삭제 표시 비율 {tombstone_ratio(vectorstore):.1%}가 기준 {args.threshold:.0%} 이하입니다.")
+        else:
+            print(format_report(result))
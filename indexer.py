@@ -0,0 +1,325 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from tracing import span
+
+# 📂 인덱싱 매니페스트 경로 (어떤 파일과 청크가 벡터 DB에 들어있는지 기록)
+MANIFEST_PATH = "C:/rag-project/chroma_db/ingest_manifest.json"
+
+# 📁 문서 폴더 (업로드/감시 폴더, 하위 폴더의 파일은 이 폴더 기준 상대 경로를 문서 ID로 사용)
+DOCUMENT_ROOTS = ["C:/rag-project/pdf-files/", "C:/rag-project/text-file/"]
+
+# 🧠 저장된 벡터의 임베딩 방식 (바뀌면 기존 청크를 모두 다시 임베딩)
+# "api-embed": Ollama /api/embed 배치 엔드포인트 (L2 정규화된 벡터)
+# 예전 /api/embeddings 벡터는 방향은 같아도 크기가 달라서 l2 거리 공간에 함께 두면 순위가 섞임
+EMBEDDING_VERSION = "api-embed"
+REEMBED_BATCH_SIZE = 256  # 다시 임베딩할 때 한 번에 읽고 저장할 청크 수
+
+# 매니페스트 읽기/쓰기 동시 접근 방지
+_manifest_lock = threading.Lock()
+
+# 🔑 해시 & ID 생성
+def file_sha256(path):
+    """파일 내용의 SHA-256 해시를 계산하는 함수"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_sha256(text):
+    """청크 텍스트의 SHA-256 해시를 계산하는 함수"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def document_id(path, roots=DOCUMENT_ROOTS):
+    """문서 ID (문서 폴더 기준 상대 경로, 예: "2024/report.pdf")
+
+    하위 폴더가 다르면 같은 파일명이라도 다른 문서로 취급한다 (2023/report.pdf와 2024/report.pdf).
+    폴더 바로 아래 파일과 문서 폴더 밖의 파일(임시 업로드 경로 등)은 파일명만 사용하므로 기존 매니페스트와 호환된다.
+    """
+    absolute = os.path.abspath(path)
+    for root in roots:
+        try:
+            relative = os.path.relpath(absolute, os.path.abspath(root))
+        except ValueError:  # Windows에서 드라이브가 다름
+            continue
+        if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+            return relative.replace(os.sep, "/")
+    return os.path.basename(path)
+
+def chunk_id(doc_id, chunk_hash):
+    """Chroma에 저장할 안정적인 청크 ID (같은 문서의 같은 내용이면 항상 같은 ID)"""
+    return f"{doc_id}:{chunk_hash[:32]}"
+
+# 📒 매니페스트
+def load_manifest(path=MANIFEST_PATH):
+    """매니페스트를 읽는 함수 (없으면 빈 매니페스트)"""
+    if not os.path.exists(path):
+        return {"version": 1, "documents": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """매니페스트를 임시 파일에 쓴 뒤 교체하여 원자적으로 저장하는 함수"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def index_version(path=MANIFEST_PATH):
+    """인덱싱된 문서 집합의 버전 (매니페스트가 바뀔 때마다 달라지는 값, 파일을 읽지 않아 가벼움)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def is_unchanged(doc_id, file_hash, path=MANIFEST_PATH):
+    """이미 같은 내용으로 인덱싱된 파일인지 확인하는 함수"""
+    with _manifest_lock:
+        entry = load_manifest(path)["documents"].get(doc_id)
+    return entry is not None and entry["file_hash"] == file_hash
+
+# 🧩 증분 인덱싱
+# 임베딩 + 저장을 한 번에 처리할 청크 수 (메모리 사용량은 문서 크기가 아니라 이 값에 비례)
+INDEX_BATCH_SIZE = 64
+
+def chunk_metadata(doc_id, cid, digest, extra=None):
+    """청크와 함께 저장할 메타데이터 (extra: 페이지 번호 등 추가 정보)"""
+    metadata = {"source": doc_id, "chunk_hash": digest, "chunk_id": cid}
+    if extra:
+        metadata.update(extra)
+    return metadata
+
+def existing_chunk_ids(doc_id, path=MANIFEST_PATH):
+    """매니페스트에 기록된 문서의 청크 ID 집합"""
+    with _manifest_lock:
+        entry = load_manifest(path)["documents"].get(doc_id)
+    return set(entry["chunk_ids"]) if entry else set()
+
+class ChunkPlan:
+    """문서 하나의 청크 스트림을 나눠 받으면서 새로 추가할 청크와 삭제할 청크를 구분하는 계획
+
+    문서 전체의 청크를 모으지 않고 청크 ID만 기억하므로, 페이지 window마다 add()로 넘기고
+    돌려받은 새 청크를 바로 임베딩하면 메모리는 문서 크기가 아니라 window/배치 크기를 따른다.
+    """
+
+    def __init__(self, doc_id, path=MANIFEST_PATH):
+        self.doc_id = doc_id
+        self.existing_ids = existing_chunk_ids(doc_id, path)
+        self._seen_ids = {}  # 순서 유지용 dict (청크 ID → None)
+
+    def add(self, chunks):
+        """(텍스트, 추가 메타데이터) iterable 중 처음 보는 새 청크만 (청크 ID, 텍스트, 메타데이터) 목록으로 반환"""
+        new_chunks = []
+        for text, extra in chunks:
+            digest = chunk_sha256(text)
+            cid = chunk_id(self.doc_id, digest)
+            if cid in self._seen_ids:
+                continue
+            self._seen_ids[cid] = None
+            if cid not in self.existing_ids:
+                new_chunks.append((cid, text, chunk_metadata(self.doc_id, cid, digest, extra)))
+        return new_chunks
+
+    @property
+    def chunk_ids(self):
+        """지금까지 받은 문서의 모든 청크 ID (매니페스트 기록용)"""
+        return list(self._seen_ids)
+
+    def stale_ids(self):
+        """이전 인덱싱에는 있었지만 이번 문서에는 없는 청크 ID (모든 청크를 넘긴 뒤 호출)"""
+        return sorted(self.existing_ids - self._seen_ids.keys())
+
+def commit_document(doc_id, file_hash, chunk_ids, path=MANIFEST_PATH, deleted=0):
+    """문서의 인덱싱 결과를 매니페스트에 기록하는 함수
+
+    deleted: 이번에 벡터 DB에서 삭제한 청크 수 (압축 시점 판단용 삭제 표시 수에 누적)
+    """
+    with _manifest_lock:
+        manifest = load_manifest(path)
+        if not manifest["documents"]:
+            manifest.setdefault("embedding", EMBEDDING_VERSION)  # 처음 인덱싱하는 벡터 DB는 지금 방식으로 시작
+        manifest["documents"][doc_id] = {
+            "file_hash": file_hash,
+            "chunk_ids": list(chunk_ids),
+            "indexed_at": time.time(),
+        }
+        manifest["tombstones"] = manifest.get("tombstones", 0) + deleted
+        save_manifest(manifest, path)
+
+def delete_document(vectorstore, doc_id, sparse_index=None, path=MANIFEST_PATH):
+    """문서 하나의 모든 청크를 벡터 DB/키워드 색인/매니페스트에서 삭제하는 함수
+
+    매니페스트에 없는 청크(매니페스트 도입 전에 저장된 청크 등)도 source 메타데이터로 찾아 함께 삭제한다.
+    반환값: 삭제한 청크 수
+    """
+    ids = set(existing_chunk_ids(doc_id, path))
+    ids.update(vectorstore._collection.get(where={"source": doc_id}, include=[])["ids"])
+    if ids:
+        vectorstore.delete(ids=sorted(ids))
+    if sparse_index is not None:
+        sparse_index.delete_source(doc_id)
+
+    with _manifest_lock:
+        manifest = load_manifest(path)
+        manifest["documents"].pop(doc_id, None)
+        manifest["tombstones"] = manifest.get("tombstones", 0) + len(ids)
+        save_manifest(manifest, path)
+    return len(ids)
+
+def tombstone_count(path=MANIFEST_PATH):
+    """마지막 압축 이후 벡터 DB에서 삭제한 청크 수 (HNSW 색인에는 삭제 표시로 남아 있음)"""
+    with _manifest_lock:
+        return load_manifest(path).get("tombstones", 0)
+
+def reset_tombstones(path=MANIFEST_PATH):
+    """압축이 끝난 뒤 삭제 표시 수를 0으로 되돌리는 함수"""
+    with _manifest_lock:
+        manifest = load_manifest(path)
+        manifest["tombstones"] = 0
+        save_manifest(manifest, path)
+
+def write_vectors(vectorstore, ids, texts, metadatas, vectors):
+    """미리 계산한 임베딩을 그대로 벡터 DB에 저장하는 함수 (재임베딩 없음)"""
+    with span("index.write"):
+        vectorstore._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+
+# 🔁 임베딩 방식이 바뀐 벡터 DB 다시 임베딩 (청크 ID/본문/메타데이터는 그대로, 벡터만 교체)
+def needs_reembed(path=MANIFEST_PATH):
+    """매니페스트에 기록된 임베딩 방식이 지금과 달라 기존 벡터를 다시 만들어야 하는지 확인하는 함수"""
+    with _manifest_lock:
+        manifest = load_manifest(path)
+    return bool(manifest["documents"]) and manifest.get("embedding") != EMBEDDING_VERSION
+
+def reembed_collection(vectorstore, embeddings, path=MANIFEST_PATH, batch_size=REEMBED_BATCH_SIZE):
+    """벡터 DB의 모든 청크를 지금 임베딩 방식으로 다시 임베딩하고 매니페스트에 기록하는 함수 (청크 수 반환)
+
+    파일이 바뀌지 않았으면 인덱싱을 건너뛰므로, 예전 방식의 벡터는 이 함수로만 교체된다.
+    도중에 중단되면 다시 실행하면 되고, 이미 바꾼 청크는 임베딩 캐시에서 바로 가져온다.
+    """
+    collection = vectorstore._collection
+    ids, offset = [], 0
+    while True:
+        # 저장하면서 순서가 바뀌지 않도록 ID 목록을 먼저 모두 읽음
+        page = collection.get(limit=batch_size, offset=offset, include=[])
+        if not len(page["ids"]):
+            break
+        ids.extend(page["ids"])
+        offset += len(page["ids"])
+
+    for start in range(0, len(ids), batch_size):
+        page = collection.get(ids=ids[start:start + batch_size], include=["documents", "metadatas"])
+        texts = [text or "" for text in page["documents"]]
+        write_vectors(vectorstore, page["ids"], texts, page["metadatas"], embeddings.embed_documents(texts))
+        print(f"🔁 다시 임베딩: {min(start + batch_size, len(ids))}/{len(ids)}")
+
+    with _manifest_lock:
+        manifest = load_manifest(path)
+        manifest["embedding"] = EMBEDDING_VERSION
+        save_manifest(manifest, path)
+    return len(ids)
+
+# 🧹 매니페스트 도입 전 청크 정리 (Chroma.from_texts로 저장된 청크는 임의 UUID ID에 source 메타데이터가 없어서
+# 바뀐 청크 삭제나 문서 삭제로 지워지지 않고, 같은 파일을 다시 인덱싱하면 새 청크와 함께 중복으로 남음)
+LEGACY_MIGRATION = "legacy-chunks"
+
+def needs_legacy_cleanup(path=MANIFEST_PATH):
+    """source 메타데이터가 없는 예전 청크 정리를 아직 하지 않았는지 확인하는 함수"""
+    with _manifest_lock:
+        return LEGACY_MIGRATION not in load_manifest(path).get("migrations", [])
+
+def remove_legacy_chunks(vectorstore, sparse_index=None, path=MANIFEST_PATH, batch_size=REEMBED_BATCH_SIZE):
+    """source 메타데이터가 없는 예전 청크를 벡터 DB/키워드 색인에서 한 번 삭제하고 매니페스트에 기록하는 함수
+
+    지운 청크의 문서는 다시 인덱싱해야 검색된다 (이미 지금 방식으로 인덱싱된 문서는 그대로 검색됨).
+    반환값: 삭제한 청크 수
+    """
+    collection = vectorstore._collection
+    legacy_ids, offset = [], 0
+    while True:
+        # 삭제하면서 순서가 바뀌지 않도록 먼저 모두 훑은 뒤 삭제
+        page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        if not len(page["ids"]):
+            break
+        legacy_ids.extend(cid for cid, metadata in zip(page["ids"], page["metadatas"])
+                          if not (metadata or {}).get("source"))
+        offset += len(page["ids"])
+
+    for start in range(0, len(legacy_ids), batch_size):
+        vectorstore.delete(ids=legacy_ids[start:start + batch_size])
+    if sparse_index is not None and legacy_ids:
+        sparse_index.delete(legacy_ids)
+
+    with _manifest_lock:
+        manifest = load_manifest(path)
+        if LEGACY_MIGRATION not in manifest.get("migrations", []):
+            manifest["migrations"] = manifest.get("migrations", []) + [LEGACY_MIGRATION]
+        manifest["tombstones"] = manifest.get("tombstones", 0) + len(legacy_ids)
+        save_manifest(manifest, path)
+    return len(legacy_ids)
+
+def index_chunks(vectorstore, doc_id, file_hash, chunks, batch_size=INDEX_BATCH_SIZE, path=MANIFEST_PATH,
+                 sparse_index=None, on_batch=None):
+    """청크 스트림을 배치 단위로 받아 바뀐 청크만 벡터 DB에 반영하는 함수
+
+    chunks: (텍스트, 추가 메타데이터) 쌍의 iterable (generator 가능)
+    - 이전 인덱싱에 없던 청크만 batch_size개씩 임베딩하여 추가
+    - 더 이상 문서에 없는 청크는 마지막에 벡터 DB에서 삭제
+    - 그대로인 청크는 임베딩 없이 건너뜀
+    sparse_index를 넘기면 키워드 색인도 같은 배치 단위로 함께 갱신한다.
+    on_batch(지금까지 저장한 청크 수)는 배치가 저장될 때마다 호출된다 (진행률 표시용).
+    """
+    existing_ids = existing_chunk_ids(doc_id, path)
+    seen_ids = {}
+    batch = []
+    added = 0
+    written = 0
+
+    def flush():
+        nonlocal written
+        # 임베딩(embed.batch) + 벡터 DB/키워드 색인 저장
+        with span("index.batch"):
+            vectorstore.add_texts(
+                texts=[text for text, _, _ in batch],
+                metadatas=[metadata for _, metadata, _ in batch],
+                ids=[cid for _, _, cid in batch],
+            )
+            if sparse_index is not None:
+                sparse_index.add_many([(cid, doc_id, text) for text, _, cid in batch])
+        written += len(batch)
+        batch.clear()
+        if on_batch is not None:
+            on_batch(written)
+
+    for text, extra in chunks:
+        digest = chunk_sha256(text)
+        cid = chunk_id(doc_id, digest)
+        if cid in seen_ids:
+            continue
+        seen_ids[cid] = None
+        if cid in existing_ids:
+            continue
+        batch.append((text, chunk_metadata(doc_id, cid, digest, extra), cid))
+        added += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    stale_ids = sorted(existing_ids - seen_ids.keys())
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+        if sparse_index is not None:
+            sparse_index.delete(stale_ids)
+    commit_document(doc_id, file_hash, seen_ids, path, deleted=len(stale_ids))
+
+    return {
+        "chunks": len(seen_ids),
+        "added": added,
+        "deleted": len(stale_ids),
+        "unchanged": len(seen_ids) - added,
+    }
@@ -0,0 +1,284 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from indexer import MANIFEST_PATH, ChunkPlan, commit_document, write_vectors
+from pdf_extractor import PAGE_WINDOW, check_document, extract_pages
+from pdf_processor import iter_chunks
+from resources import get_embeddings, get_sparse_index, get_vectorstore
+
+# ⚙️ 단계별 동시성 설정
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # PDF 추출/OCR 프로세스 수
+EMBED_WORKERS = 4  # 동시에 진행할 임베딩 요청 수
+EMBED_BATCH_SIZE = 64  # 임베딩 요청 1회당 청크 수
+QUEUE_SIZE = 8  # 단계 사이 대기열 크기 (배치 단위, 가득 차면 앞 단계가 대기)
+
+_STOP = object()
+
+class _DocumentJob:
+    """문서 하나의 인덱싱 상태 (분할이 끝나고 모든 배치가 저장되면 매니페스트에 기록)
+
+    페이지 window 결과는 끝나는 순서대로 도착하므로 ready에 모았다가 페이지 순서대로 분할한다.
+    """
+
+    def __init__(self, path, doc_id, file_hash, plan, windows):
+        self.path = path
+        self.doc_id = doc_id
+        self.file_hash = file_hash
+        self.plan = plan
+        self.windows = windows  # 페이지 window 수
+        self.next_window = 0  # 다음에 분할할 window 번호 (메인 스레드만 변경)
+        self.ready = {}  # window 번호 → (페이지 번호, 텍스트) 목록
+        self.batch = []  # 아직 임베딩 대기열에 넣지 않은 새 청크
+        self.has_text = False
+        self.failed = False
+        self.pending = 0  # 대기열에 넣었지만 아직 저장 단계를 지나지 않은 배치 수
+        self.sealed = False  # 모든 배치를 대기열에 넣었는지
+        self._lock = threading.Lock()
+
+    def start_batch(self):
+        with self._lock:
+            self.pending += 1
+
+    def seal(self):
+        """마지막 (빈) 배치를 세고 더 이상 배치가 없다고 표시하는 함수"""
+        with self._lock:
+            self.sealed = True
+            self.pending += 1
+
+    def finish_batch(self):
+        """저장 단계에서 배치 하나를 끝내고, 문서의 마지막 배치였는지 반환하는 함수"""
+        with self._lock:
+            self.pending -= 1
+            return self.sealed and self.pending == 0
+
+class _Progress:
+    """파이프라인 진행 상황과 처리량(pages/s, chunks/s) 집계"""
+
+    def __init__(self, total_files):
+        self.total_files = total_files
+        self.files_done = 0
+        self.files_skipped = 0
+        self.files_failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        with self._lock:
+            return {
+                "files": self.total_files,
+                "done": self.files_done,
+                "skipped": self.files_skipped,
+                "failed": self.files_failed,
+                "pages": self.pages,
+                "chunks": self.chunks,
+                "seconds": elapsed,
+                "pages_per_sec": self.pages / elapsed,
+                "chunks_per_sec": self.chunks / elapsed,
+            }
+
+    def report(self, label):
+        s = self.summary()
+        finished = s["done"] + s["skipped"] + s["failed"]
+        print(
+            f"📊 [{finished}/{s['files']}] {label} | "
+            f"{s['pages_per_sec']:.1f} pages/s | {s['chunks_per_sec']:.1f} chunks/s"
+        )
+
+def run_pipeline(pdf_paths, vectorstore=None, embeddings=None, extract_workers=EXTRACT_WORKERS,
+                 embed_workers=EMBED_WORKERS, batch_size=EMBED_BATCH_SIZE, queue_size=QUEUE_SIZE, sparse_index=None,
+                 manifest_path=MANIFEST_PATH):
+    """여러 PDF를 단계별 파이프라인으로 인덱싱하는 함수
+
+    추출/OCR(프로세스 풀, 페이지 window 단위) → 청크 분할(메인 스레드) → 임베딩(동시 요청 제한)
+    → 벡터 DB/키워드 색인 저장(단일 writer)
+    단계 사이는 크기가 제한된 대기열로 연결되어, 뒷 단계가 느리면 앞 단계가 자동으로 멈춘다.
+    큰 문서도 window마다 분할해 batch_size개씩 임베딩 대기열에 넣으므로 문서 전체의 텍스트/청크를 메모리에 모으지 않는다.
+    manifest_path를 넘기면 다른 매니페스트에 기록한다 (벤치마크처럼 별도 벡터 DB에 인덱싱할 때).
+    """
+    vectorstore = get_vectorstore() if vectorstore is None else vectorstore
+    embeddings = get_embeddings() if embeddings is None else embeddings
+    sparse_index = get_sparse_index() if sparse_index is None else sparse_index
+
+    progress = _Progress(len(pdf_paths))
+    embed_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+
+    # 🧠 임베딩 단계
+    def embed_worker():
+        while True:
+            item = embed_queue.get()
+            if item is _STOP:
+                return
+            job, ids, texts, metadatas = item
+            vectors = None
+            if not job.failed:
+                try:
+                    vectors = embeddings.embed_documents(texts)
+                except Exception as e:
+                    job.failed = True
+                    print(f"❌ 임베딩 실패: {job.doc_id} ({e})")
+            write_queue.put((job, ids, texts, metadatas, vectors))
+
+    # 💾 저장 단계 (벡터 DB 쓰기는 한 스레드에서만)
+    # 예외가 나도 writer가 멈추면 대기열이 가득 차서 임베딩/추출 단계가 모두 멈추므로, 실패는 파일별로 기록하고 계속 진행
+    def write_batch(job, ids, texts, metadatas, vectors):
+        if ids and vectors is not None and not job.failed:
+            try:
+                write_vectors(vectorstore, ids, texts, metadatas, vectors)
+                sparse_index.add_many([(cid, job.doc_id, text) for cid, text in zip(ids, texts)])
+                progress.add(chunks=len(ids))
+            except Exception as e:
+                job.failed = True
+                print(f"❌ 벡터 DB 저장 실패: {job.doc_id} ({e})")
+
+        if not job.finish_batch():
+            return
+        if not job.failed:
+            try:
+                stale_ids = job.plan.stale_ids()
+                if stale_ids:
+                    vectorstore.delete(ids=stale_ids)
+                    sparse_index.delete(stale_ids)
+                commit_document(job.doc_id, job.file_hash, job.plan.chunk_ids, path=manifest_path,
+                                deleted=len(stale_ids))
+            except Exception as e:
+                job.failed = True
+                print(f"❌ 이전 청크 삭제/매니페스트 기록 실패: {job.doc_id} ({e})")
+        if job.failed:
+            # 매니페스트를 갱신하지 않으므로 다음 실행에서 다시 시도된다
+            progress.add(files_failed=1)
+            progress.report(f"❌ {job.doc_id}")
+            return
+        progress.add(files_done=1)
+        progress.report(f"✅ {job.doc_id}")
+
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is _STOP:
+                return
+            try:
+                write_batch(*item)
+            except Exception as e:
+                print(f"❌ 저장 단계 오류: {item[0].doc_id} ({e})")
+
+    # ✂️ 분할 단계: 추출이 끝난 페이지 window부터 페이지 순서대로 청크로 나눠 batch_size개씩 임베딩 대기열에 투입
+    def enqueue_batch(job, chunks):
+        ids, texts, metadatas = (list(column) for column in zip(*chunks))
+        job.start_batch()
+        embed_queue.put((job, ids, texts, metadatas))
+
+    def split_ready(job):
+        while job.next_window in job.ready:
+            page_texts = job.ready.pop(job.next_window)
+            job.next_window += 1
+            if job.failed:
+                continue
+            job.has_text = job.has_text or any(text.strip() for _, text in page_texts)
+            job.batch.extend(job.plan.add(iter_chunks(page_texts)))
+            while len(job.batch) >= batch_size:
+                enqueue_batch(job, job.batch[:batch_size])
+                job.batch = job.batch[batch_size:]
+        if job.next_window < job.windows:
+            return
+        if not job.failed and not job.has_text:
+            job.failed = True
+            print(f"❌ 텍스트 없음: {job.doc_id}")
+        if job.batch and not job.failed:
+            enqueue_batch(job, job.batch)
+        job.batch = []
+        # 빈 배치로 writer에게 문서가 끝났음을 알림 (모든 배치가 저장된 뒤 매니페스트 기록)
+        job.seal()
+        write_queue.put((job, [], [], [], None))
+
+    embed_threads = [threading.Thread(target=embed_worker, daemon=True) for _ in range(embed_workers)]
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    for thread in embed_threads + [writer_thread]:
+        thread.start()
+
+    # 📄 추출 단계: 파일마다 해시/페이지 수를 확인한 뒤 PAGE_WINDOW 페이지씩 나눠 프로세스 풀에 제출
+    # (메모리 사용을 제한하기 위해 동시에 진행 중인 작업 수를 제한)
+    # (프로세스마다 OCR 풀을 CPU 수만큼 열면 Tesseract와 페이지 이미지가 프로세스 수 x CPU 수만큼 생기므로 나눔)
+    paths = iter(pdf_paths)
+    windows = deque()  # 제출을 기다리는 (문서, window 번호, 첫 페이지, 끝 페이지)
+    max_pending = extract_workers * 2
+    ocr_workers = max(1, (os.cpu_count() or 2) // extract_workers)
+    try:
+        with ProcessPoolExecutor(max_workers=extract_workers) as pool:
+            pending = {}  # future → (문서, window 번호) 또는 (None, 파일 경로)
+
+            def fill():
+                while len(pending) < max_pending:
+                    if windows:
+                        job, index, first, last = windows.popleft()
+                        pending[pool.submit(extract_pages, job.path, first, last, ocr_workers)] = (job, index)
+                        continue
+                    path = next(paths, None)
+                    if path is None:
+                        return
+                    pending[pool.submit(check_document, path, manifest_path)] = (None, path)
+
+            def start_document(result):
+                if result["skipped"]:
+                    progress.add(files_skipped=1)
+                    progress.report(f"⏭️ {result['doc_id']}")
+                    return
+                if not result["pages"]:
+                    progress.add(files_failed=1)
+                    progress.report(f"❌ 텍스트 없음: {result['doc_id']}")
+                    return
+                starts = range(1, result["pages"] + 1, PAGE_WINDOW)
+                job = _DocumentJob(result["path"], result["doc_id"], result["file_hash"],
+                                   ChunkPlan(result["doc_id"], path=manifest_path), len(starts))
+                for index, first in enumerate(starts):
+                    windows.append((job, index, first, min(first + PAGE_WINDOW - 1, result["pages"])))
+
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if job is None:
+                            progress.add(files_failed=1)
+                            print(f"❌ PDF 추출 실패: {key} ({e})")
+                            continue
+                        job.failed = True
+                        print(f"❌ PDF 추출 실패: {job.doc_id} ({e})")
+                        result = {"page_texts": []}
+
+                    if job is None:
+                        start_document(result)
+                        continue
+                    progress.add(pages=len(result["page_texts"]))
+                    job.ready[key] = result["page_texts"]
+                    split_ready(job)
+                fill()
+    finally:
+        for _ in embed_threads:
+            embed_queue.put(_STOP)
+        for thread in embed_threads:
+            thread.join()
+        write_queue.put(_STOP)
+        writer_thread.join()
+
+    summary = progress.summary()
+    print(
+        f"🏁 완료: {summary['done']}개 저장, {summary['skipped']}개 건너뜀, {summary['failed']}개 실패 | "
+        f"{summary['pages']} pages, {summary['chunks']} chunks, {summary['seconds']:.1f}s "
+        f"({summary['pages_per_sec']:.1f} pages/s, {summary['chunks_per_sec']:.1f} chunks/s)"
+    )
+    return summary
@@ -0,0 +1,179 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from tracing import profile
+
+# 📂 업로드 작업 대기열 저장 경로 (서버를 재시작해도 남아 있음)
+JOB_DB_PATH = "C:/rag-project/ingest_jobs.sqlite"
+
+JOB_WORKERS = 1  # 동시에 처리할 작업 수
+POLL_INTERVAL = 1.0  # 대기 중인 작업이 없을 때 다시 확인하는 간격(초)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_PROGRESS_FIELDS = {"pages_done", "pages_total", "chunks_done"}
+
+class JobQueue:
+    """업로드된 파일의 인덱싱 작업을 SQLite에 저장하고 백그라운드 스레드에서 처리하는 대기열
+
+    - 같은 경로/유형/해시의 작업이 대기/진행 중이면 새 작업을 만들지 않고 기존 작업 ID를 돌려줌
+      (같은 내용을 다른 이름으로 올리면 다른 문서이므로 따로 인덱싱)
+    - 서버가 중간에 종료되어 running으로 남은 작업은 다시 시작할 때 queued로 되돌림
+    - handlers[file_type](path, progress)로 처리하며, progress(**fields)로 진행 상황을 기록
+    """
+
+    def __init__(self, handlers, path=JOB_DB_PATH, workers=JOB_WORKERS, poll_interval=POLL_INTERVAL):
+        self.handlers = handlers
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                file_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                pages_total INTEGER,
+                chunks_done INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                updated REAL NOT NULL,
+                finished REAL,
+                error TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_hash ON jobs (file_hash, status)")
+        self._conn.commit()
+
+    def start(self):
+        """중단된 작업을 되살리고 작업 스레드를 시작하는 함수"""
+        with self._lock:
+            if self._threads:
+                return
+            resumed = self._conn.execute(
+                "UPDATE jobs SET status = ?, pages_done = 0, chunks_done = 0, updated = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING),
+            ).rowcount
+            self._conn.commit()
+            if resumed:
+                print(f"🔁 중단된 인덱싱 작업 {resumed}개를 다시 대기열에 넣었습니다.")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"ingest-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, path, file_type, file_hash):
+        """작업을 등록하고 (작업 ID, 새로 만들었는지)를 반환하는 함수"""
+        path = os.path.normpath(path)  # 업로드와 폴더 감시가 같은 파일을 다른 형태의 경로로 넘겨도 같은 작업으로 봄
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE file_hash = ? AND path = ? AND file_type = ? AND status IN (?, ?) "
+                "ORDER BY created LIMIT 1",
+                (file_hash, path, file_type, QUEUED, RUNNING),
+            ).fetchone()
+            if row is not None:
+                return row["id"], False
+            job_id = uuid.uuid4().hex[:12]
+            self._conn.execute(
+                "INSERT INTO jobs (id, file_hash, path, file_type, status, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, file_hash, path, file_type, QUEUED, now, now),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+        return job_id, True
+
+    def get(self, job_id):
+        """작업 상태 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _describe(row) if row is not None else None
+
+    def recent(self, limit=10):
+        """최근 작업 목록 (진행 중인 작업 먼저)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY status != ?, status != ?, created DESC LIMIT ?",
+                (RUNNING, QUEUED, limit),
+            ).fetchall()
+        return [_describe(row) for row in rows]
+
+    def _claim(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started = ?, updated = ? WHERE id = ?", (RUNNING, now, now, row["id"])
+            )
+            self._conn.commit()
+            return row
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def _worker(self):
+        while True:
+            row = self._claim()
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id = row["id"]
+
+            def progress(**fields):
+                self._update(job_id, **{k: v for k, v in fields.items() if k in _PROGRESS_FIELDS})
+
+            try:
+                with profile(f"ingest-{row['file_type']}"):
+                    self.handlers[row["file_type"]](row["path"], progress)
+            except Exception as e:
+                print(f"❌ 인덱싱 작업 실패: {job_id} ({e})")
+                self._update(job_id, status=FAILED, finished=time.time(), error=str(e))
+            else:
+                self._update(job_id, status=DONE, finished=time.time())
+
+def _describe(row):
+    """작업 행을 dict로 바꾸고 경과 시간/남은 시간(ETA)을 계산하는 함수"""
+    job = dict(row)
+    now = time.time()
+    job["elapsed"] = (job["finished"] or now) - job["started"] if job["started"] else 0.0
+    job["eta"] = None
+    if job["status"] == RUNNING and job["pages_total"] and job["pages_done"]:
+        remaining = job["pages_total"] - job["pages_done"]
+        job["eta"] = job["elapsed"] / job["pages_done"] * remaining
+    return job
+
+def format_job(job):
+    """작업 상태를 한 줄로 표시하는 함수"""
+    icon = {QUEUED: "⏳", RUNNING: "⚙️", DONE: "✅", FAILED: "❌"}[job["status"]]
+    line = f"{icon} [{job['id']}] {os.path.basename(job['path'])} - {job['status']}"
+    if job["pages_total"]:
+        line += f" | {job['pages_done']}/{job['pages_total']} pages"
+    if job["chunks_done"]:
+        line += f" | {job['chunks_done']} chunks"
+    if job["eta"] is not None:
+        line += f" | 남은 시간 약 {job['eta']:.0f}s"
+    if job["error"]:
+        line += f" | {job['error']}"
+    return line
@@ -0,0 +1,429 @@
+import argparse
+import json
+import os
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# 🧮 NumPy 벡터 저장소 설정 (Chroma 대신 사용하려면 resources.VECTOR_BACKEND = "numpy")
+NUMPY_STORE_PATH = "C:/rag-project/numpy_store"
+DEFAULT_DTYPE = "float32"  # float32 / float16(메모리 절반, 검색 때 변환 비용이 큼) / int8(메모리 1/4, 행별 scale로 복원)
+INITIAL_CAPACITY = 1024  # 처음 파일에 잡아 둘 행 수 (가득 차면 2배로 늘림)
+SEARCH_BLOCK_ROWS = 2048  # float16/int8을 float32로 바꿔 계산할 행 수 (변환한 블록이 CPU 캐시에 남는 크기)
+
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_DATA_FILES = ("vectors.bin", "alive.bin", "scales.bin", "columns.jsonl")
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def _matches(metadata, where):
+    """Chroma where 조건 중 같음 비교만 지원 ({"source": "a.pdf"} 또는 {"source": {"$eq": "a.pdf"}}, 여러 키는 AND)"""
+    for key, condition in where.items():
+        expected = condition.get("$eq") if isinstance(condition, dict) else condition
+        if metadata.get(key) != expected:
+            return False
+    return True
+
+class _CollectionView:
+    """index_compaction/indexer/resources가 쓰는 Chroma 컬렉션 메서드만 같은 형태로 제공하는 어댑터"""
+
+    def __init__(self, store):
+        self._store = store
+        self.name = os.path.basename(os.path.normpath(store._persist_directory))
+        self.metadata = {"hnsw:space": "cosine"}
+
+    def count(self):
+        return self._store.count()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        return self._store.get(ids=ids, where=where, limit=limit, offset=offset, include=include)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        self._store.upsert_vectors(ids, documents or [""] * len(ids), metadatas, embeddings)
+
+    def query(self, query_embeddings, n_results=10, include=None):
+        results = [self._store.search_vectors(vector, n_results) for vector in query_embeddings]
+        return {
+            "ids": [[self._store._ids[row] for row, _ in result] for result in results],
+            "distances": [[1.0 - score for _, score in result] for result in results],
+        }
+
+class NumpyVectorStore(VectorStore):
+    """메모리 매핑된 행렬에 정규화된 임베딩을 저장하고 전수 비교(행렬 곱 + argpartition)로 검색하는 벡터 저장소
+
+    - vectors.bin: 행 우선 행렬 (dtype에 따라 float32/float16/int8, int8이면 scales.bin에 행별 scale)
+    - alive.bin: 행별 삭제 표시 (0이면 삭제됨, compact()에서 실제로 제거)
+    - columns.jsonl: ID/본문/메타데이터 사이드카 (저장 배치마다 열 단위 한 줄씩 추가)
+    - meta.json: 차원, dtype, 저장된 행 수, 세대 번호 (마지막에 원자적으로 교체 — 여기 기록된 행까지만 유효)
+
+    compact()는 새 세대 파일(vectors.2.bin 등)을 모두 쓴 뒤 meta.json을 바꿔서 한 번에 전환하므로
+    도중에 종료되어도 이전 세대 파일이 그대로 남는다.
+
+    langchain VectorStore라서 as_retriever()를 그대로 쓸 수 있고, 이 프로젝트가 Chroma에서 쓰는
+    get/delete/similarity_search_by_vector/_collection(count, get, upsert, query)을 같은 형태로 제공한다.
+    정규화된 벡터의 내적(코사인 유사도)으로 순위를 매긴다.
+    """
+
+    def __init__(self, persist_directory=NUMPY_STORE_PATH, embedding_function=None, dtype=DEFAULT_DTYPE):
+        self._persist_directory = persist_directory
+        self._embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._vectors = None  # np.memmap (capacity x dim)
+        self._scales = None
+        self._alive = None
+
+        os.makedirs(persist_directory, exist_ok=True)
+        meta = self._read_meta()
+        self.dtype = meta.get("dtype", dtype)
+        if self.dtype not in _DTYPES:
+            raise ValueError(f"지원하지 않는 dtype입니다: {self.dtype}")
+        self.dim = meta.get("dim")
+        self._open(meta)
+        self._collection = _CollectionView(self)
+
+    # 📂 파일
+    def _path(self, name):
+        return os.path.join(self._persist_directory, name)
+
+    def _data_path(self, name, generation=None):
+        """세대별 데이터 파일 경로 (0세대는 vectors.bin, 이후는 vectors.2.bin처럼 세대 번호를 붙임)"""
+        generation = self._generation if generation is None else generation
+        if generation:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}.{generation}{ext}"
+        return self._path(name)
+
+    def _open(self, meta):
+        """meta.json 기준으로 사이드카를 읽고 행렬을 매핑하는 함수 (다른 세대의 남은 파일은 지움)"""
+        self._generation = meta.get("generation", 0)
+        self._capacity = meta.get("capacity", 0)
+        self._load_columns(meta.get("rows", 0))
+        current = {os.path.basename(self._data_path(name)) for name in _DATA_FILES}
+        for name in os.listdir(self._persist_directory):
+            stem = name.split(".", 1)[0]
+            if name not in current and f"{stem}.{name.rsplit('.', 1)[-1]}" in _DATA_FILES:
+                os.remove(self._path(name))  # 압축 도중 종료되어 남은 새 세대 또는 지우지 못한 이전 세대
+        if self.dim is not None:
+            self._map()
+
+    def _read_meta(self):
+        if not os.path.exists(self._path("meta.json")):
+            return {}
+        with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype, "rows": len(self._ids), "capacity": self._capacity,
+                       "generation": self._generation}, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _load_columns(self, rows):
+        """사이드카를 열 단위 목록으로 읽는 함수 (meta.json에 기록되지 않은 마지막 배치는 파일에서도 잘라냄)"""
+        self._ids, self._documents, self._metadatas = [], [], []
+        path = self._data_path("columns.jsonl")
+        if os.path.exists(path):
+            valid_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if len(self._ids) >= rows:
+                        break
+                    valid_bytes += len(line)
+                    if not line.strip():
+                        continue
+                    batch = json.loads(line)
+                    self._ids.extend(batch["ids"])
+                    self._documents.extend(batch["documents"])
+                    keys = batch["metadatas"].keys()
+                    self._metadatas.extend(
+                        {key: batch["metadatas"][key][i] for key in keys if batch["metadatas"][key][i] is not None}
+                        for i in range(len(batch["ids"]))
+                    )
+            if os.path.getsize(path) > valid_bytes:
+                # 저장 도중 종료된 배치가 남아 있으면 다음 배치와 행 번호가 어긋나므로 잘라냄
+                with open(path, "r+b") as f:
+                    f.truncate(valid_bytes)
+        del self._ids[rows:], self._documents[rows:], self._metadatas[rows:]
+        self._rows = {cid: row for row, cid in enumerate(self._ids)}  # 살아 있는 행만 (같은 ID면 마지막 행)
+
+    def _map(self):
+        """현재 용량으로 파일 크기를 맞추고 다시 메모리 매핑하는 함수"""
+        self._vectors = self._scales = self._alive = None  # 기존 매핑을 먼저 닫아야 Windows에서 파일 크기 변경 가능
+        itemsize = np.dtype(_DTYPES[self.dtype]).itemsize
+        for name, size in [("vectors.bin", self._capacity * self.dim * itemsize), ("alive.bin", self._capacity),
+                           ("scales.bin", self._capacity * 4 if self.dtype == "int8" else 0)]:
+            if size:
+                with open(self._data_path(name), "ab") as f:
+                    f.truncate(size)
+        if not self._capacity:
+            return
+        self._vectors = np.memmap(self._data_path("vectors.bin"), dtype=_DTYPES[self.dtype], mode="r+",
+                                  shape=(self._capacity, self.dim))
+        self._alive = np.memmap(self._data_path("alive.bin"), dtype=np.uint8, mode="r+", shape=(self._capacity,))
+        if self.dtype == "int8":
+            self._scales = np.memmap(self._data_path("scales.bin"), dtype=np.float32, mode="r+",
+                                     shape=(self._capacity,))
+        stale = []
+        for row, cid in enumerate(self._ids):
+            if self._rows.get(cid) != row:
+                if self._alive[row]:
+                    stale.append(row)  # 새 행을 저장한 뒤 이전 행을 삭제 표시하기 전에 종료된 경우
+            elif not self._alive[row]:
+                del self._rows[cid]
+        self._delete_rows(stale)
+
+    def _reserve(self, rows):
+        if rows <= self._capacity:
+            return
+        capacity = max(self._capacity, INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        self._capacity = capacity
+        self._map()
+
+    # 💾 저장 & 삭제
+    def upsert_vectors(self, ids, texts, metadatas, vectors):
+        """미리 계산한 임베딩을 저장하는 함수 (이미 있는 ID는 이전 행을 삭제 표시하고 새 행을 추가)"""
+        if not ids:
+            return
+        vectors = _normalize(vectors)
+        metadatas = [dict(metadata or {}) for metadata in (metadatas or [None] * len(ids))]
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} (저장소 {self.dim})")
+            start = len(self._ids)
+            self._reserve(start + len(ids))
+            rows = slice(start, start + len(ids))
+            if self.dtype == "int8":
+                scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+                self._vectors[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+                self._scales[rows] = scales
+            else:
+                self._vectors[rows] = vectors
+            self._alive[rows] = 1
+            self._vectors.flush()
+            self._alive.flush()
+
+            # 행렬 → 사이드카 → meta.json(행 수) 순서로 써서, meta.json에 기록된 행까지는 항상 완전함
+            keys = sorted({key for metadata in metadatas for key in metadata})
+            batch = {
+                "ids": list(ids),
+                "documents": list(texts),
+                "metadatas": {key: [metadata.get(key) for metadata in metadatas] for key in keys},
+            }
+            with open(self._data_path("columns.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(batch, ensure_ascii=False) + "\n")
+            self._ids.extend(ids)
+            self._documents.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._write_meta()
+
+            # 이전 행은 새 행이 확정된 뒤에 삭제 표시 (그 전에 종료되면 다음에 열 때 _map에서 정리)
+            self._delete_rows([self._rows[cid] for cid in ids if cid in self._rows])
+            for offset, cid in enumerate(ids):
+                self._rows[cid] = start + offset
+
+    def _delete_rows(self, rows):
+        if rows:
+            self._alive[np.asarray(rows)] = 0
+            self._alive.flush()
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if ids is None:
+            import uuid
+            ids = [uuid.uuid4().hex for _ in texts]
+        self.upsert_vectors(list(ids), texts, metadatas, self._embedding_function.embed_documents(texts))
+        return list(ids)
+
+    def delete(self, ids=None, **kwargs):
+        with self._lock:
+            rows = [self._rows.pop(cid) for cid in ids or [] if cid in self._rows]
+            self._delete_rows(rows)
+        return True
+
+    def count(self):
+        return len(self._rows)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        """Chroma get과 같은 형태의 dict (ids, documents, metadatas, embeddings 중 include에 있는 것)"""
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[cid] for cid in ids if cid in self._rows]
+            else:
+                rows = sorted(self._rows.values())
+            if where:
+                rows = [row for row in rows if _matches(self._metadatas[row], where)]
+            rows = rows[offset or 0:None if limit is None else (offset or 0) + limit]
+            result = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._documents[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [dict(self._metadatas[row]) for row in rows]
+            if "embeddings" in include:
+                result["embeddings"] = self._dequantize(np.asarray(rows, dtype=np.int64))
+            return result
+
+    # 🔎 검색
+    def _dequantize(self, rows):
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32) if len(rows) else np.zeros((0, self.dim or 0))
+        if self.dtype == "int8" and len(rows):
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _scores(self, queries):
+        """정규화된 질의 행렬과 모든 행의 내적 (삭제된 행과 빈 자리는 -inf)"""
+        rows = len(self._ids)
+        if self.dtype == "float32":
+            scores = queries @ self._vectors[:rows].T
+        else:
+            scores = np.empty((len(queries), rows), dtype=np.float32)
+            for start in range(0, rows, SEARCH_BLOCK_ROWS):
+                end = min(start + SEARCH_BLOCK_ROWS, rows)
+                scores[:, start:end] = queries @ self._vectors[start:end].astype(np.float32).T
+                if self.dtype == "int8":
+                    scores[:, start:end] *= self._scales[start:end]
+        scores[:, self._alive[:rows] == 0] = -np.inf
+        return scores
+
+    def search_batch(self, queries, k):
+        """여러 질의를 한 번의 행렬 곱으로 검색해 질의마다 [(행 번호, 코사인 유사도), ...]를 반환하는 함수"""
+        with self._lock:
+            if self.dim is None or not self._rows:
+                return [[] for _ in queries]
+            scores = self._scores(_normalize(queries))
+            k = min(k, len(self._rows))
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for query_scores, candidates in zip(scores, top):
+                ordered = candidates[np.argsort(-query_scores[candidates])]
+                results.append([(int(row), float(query_scores[row])) for row in ordered])
+            return results
+
+    def search_vectors(self, vector, k):
+        return self.search_batch(np.asarray([vector], dtype=np.float32), k)[0]
+
+    def _to_document(self, row):
+        return Document(page_content=self._documents[row], metadata=dict(self._metadatas[row]), id=self._ids[row])
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        results = self.search_vectors(embedding, k)
+        with self._lock:
+            return [(self._to_document(row), score) for row, score in results]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector(self._embedding_function.embed_query(query), k)
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_score(self._embedding_function.embed_query(query), k)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0  # 코사인 유사도(-1~1) → 0~1
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, persist_directory=NUMPY_STORE_PATH, **kwargs):
+        store = cls(persist_directory=persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # 🧹 압축: 삭제 표시된 행을 빼고 새 세대 파일에 다시 씀
+    def compact(self):
+        """살아 있는 행만 새 세대 파일에 쓰고 meta.json을 바꿔 전환하는 함수 (남은 행 수 반환)"""
+        with self._lock:
+            rows = np.asarray(sorted(self._rows.values()), dtype=np.int64)
+            vectors = np.asarray(self._vectors[rows]) if len(rows) else None
+            scales = np.asarray(self._scales[rows]) if self.dtype == "int8" and len(rows) else None
+            ids = [self._ids[row] for row in rows]
+            documents = [self._documents[row] for row in rows]
+            metadatas = [self._metadatas[row] for row in rows]
+
+            old_generation = self._generation
+            self._vectors = self._scales = self._alive = None
+            self._generation = old_generation + 1
+            self._ids, self._documents, self._metadatas, self._rows = [], [], [], {}
+            self._capacity = 0
+            try:
+                if len(rows):
+                    self._reserve(len(rows))
+                    self._vectors[:len(rows)] = vectors
+                    if scales is not None:
+                        self._scales[:len(rows)] = scales
+                    self._alive[:len(rows)] = 1
+                    self._vectors.flush()
+                    self._alive.flush()
+                    if self._scales is not None:
+                        self._scales.flush()
+                    keys = sorted({key for metadata in metadatas for key in metadata})
+                    with open(self._data_path("columns.jsonl"), "w", encoding="utf-8") as f:
+                        f.write(json.dumps({
+                            "ids": ids,
+                            "documents": documents,
+                            "metadatas": {key: [metadata.get(key) for metadata in metadatas] for key in keys},
+                        }, ensure_ascii=False) + "\n")
+                self._ids, self._documents, self._metadatas = ids, documents, metadatas
+                self._rows = {cid: row for row, cid in enumerate(ids)}
+                self._write_meta()  # 여기서 새 세대로 전환
+            except BaseException:
+                # 새 세대 파일을 버리고 이전 세대를 다시 엶
+                self._vectors = self._scales = self._alive = None
+                self._remove_generation(self._generation)
+                self._open(self._read_meta())
+                raise
+            self._remove_generation(old_generation)
+            return len(rows)
+
+    def _remove_generation(self, generation):
+        for name in _DATA_FILES:
+            path = self._data_path(name, generation)
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # 다른 프로세스가 아직 매핑하고 있으면 다음에 열 때 지움
+
+    def memory_bytes(self):
+        """검색에 쓰이는 행렬 크기 (vectors + scales)"""
+        itemsize = np.dtype(_DTYPES[self.dtype]).itemsize
+        return len(self._ids) * (self.dim or 0) * itemsize + (len(self._ids) * 4 if self.dtype == "int8" else 0)
+
+def import_collection(collection, store, batch_size=500):
+    """Chroma 컬렉션의 임베딩/본문/메타데이터를 재임베딩 없이 NumPy 저장소로 옮기는 함수"""
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not len(page["ids"]):
+            return offset
+        store.upsert_vectors(page["ids"], page["documents"], page["metadatas"], page["embeddings"])
+        offset += len(page["ids"])
+
+# 🛠️ CLI: python numpy_store.py import [--dtype float16] | stats | compact
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy 벡터 저장소 관리")
+    parser.add_argument("command", choices=["import", "stats", "compact"],
+                        help="import: Chroma 벡터 DB를 복사, stats: 크기 출력, compact: 삭제된 행 제거")
+    parser.add_argument("--path", default=NUMPY_STORE_PATH)
+    parser.add_argument("--dtype", default=DEFAULT_DTYPE, choices=sorted(_DTYPES))
+    args = parser.parse_args()
+
+    store = NumpyVectorStore(args.path, dtype=args.dtype)
+    if args.command == "import":
+        import chromadb
+        from resources import CHROMA_DB_PATH, active_collection_name
+        collection = chromadb.PersistentClient(path=CHROMA_DB_PATH).get_collection(active_collection_name())
+        print(f"📦 {import_collection(collection, store)}개 청크를 옮겼습니다: {args.path} ({store.dtype})")
+    elif args.command == "compact":
+        print(f"🧹 압축 완료: 청크 {store.compact()}개")
+    print(f"🧾 청크 {store.count()}개, {store.dim}차원, {store.dtype}, 행렬 {store.memory_bytes() / 1024 / 1024:.1f} MB")
@@ -0,0 +1,144 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# 📂 OCR 캐시 저장 경로
+OCR_CACHE_PATH = "C:/rag-project/ocr_cache.sqlite"
+
+# 캐시 최대 크기 (초과하면 가장 오래 사용하지 않은 항목부터 삭제)
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+def image_hash(image):
+    """페이지 이미지(PIL)의 내용 해시 (크기/모드 포함)"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class OCRCache:
+    """(페이지 이미지 해시, Tesseract 언어, DPI) → OCR 결과 텍스트를 저장하는 디스크 캐시"""
+
+    def __init__(self, path=OCR_CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS ocr (
+                image_hash TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                dpi INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (image_hash, lang, dpi)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_last_access ON ocr (last_access)")
+        self._conn.commit()
+
+    def get(self, digest, lang, dpi):
+        """캐시된 OCR 텍스트 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM ocr WHERE image_hash = ? AND lang = ? AND dpi = ?", (digest, lang, dpi)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE ocr SET last_access = ? WHERE image_hash = ? AND lang = ? AND dpi = ?",
+                (time.time(), digest, lang, dpi),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, digest, lang, dpi, text):
+        """OCR 결과를 저장하고, 최대 크기를 넘으면 오래된 항목을 정리하는 함수"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr (image_hash, lang, dpi, text, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, lang, dpi, text, len(text.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        # 한 번 정리할 때 최대 크기의 90%까지 줄여서 매번 정리가 일어나지 않도록 함
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        rows = self._conn.execute("SELECT image_hash, lang, dpi, size FROM ocr ORDER BY last_access").fetchall()
+        for digest, lang, dpi, size in rows:
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM ocr WHERE image_hash = ? AND lang = ? AND dpi = ?", (digest, lang, dpi))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        return removed
+
+    def stats(self):
+        """캐시 항목 수, 전체 크기, 언어/DPI별 항목 수"""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr").fetchone()
+            groups = self._conn.execute("SELECT lang, dpi, COUNT(*) FROM ocr GROUP BY lang, dpi").fetchall()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "by_lang_dpi": {f"{lang}@{dpi}dpi": count for lang, dpi, count in groups},
+        }
+
+    def purge(self, older_than_days=None):
+        """캐시 항목을 삭제하는 함수 (기간을 지정하면 그보다 오래 사용하지 않은 항목만)"""
+        with self._lock:
+            if older_than_days is None:
+                removed = self._conn.execute("DELETE FROM ocr").rowcount
+            else:
+                cutoff = time.time() - older_than_days * 86400
+                removed = self._conn.execute("DELETE FROM ocr WHERE last_access < ?", (cutoff,)).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+# 프로세스별 공유 캐시 (처음 사용할 때 연결)
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_cache():
+    """기본 OCR 캐시 객체를 반환하는 함수"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = OCRCache()
+        return _default_cache
+
+# 🛠️ CLI: python ocr_cache.py stats | purge [--older-than-days N]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR 결과 캐시 확인/정리")
+    parser.add_argument("--path", default=OCR_CACHE_PATH, help="캐시 파일 경로")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="캐시 항목 수와 크기 출력")
+    purge_parser = commands.add_parser("purge", help="캐시 삭제")
+    purge_parser.add_argument("--older-than-days", type=float, default=None, help="이 기간 동안 사용하지 않은 항목만 삭제")
+    args = parser.parse_args()
+
+    cache = OCRCache(path=args.path)
+    if args.command == "stats":
+        info = cache.stats()
+        print(f"📂 {info['path']}")
+        print(f"🧾 항목 {info['entries']}개, {info['bytes'] / 1024 / 1024:.1f} MB / 최대 {info['max_bytes'] / 1024 / 1024:.0f} MB")
+        for group, count in sorted(info["by_lang_dpi"].items()):
+            print(f"   - {group}: {count}개")
+    else:
+        removed = cache.purge(older_than_days=args.older_than_days)
+        print(f"🗑️ OCR 캐시 항목 {removed}개를 삭제했습니다.")
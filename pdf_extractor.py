@@ -0,0 +1,153 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from indexer import MANIFEST_PATH, document_id, file_sha256, is_unchanged
+from ocr_cache import get_cache, image_hash
+from tracing import count, span
+
+# PyMuPDF(fitz), pytesseract, pdf2image는 실제로 PDF를 읽을 때 import (import만 할 때 시작 시간 단축)
+
+# 🖨️ OCR 설정
+OCR_LANG = "kor+eng"  # 한글 + 영어 OCR
+OCR_DPI = 200  # 페이지 이미지 해상도 (pdf2image 기본값)
+OCR_WORKERS = os.cpu_count() or 2  # 동시에 실행할 Tesseract 수 (ingest_pipeline 프로세스 풀 안에서는 프로세스 수로 나눔)
+MIN_PAGE_TEXT_CHARS = 30  # 텍스트 레이어의 글자 수(공백 제외)가 이보다 적은 페이지는 스캔 페이지로 보고 OCR
+PAGE_WINDOW = 16  # 한 번에 읽고 OCR할 페이지 수
+
+def ocr_page(pdf_path, page_number, dpi=OCR_DPI):
+    """페이지 하나만 이미지로 변환하여 OCR하는 함수 (page_number는 1부터 시작)
+
+    같은 페이지 이미지를 같은 언어/DPI로 OCR한 적이 있으면 Tesseract 없이 캐시에서 가져온다.
+    """
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    cache = get_cache()
+    texts = []
+    with span("ocr.page"):
+        for img in convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number):
+            digest = image_hash(img)
+            text = cache.get(digest, OCR_LANG, dpi)
+            count("ocr_pages", cache="hit" if text is not None else "miss")
+            if text is None:
+                text = pytesseract.image_to_string(img, lang=OCR_LANG)
+                cache.put(digest, OCR_LANG, dpi, text)
+            texts.append(text)
+    return "".join(texts)
+
+def ocr_pages(pdf_path, page_numbers, dpi=OCR_DPI, workers=OCR_WORKERS, page_seconds=None):
+    """여러 페이지를 워커 풀에서 OCR하고, 결과를 페이지 순서대로 반환하는 함수
+
+    각 워커는 자기 페이지만 그때그때 이미지로 변환하므로
+    메모리에는 동시에 최대 workers개의 페이지 이미지만 올라간다.
+    page_seconds(dict)를 넘기면 페이지 번호별 OCR 소요 시간을 기록한다.
+    """
+    def run(number):
+        start = time.perf_counter()
+        text = ocr_page(pdf_path, number, dpi)
+        if page_seconds is not None:
+            page_seconds[number] = time.perf_counter() - start
+        return text
+
+    page_numbers = list(page_numbers)
+    if workers <= 1 or len(page_numbers) <= 1:
+        return [run(number) for number in page_numbers]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, page_numbers))
+
+# 📂 PDF에서 OCR을 사용하여 텍스트 추출
+def extract_text_with_ocr(pdf_path, dpi=OCR_DPI, workers=OCR_WORKERS):
+    """OCR을 사용하여 PDF에서 텍스트를 추출하는 함수 (페이지 단위 병렬 처리)"""
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    return "".join(ocr_pages(pdf_path, range(1, page_count + 1), dpi=dpi, workers=workers))
+
+# 📂 기본 텍스트 추출 (텍스트가 부족한 페이지만 OCR)
+def needs_ocr(page_text):
+    """텍스트 레이어가 거의 없는 (스캔된) 페이지인지 판단하는 함수"""
+    return sum(1 for ch in page_text if not ch.isspace()) < MIN_PAGE_TEXT_CHARS
+
+def page_count(pdf_path):
+    """PDF의 전체 페이지 수"""
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+def _read_window(doc, pdf_path, numbers, ocr_workers, page_seconds):
+    """열린 PDF에서 numbers 페이지의 텍스트 레이어를 읽고, 글자가 부족한 페이지만 병렬 OCR하는 함수
+
+    반환값: ({페이지 번호: 텍스트} (페이지 순서), OCR한 페이지 번호 목록)
+    """
+    page_texts = {}
+    with span("extract.text"):
+        for number in numbers:
+            page_start = time.perf_counter()
+            page_texts[number] = doc[number - 1].get_text("text")
+            page_seconds[number] = time.perf_counter() - page_start
+
+    ocr_numbers = [number for number, text in page_texts.items() if needs_ocr(text)]
+    if ocr_numbers:
+        ocr_seconds = {}
+        for number, text in zip(ocr_numbers, ocr_pages(pdf_path, ocr_numbers, workers=ocr_workers,
+                                                         page_seconds=ocr_seconds)):
+            page_texts[number] = text
+        for number, seconds in ocr_seconds.items():
+            page_seconds[number] += seconds
+    return page_texts, ocr_numbers
+
+def iter_pdf_pages(pdf_path, stats=None, window=PAGE_WINDOW, ocr_workers=OCR_WORKERS):
+    """PDF를 페이지 순서대로 (페이지 번호, 텍스트)로 yield하는 generator
+
+    window 페이지씩 텍스트 레이어를 읽고, 그중 글자가 부족한 페이지만 이미지로 변환해 병렬 OCR한다.
+    메모리에는 window개 페이지의 텍스트만 유지된다.
+    stats(dict)를 넘기면 텍스트/OCR 페이지 수와 페이지별 소요 시간을 기록한다.
+    여러 프로세스가 동시에 추출할 때는 ocr_workers를 줄여 전체 Tesseract 수와 페이지 이미지 수를 제한한다.
+    """
+    import fitz  # PyMuPDF
+
+    stats = {} if stats is None else stats
+    start = time.perf_counter()
+    page_seconds = {}
+    ocr_count = 0
+
+    with fitz.open(pdf_path) as doc:
+        for window_start in range(0, doc.page_count, window):
+            numbers = range(window_start + 1, min(window_start + window, doc.page_count) + 1)
+            page_texts, ocr_numbers = _read_window(doc, pdf_path, numbers, ocr_workers, page_seconds)
+            ocr_count += len(ocr_numbers)
+            yield from page_texts.items()
+
+    stats["pages"] = len(page_seconds)
+    stats["ocr_pages"] = ocr_count
+    stats["text_pages"] = len(page_seconds) - ocr_count
+    stats["page_seconds"] = page_seconds
+    stats["seconds"] = time.perf_counter() - start
+    print(
+        f"📄 {os.path.basename(pdf_path)}: 텍스트 {stats['text_pages']}쪽 / OCR {stats['ocr_pages']}쪽 "
+        f"({stats['seconds']:.1f}s, 가장 느린 페이지 {max(page_seconds.values(), default=0.0):.2f}s)"
+    )
+
+def extract_text_from_pdf(pdf_path, stats=None):
+    """PDF 파일에서 텍스트를 추출하는 기본 함수 (텍스트가 부족한 페이지만 OCR)"""
+    return "".join(text for _, text in iter_pdf_pages(pdf_path, stats=stats))
+
+# ⚙️ 프로세스 풀 작업 단위 (임베딩/벡터 DB를 쓰지 않는 가벼운 모듈에 두어 워커 시작 비용 최소화)
+# 문서 전체가 아니라 window 페이지씩 결과를 돌려주므로 큰 문서도 분할/임베딩 단계가 첫 window부터 시작된다
+def check_document(pdf_path, manifest_path=MANIFEST_PATH):
+    """파일 하나의 해시 확인(manifest_path 기준) + 페이지 수를 dict로 반환하는 함수"""
+    doc_id = document_id(pdf_path)
+    file_hash = file_sha256(pdf_path)
+    skipped = is_unchanged(doc_id, file_hash, path=manifest_path)
+    return {"path": pdf_path, "doc_id": doc_id, "file_hash": file_hash, "skipped": skipped,
+            "pages": 0 if skipped else page_count(pdf_path)}
+
+def extract_pages(pdf_path, first_page, last_page, ocr_workers=OCR_WORKERS):
+    """first_page~last_page(1부터, 끝 포함)의 (페이지 번호, 텍스트) 목록과 OCR 페이지 수를 dict로 반환하는 함수"""
+    import fitz  # PyMuPDF
+
+    start = time.perf_counter()
+    with fitz.open(pdf_path) as doc:
+        page_texts, ocr_numbers = _read_window(doc, pdf_path, range(first_page, last_page + 1), ocr_workers, {})
+    return {"page_texts": list(page_texts.items()), "ocr_pages": len(ocr_numbers),
+            "seconds": time.perf_counter() - start}
@@ -1,45 +1,64 @@
-import fitz  # PyMuPDF
-import pytesseract
-from pdf2image import convert_from_path
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-# 📂 PDF에서 OCR을 사용하여 텍스트 추출
-def extract_text_with_ocr(pdf_path):
-    """OCR을 사용하여 PDF에서 텍스트를 추출하는 함수"""
-    text = ""
-    images = convert_from_path(pdf_path)
-    for img in images:
-        text += pytesseract.image_to_string(img, lang="kor+eng")  # 한글 + 영어 OCR
-    return text
-
-# 📂 기존 텍스트 추출 방법 (OCR 없이)
-def extract_text_from_pdf(pdf_path):
-    """PDF 파일에서 텍스트를 추출하는 기본 함수"""
-    text = ""
-    with fitz.open(pdf_path) as doc:
-        for page in doc:
-            text += page.get_text("text")
-    return text if text.strip() else extract_text_with_ocr(pdf_path)  # OCR 적용
-
-# 📂 ChromaDB 저장 경로
-CHROMA_DB_PATH = "C:/rag-project/chroma_db"
-
-# 🧠 Ollama 임베딩 모델
-embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-
-def process_pdf(pdf_path):
-    """PDF를 분석하고 벡터 DB에 저장하는 함수"""
-    extracted_text = extract_text_from_pdf(pdf_path)
-    
-    if not extracted_text.strip():
+from resources import CHROMA_DB_PATH, get_embeddings, get_sparse_index, get_vectorstore
+from indexer import document_id, file_sha256, index_chunks, is_unchanged
+from pdf_extractor import extract_text_from_pdf, extract_text_with_ocr, iter_pdf_pages, page_count  # 기존 import 경로 유지
+from tracing import span
+
+# ✂️ 청크 분할 설정
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# 🧠 임베딩/벡터 DB/키워드 색인은 resources의 공유 객체를 처음 사용할 때 생성
+_SHARED = {"embeddings": get_embeddings, "vectorstore": get_vectorstore, "sparse_index": get_sparse_index}
+
+def __getattr__(name):
+    # 기존 import 경로 유지 (from pdf_processor import vectorstore 등)
+    if name in _SHARED:
+        return _SHARED[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def iter_chunks(pages):
+    """(페이지 번호, 텍스트) 스트림을 (청크, {"page": 페이지 번호}) 스트림으로 바꾸는 generator"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    for page_number, text in pages:
+        with span("split"):
+            chunks = text_splitter.split_text(text)
+        for chunk in chunks:
+            yield chunk, {"page": page_number}
+
+def _report_pages(pages, progress, total):
+    """페이지 스트림을 그대로 넘기면서 추출된 페이지 수를 progress로 알리는 generator"""
+    progress(pages_total=total, pages_done=0)
+    for done, page in enumerate(pages, start=1):
+        yield page
+        progress(pages_done=done)
+
+def process_pdf(pdf_path, progress=None):
+    """PDF를 페이지 단위로 읽어 바뀐 청크만 배치로 벡터 DB에 저장하는 함수
+
+    progress(**fields)를 넘기면 pages_total, pages_done, chunks_done 진행 상황을 알려준다.
+    """
+    doc_id = document_id(pdf_path)
+    file_hash = file_sha256(pdf_path)
+    if is_unchanged(doc_id, file_hash):
+        print(f"⏭️ 변경되지 않은 문서입니다: {doc_id}")
+        return
+
+    # 페이지 추출 → 청크 분할 → 배치 임베딩/저장이 generator로 이어져 문서 전체를 메모리에 올리지 않음
+    # (청크 내용 해시 기반 ID로 중복 저장 방지)
+    pages = iter_pdf_pages(pdf_path)
+    on_batch = None
+    if progress is not None:
+        pages = _report_pages(pages, progress, page_count(pdf_path))
+        on_batch = lambda written: progress(chunks_done=written)
+    result = index_chunks(get_vectorstore(), doc_id, file_hash, iter_chunks(pages), sparse_index=get_sparse_index(),
+                          on_batch=on_batch)
+
+    if not result["chunks"]:
         print("❌ PDF에서 텍스트를 추출할 수 없습니다.")
         return
-    
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    texts = text_splitter.split_text(extracted_text)
 
-    # 벡터 DB에 저장
-    vectorstore = Chroma.from_texts(texts, embeddings, persist_directory=CHROMA_DB_PATH)
-    print("✅ PDF 문서가 벡터 DB에 저장되었습니다!")
\ No newline at end of file
+    print(f"✅ PDF 문서가 벡터 DB에 저장되었습니다! (추가 {result['added']}, 삭제 {result['deleted']}, 유지 {result['unchanged']})")
+    cache = get_embeddings().stats()
+    print(f"🧠 임베딩 캐시: 적중 {cache['hits']} / 미스 {cache['misses']} (적중률 {cache['hit_rate']:.0%})")
@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from numpy_store import NUMPY_STORE_PATH, NumpyVectorStore, _normalize, import_collection
+
+# 🗜️ 임베딩 양자화 설정 (검색은 메모리의 압축 코드로 후보를 고르고, 디스크의 float32 원본으로 다시 계산)
+DEFAULT_QUANTIZATION = "int8"  # int8: 차원마다 1바이트(1024차원 → 청크당 1KB), pq: 청크당 PQ_SUBSPACES바이트
+PQ_SUBSPACES = 64  # 1024차원을 16차원씩 64조각으로 나눠 조각마다 코드북 번호 1바이트 (청크당 64바이트)
+PQ_CENTROIDS = 256  # 조각별 코드북 크기 (1바이트로 표현)
+PQ_ITERATIONS = 15  # k-means 반복 횟수
+TRAIN_SAMPLES = 10000  # 코드북/범위 학습에 사용할 최대 벡터 수 (중심 하나당 약 40개)
+RESCORE_FACTOR = 4  # k의 몇 배를 후보로 뽑아 float32로 다시 계산할지
+RESCORE_MIN = 64  # 후보 수 최솟값 (k가 작아도 재계산 후보는 이만큼)
+ENCODE_BLOCK_ROWS = 4096
+REPORT_SAMPLES = 200  # 재현율 손실 측정에 사용할 질의 수 (본문/메타데이터 메모리도 이만큼 표본으로 추정)
+
+class ScalarQuantizer:
+    """차원마다 학습한 최솟값~최댓값 범위를 256단계로 나눠 1바이트로 저장 (SQ8)
+
+    q·x ≈ q·min + (q * step)·code 이므로 코드 행렬과의 행렬 곱 한 번으로 근사 점수를 계산한다.
+    """
+
+    kind = "int8"
+
+    def __init__(self, low=None, step=None):
+        self.low = low
+        self.step = step
+
+    @property
+    def trained(self):
+        return self.low is not None
+
+    @property
+    def code_size(self):
+        return len(self.low)
+
+    @property
+    def nbytes(self):
+        return self.low.nbytes + self.step.nbytes
+
+    def train(self, sample):
+        low, high = np.percentile(sample, 0.1, axis=0), np.percentile(sample, 99.9, axis=0)
+        self.low = low.astype(np.float32)
+        self.step = np.maximum(high - low, 1e-9).astype(np.float32) / 255.0
+
+    def encode(self, vectors):
+        return np.clip(np.round((vectors - self.low) / self.step), 0, 255).astype(np.uint8)
+
+    def scores(self, queries, codes):
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        offset = queries @ self.low
+        scaled = queries * self.step
+        for start in range(0, len(codes), ENCODE_BLOCK_ROWS):
+            block = codes[start:start + ENCODE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = scaled @ block.T + offset[:, None]
+        return scores
+
+    def save(self, directory):
+        np.savez(os.path.join(directory, "codebook.npz"), low=self.low, step=self.step)
+
+    @classmethod
+    def load(cls, directory):
+        data = np.load(os.path.join(directory, "codebook.npz"))
+        return cls(data["low"], data["step"])
+
+class ProductQuantizer:
+    """벡터를 subspaces개 조각으로 나누고 조각마다 가장 가까운 코드북 중심 번호(1바이트)만 저장 (PQ)
+
+    질의마다 조각별 (질의 조각 · 중심) 표를 만들어 두고, 청크 점수는 표에서 코드 번호로 찾은 값의 합으로 계산한다.
+    """
+
+    kind = "pq"
+
+    def __init__(self, subspaces=PQ_SUBSPACES, centroids=None):
+        self.subspaces = subspaces
+        self.centroids = centroids  # (subspaces, PQ_CENTROIDS, 조각 차원)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    @property
+    def code_size(self):
+        return self.subspaces
+
+    @property
+    def nbytes(self):
+        return self.centroids.nbytes
+
+    def _split(self, vectors):
+        return vectors.reshape(len(vectors), self.subspaces, -1)
+
+    def train(self, sample, iterations=PQ_ITERATIONS, seed=0):
+        if sample.shape[1] % self.subspaces:
+            raise ValueError(f"{sample.shape[1]}차원은 {self.subspaces}조각으로 나눌 수 없습니다.")
+        rng = np.random.default_rng(seed)
+        parts = self._split(sample)
+        count = min(PQ_CENTROIDS, len(sample))
+        centroids = np.zeros((self.subspaces, PQ_CENTROIDS, parts.shape[2]), dtype=np.float32)
+        for m in range(self.subspaces):
+            points = parts[:, m, :]
+            centers = points[rng.choice(len(points), count, replace=False)].copy()
+            for _ in range(iterations):
+                assign = self._nearest(points, centers)
+                sums = np.stack([np.bincount(assign, weights=points[:, d], minlength=count)
+                                 for d in range(points.shape[1])], axis=1)
+                sizes = np.bincount(assign, minlength=count)
+                empty = sizes == 0
+                centers[~empty] = sums[~empty] / sizes[~empty, None]
+                # 빈 중심은 임의의 점으로 다시 시작
+                centers[empty] = points[rng.choice(len(points), int(empty.sum()))]
+            centroids[m, :count] = centers
+        self.centroids = centroids
+
+    @staticmethod
+    def _nearest(points, centers):
+        distances = (centers * centers).sum(axis=1)[None, :] - 2 * points @ centers.T
+        return distances.argmin(axis=1)
+
+    def encode(self, vectors):
+        parts = self._split(vectors)
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for m in range(self.subspaces):
+            codes[:, m] = self._nearest(parts[:, m, :], self.centroids[m])
+        return codes
+
+    def scores(self, queries, codes):
+        tables = np.einsum("qmd,mcd->qmc", self._split(queries), self.centroids)  # (질의, 조각, 중심)
+        subspace = np.arange(self.subspaces)
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for q, table in enumerate(tables):
+            for start in range(0, len(codes), ENCODE_BLOCK_ROWS):
+                block = codes[start:start + ENCODE_BLOCK_ROWS]
+                scores[q, start:start + len(block)] = table[subspace, block].sum(axis=1)
+        return scores
+
+    def save(self, directory):
+        np.savez(os.path.join(directory, "codebook.npz"), centroids=self.centroids)
+
+    @classmethod
+    def load(cls, directory):
+        centroids = np.load(os.path.join(directory, "codebook.npz"))["centroids"]
+        return cls(centroids.shape[0], centroids)
+
+_QUANTIZERS = {"int8": ScalarQuantizer, "pq": ProductQuantizer}
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """압축 코드는 메모리에, float32 원본은 디스크(mmap)에 두는 NumPy 벡터 저장소
+
+    - 검색: 메모리의 코드로 모든 청크의 근사 점수를 계산 → 상위 후보만 디스크의 float32 행을 읽어 정확히 다시 계산
+    - 코드북을 학습하기 전(train() 전)에는 float32 전수 비교로 검색
+    - codes.bin(청크별 코드), codebook.npz(학습한 범위/중심), quantization.json(방식)을 같은 폴더에 저장
+    """
+
+    def __init__(self, persist_directory=NUMPY_STORE_PATH, embedding_function=None, quantization=DEFAULT_QUANTIZATION):
+        super().__init__(persist_directory, embedding_function, dtype="float32")
+        if self.dtype != "float32":
+            raise ValueError(f"재계산용 원본이 필요해서 float32 저장소만 양자화할 수 있습니다 (현재 {self.dtype}).")
+        settings = self._read_settings()
+        kind = settings.get("kind", quantization)
+        if kind not in _QUANTIZERS:
+            raise ValueError(f"지원하지 않는 양자화 방식입니다: {kind}")
+        if os.path.exists(self._path("codebook.npz")):
+            self.quantizer = _QUANTIZERS[kind].load(persist_directory)
+        else:
+            self.quantizer = _QUANTIZERS[kind]()
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+        self._code_rows = 0
+        if self.quantizer.trained:
+            self._load_codes()
+
+    # 📂 코드 파일
+    def _read_settings(self):
+        if not os.path.exists(self._path("quantization.json")):
+            return {}
+        with open(self._path("quantization.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_codes(self):
+        codes = np.zeros((0, self.quantizer.code_size), dtype=np.uint8)
+        if os.path.exists(self._path("codes.bin")):
+            codes = np.fromfile(self._path("codes.bin"), dtype=np.uint8).reshape(-1, self.quantizer.code_size)
+        if len(codes) > len(self._ids):
+            # 압축 도중 종료되어 행 번호가 맞지 않는 코드 → 원본에서 모두 다시 만듦
+            self._rewrite_codes()
+            return
+        self._codes = codes
+        self._code_rows = len(codes)
+        # 코드를 쓰기 전에 종료된 행은 원본에서 다시 만듦
+        if self._code_rows < len(self._ids):
+            self._append_codes(self._code_rows, len(self._ids))
+
+    def _append_codes(self, start, end):
+        codes = self._encode_rows(start, end)
+        if self._code_rows + len(codes) > len(self._codes):
+            grown = np.zeros((max(2 * len(self._codes), self._code_rows + len(codes), 1024), self.quantizer.code_size),
+                             dtype=np.uint8)
+            grown[:self._code_rows] = self._codes[:self._code_rows]
+            self._codes = grown
+        self._codes[self._code_rows:self._code_rows + len(codes)] = codes
+        self._code_rows += len(codes)
+        with open(self._path("codes.bin"), "ab") as f:
+            f.write(codes.tobytes())
+
+    def _encode_rows(self, start, end):
+        blocks = [self.quantizer.encode(np.asarray(self._vectors[row:min(row + ENCODE_BLOCK_ROWS, end)]))
+                  for row in range(start, end, ENCODE_BLOCK_ROWS)]
+        return np.vstack(blocks) if blocks else np.zeros((0, self.quantizer.code_size), dtype=np.uint8)
+
+    def _rewrite_codes(self):
+        if os.path.exists(self._path("codes.bin")):
+            os.remove(self._path("codes.bin"))
+        self._codes = np.zeros((0, self.quantizer.code_size), dtype=np.uint8)
+        self._code_rows = 0
+        self._append_codes(0, len(self._ids))
+
+    # 🎓 학습
+    def train(self, samples=TRAIN_SAMPLES, seed=0):
+        """살아 있는 청크 중 samples개로 코드북을 학습하고 모든 청크의 코드를 다시 만드는 함수"""
+        with self._lock:
+            rows = np.asarray(sorted(self._rows.values()), dtype=np.int64)
+            if not len(rows):
+                raise ValueError("학습할 벡터가 없습니다.")
+            rng = np.random.default_rng(seed)
+            picked = np.sort(rng.choice(rows, min(samples, len(rows)), replace=False))
+            self.quantizer.train(np.asarray(self._vectors[picked]))
+            self.quantizer.save(self._persist_directory)
+            with open(self._path("quantization.json"), "w", encoding="utf-8") as f:
+                json.dump({"kind": self.quantizer.kind, "code_size": self.quantizer.code_size}, f)
+            self._rewrite_codes()
+
+    # 💾 저장 & 압축 (원본을 저장한 뒤 같은 행의 코드를 추가)
+    def upsert_vectors(self, ids, texts, metadatas, vectors):
+        with self._lock:
+            start = len(self._ids)
+            super().upsert_vectors(ids, texts, metadatas, vectors)
+            if self.quantizer.trained:
+                self._append_codes(start, len(self._ids))
+
+    def compact(self):
+        with self._lock:
+            if os.path.exists(self._path("codes.bin")):
+                os.remove(self._path("codes.bin"))  # 도중에 종료되면 다음에 열 때 원본에서 다시 만들도록 먼저 지움
+            rows = super().compact()
+            if self.quantizer.trained:
+                self._rewrite_codes()
+            return rows
+
+    # 🔎 검색
+    def search_batch(self, queries, k, rescore=True):
+        """압축 코드로 후보를 고르고 float32 원본으로 다시 계산한 상위 k개 (rescore=False면 근사 점수 그대로)"""
+        with self._lock:
+            if not self.quantizer.trained or not self._rows:
+                return super().search_batch(queries, k)
+            queries = _normalize(queries)
+            rows = len(self._ids)
+            scores = self.quantizer.scores(queries, self._codes[:rows])
+            scores[:, self._alive[:rows] == 0] = -np.inf
+            k = min(k, len(self._rows))
+            candidates = min(max(k * RESCORE_FACTOR, RESCORE_MIN), len(self._rows)) if rescore else k
+            top = np.argpartition(-scores, candidates - 1, axis=1)[:, :candidates]
+
+            results = []
+            for query, query_scores, picked in zip(queries, scores, top):
+                if rescore:
+                    picked = np.sort(picked)  # 디스크에서 순서대로 읽도록 정렬
+                    exact = np.asarray(self._vectors[picked]) @ query
+                    best = np.argsort(-exact)[:k]
+                    results.append([(int(picked[i]), float(exact[i])) for i in best])
+                else:
+                    best = picked[np.argsort(-query_scores[picked])]
+                    results.append([(int(row), float(query_scores[row])) for row in best])
+            return results
+
+    def memory_bytes(self):
+        """검색 코드만의 메모리 크기 (청크별 코드 + 코드북, float32 원본은 후보 행만 디스크에서 읽음)
+
+        ID/본문/메타데이터 목록은 포함하지 않음 (sidecar_bytes_per_chunk 참고)
+        """
+        if not self.quantizer.trained:
+            return super().memory_bytes()
+        return self._code_rows * self.quantizer.code_size + self.quantizer.nbytes
+
+def sidecar_bytes_per_chunk(store, samples=REPORT_SAMPLES, seed=0):
+    """NumpyVectorStore가 메모리에 들고 있는 ID/본문/메타데이터(파이썬 객체)의 청크당 크기 추정값
+
+    표본 행의 문자열/dict 크기와 목록·ID 색인(dict) 한 칸씩을 더한다 (키 문자열처럼 공유되는 객체도 포함해 약간 크게 잡힘).
+    """
+    rows = np.asarray(sorted(store._rows.values()), dtype=np.int64)
+    if not len(rows):
+        return 0.0
+    picked = np.random.default_rng(seed).choice(rows, min(samples, len(rows)), replace=False)
+    total = 0
+    for row in picked.tolist():
+        metadata = store._metadatas[row]
+        total += sys.getsizeof(store._ids[row]) + sys.getsizeof(store._documents[row]) + sys.getsizeof(metadata)
+        total += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in metadata.items())
+    slots = 3 * 8 + sys.getsizeof(store._rows) / max(len(store._rows), 1)  # 세 목록의 포인터 + ID → 행 dict
+    return total / len(picked) + slots
+
+def recall_report(store, samples=REPORT_SAMPLES, k=20, noise=0.05, seed=0):
+    """저장된 벡터에 잡음을 섞은 질의로 float32 전수 비교 대비 재현율과 청크당 메모리를 측정하는 함수"""
+    rng = np.random.default_rng(seed)
+    rows = np.asarray(sorted(store._rows.values()), dtype=np.int64)
+    picked = rng.choice(rows, min(samples, len(rows)), replace=False)
+    queries = np.asarray(store._vectors[np.sort(picked)])
+    queries = queries + noise * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(queries.shape[1])
+
+    truth = NumpyVectorStore.search_batch(store, queries, k)
+    report = {"chunks": store.count(), "dim": store.dim, "kind": store.quantizer.kind, "k": k,
+              "float32_bytes_per_chunk": store.dim * 4,
+              "code_bytes_per_chunk": store.quantizer.code_size,
+              "memory_bytes": store.memory_bytes(),
+              "sidecar_bytes_per_chunk": sidecar_bytes_per_chunk(store, samples, seed)}
+    report["ram_bytes_per_chunk"] = report["memory_bytes"] / max(report["chunks"], 1) + report["sidecar_bytes_per_chunk"]
+    report["float32_ram_bytes_per_chunk"] = report["float32_bytes_per_chunk"] + report["sidecar_bytes_per_chunk"]
+    for name, rescore in (("recall_codes_only", False), ("recall_rescored", True)):
+        found = store.search_batch(queries, k, rescore=rescore)
+        report[name] = float(np.mean([len({r for r, _ in f} & {r for r, _ in t}) / len(t)
+                                      for f, t in zip(found, truth)]))
+    return report
+
+def format_report(report):
+    return (
+        f"🗜️ {report['kind']} | 청크 {report['chunks']}개 x {report['dim']}차원\n"
+        f"💾 검색 코드만: 청크당 {report['float32_bytes_per_chunk']} B(float32) → {report['code_bytes_per_chunk']} B "
+        f"({report['float32_bytes_per_chunk'] / report['code_bytes_per_chunk']:.0f}배 절감), "
+        f"코드+코드북 {report['memory_bytes'] / 1024 / 1024:.1f} MB\n"
+        f"🧾 본문/메타데이터 포함 전체: 청크당 {report['float32_ram_bytes_per_chunk'] / 1024:.1f} KB → "
+        f"{report['ram_bytes_per_chunk'] / 1024:.1f} KB (본문/메타데이터 {report['sidecar_bytes_per_chunk'] / 1024:.1f} KB)\n"
+        f"🎯 recall@{report['k']}: 코드만 {report['recall_codes_only']:.3f} → "
+        f"float32 재계산 {report['recall_rescored']:.3f} (손실 {1 - report['recall_rescored']:.3f})"
+    )
+
+# 🛠️ CLI: python quantization.py migrate [--quantization int8|pq] | report
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 저장소 양자화 (int8 / PQ) 전환과 메모리·재현율 보고")
+    parser.add_argument("command", choices=["migrate", "report"],
+                        help="migrate: 기존 Chroma 컬렉션(또는 float32 NumPy 저장소)을 양자화 저장소로 전환, "
+                             "report: 청크당 메모리와 재현율 손실 출력")
+    parser.add_argument("--path", default=NUMPY_STORE_PATH)
+    parser.add_argument("--quantization", default=DEFAULT_QUANTIZATION, choices=sorted(_QUANTIZERS))
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    store = QuantizedVectorStore(args.path, quantization=args.quantization)
+    if args.command == "migrate":
+        if not store.count():
+            # 아직 NumPy 저장소가 없으면 Chroma 벡터를 재임베딩 없이 복사
+            import chromadb
+            from resources import CHROMA_DB_PATH, active_collection_name
+            collection = chromadb.PersistentClient(path=CHROMA_DB_PATH).get_collection(active_collection_name())
+            print(f"📦 Chroma에서 {import_collection(collection, store)}개 청크를 옮겼습니다.")
+        if store.quantizer.kind != args.quantization and store.quantizer.trained:
+            print(f"⚠️ 이미 {store.quantizer.kind} 방식으로 학습된 저장소입니다. 다른 방식은 새 폴더를 사용하세요.")
+        else:
+            store.train()
+            print("🎓 코드북 학습 및 코드 생성 완료 (resources.VECTOR_BACKEND=\"numpy\", "
+                  f"NUMPY_QUANTIZATION=\"{store.quantizer.kind}\"로 사용)")
+    if store.count() and store.quantizer.trained:
+        print(format_report(recall_report(store, k=args.k)))
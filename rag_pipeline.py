@@ -0,0 +1,168 @@
+import time
+from context_packer import CONTEXT_TOKEN_BUDGET, pack_context
+from indexer import index_version
+from sparse_index import reciprocal_rank_fusion
+from tracing import observe, span
+
+# 🔎 검색할 문서 개수 (as_retriever() 기본값과 동일)
+DEFAULT_TOP_K = 4
+
+# 🔀 하이브리드 검색에서 dense/sparse 각각 가져올 후보 수
+HYBRID_CANDIDATES = 20
+
+# 프롬프트 템플릿
+def create_prompt(question, relevant_docs, token_budget=CONTEXT_TOKEN_BUDGET, stats=None):
+    # 문서 내용들을 토큰 예산 안에서 겹침 없이 합쳐서 context로 사용 (관련도 순서 유지)
+    context = "\n\n".join(pack_context(relevant_docs, budget=token_budget, stats=stats))
+
+    # 프롬프트를 한글로 응답하도록 강력히 유도
+    return f"""
+    아래의 문서 내용에 대한 질문을 한글로 정확하고 자연스럽게 답변해 주세요:
+
+    문서 내용: {context}
+
+    질문: {question}
+
+    답변은 반드시 한글로 작성해야 하며, 제공된 문서 내용을 기반으로 구체적이고 정확한 답을 작성해주세요.
+    """
+
+def _doc_key(doc):
+    """검색 결과 문서의 청크 ID (ID가 없는 예전 청크는 내용으로 구분)"""
+    return doc.metadata.get("chunk_id") or getattr(doc, "id", None) or doc.page_content
+
+# 📂 검색 (질문 임베딩 1회 + 벡터 검색 1회, sparse_index가 있으면 키워드 검색과 RRF로 결합)
+def retrieve(question, vectorstore, embeddings, k=DEFAULT_TOP_K, timings=None, sparse_index=None, query_vector=None,
+             reranker=None):
+    """질문을 한 번만 임베딩하고, 그 벡터로 벡터 DB를 한 번만 검색하는 함수 (query_vector가 있으면 재사용)
+
+    reranker가 있으면 후보를 reranker.candidates개까지 더 가져온 뒤 재정렬해서 k개만 남긴다.
+    """
+    timings = {} if timings is None else timings
+    fetch_k = k if sparse_index is None else max(k, HYBRID_CANDIDATES)
+    if reranker is not None:
+        fetch_k = max(fetch_k, reranker.candidates)
+
+    if query_vector is None:
+        start = time.perf_counter()
+        query_vector = embeddings.embed_query(question)
+        timings["embed"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with span("vector.search"):
+        docs = vectorstore.similarity_search_by_vector(query_vector, k=fetch_k)
+    timings["search"] = time.perf_counter() - start
+    if sparse_index is not None:
+        docs = _fuse_sparse(question, docs, vectorstore, sparse_index, fetch_k, timings)
+    if reranker is not None and docs:
+        return reranker.rerank(question, docs, k, key=_doc_key, timings=timings)
+    return docs[:k]
+
+def _fuse_sparse(question, docs, vectorstore, sparse_index, fetch_k, timings):
+    """벡터 검색 결과와 키워드 검색 결과를 RRF로 합치는 함수"""
+    start = time.perf_counter()
+    with span("sparse.search"):
+        sparse_ids = [cid for cid, _ in sparse_index.search(question, k=fetch_k)]
+    timings["sparse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_id = {_doc_key(doc): doc for doc in docs}
+    fused_ids = reciprocal_rank_fusion([list(by_id), sparse_ids])[:fetch_k]
+    missing = [cid for cid in fused_ids if cid not in by_id]
+    if missing:
+        # 키워드 검색에서만 찾은 청크는 벡터 DB에서 본문을 가져옴
+        from langchain_core.documents import Document
+        found = vectorstore.get(ids=missing, include=["documents", "metadatas"])
+        for cid, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+            by_id[cid] = Document(page_content=text, metadata=metadata or {})
+    timings["fuse"] = time.perf_counter() - start
+    return [by_id[cid] for cid in fused_ids if cid in by_id]
+
+def format_timings(timings):
+    """단계별 소요 시간을 한 줄 문자열로 정리하는 함수"""
+    return " | ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in timings.items())
+
+# 💬 스트리밍 답변 파이프라인: 토큰이 생성되는 즉시 전달
+def stream_answer(question, vectorstore, embeddings, llm, k=DEFAULT_TOP_K, cancel_event=None, stats=None,
+                  sparse_index=None, answer_cache=None, reranker=None):
+    """LLM이 생성하는 토큰을 하나씩 yield하는 함수 (stats에 문서, 소요 시간, TTFT, tokens/sec 기록)
+
+    llm은 `stream(prompt)`으로 문자열 조각을 yield하는 객체면 되므로 가짜 LLM으로도 테스트할 수 있다.
+    cancel_event(threading.Event)가 설정되면 생성을 중단한다.
+    answer_cache가 있으면 같은/비슷한 질문의 답변을 검색·생성 없이 바로 돌려준다.
+    reranker가 있으면 후보를 더 많이 가져와 재정렬한 상위 k개만 프롬프트에 넣는다.
+    """
+    stats = {} if stats is None else stats
+    timings = stats.setdefault("timings", {})
+    total_start = time.perf_counter()
+    stats["cached"] = False
+
+    query_vector = None
+    if answer_cache is not None:
+        version = index_version()
+        cached = answer_cache.lookup_exact(question, version)
+        if cached is None:
+            start = time.perf_counter()
+            query_vector = embeddings.embed_query(question)
+            timings["embed"] = time.perf_counter() - start
+            cached = answer_cache.lookup_similar(query_vector, version)
+        if cached is not None:
+            stats["cached"] = True
+            stats["docs"] = cached["docs"]
+            timings["total"] = time.perf_counter() - total_start
+            print(f"💾 캐시된 답변 사용 ({timings['total'] * 1000:.0f}ms)")
+            yield cached["answer"]
+            return
+
+    with span("retrieve"):
+        docs = retrieve(question, vectorstore, embeddings, k=k, timings=timings, sparse_index=sparse_index,
+                        query_vector=query_vector, reranker=reranker)
+    stats["docs"] = docs
+    if not docs:
+        timings["total"] = time.perf_counter() - total_start
+        return
+
+    start = time.perf_counter()
+    with span("prompt"):
+        prompt = create_prompt(question, docs, stats=stats.setdefault("context", {}))
+    timings["prompt"] = time.perf_counter() - start
+
+    token_count = 0
+    answer_parts = []
+    first_token_at = None
+    stats["cancelled"] = False
+    generate_start = time.perf_counter()
+    tokens = llm.stream(prompt)
+    try:
+        for token in tokens:
+            if cancel_event is not None and cancel_event.is_set():
+                stats["cancelled"] = True
+                break
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            token_count += 1
+            answer_parts.append(token)
+            yield token
+    finally:
+        # 중단된 경우에도 Ollama 스트림 연결을 바로 정리
+        close = getattr(tokens, "close", None)
+        if close is not None:
+            close()
+
+        end = time.perf_counter()
+        timings["generate"] = end - generate_start
+        timings["total"] = end - total_start
+        stats["tokens"] = token_count
+        stats["ttft"] = (first_token_at - total_start) if first_token_at is not None else None
+        decode_seconds = (end - first_token_at) if first_token_at is not None else 0.0
+        stats["tokens_per_sec"] = token_count / decode_seconds if decode_seconds > 0 else 0.0
+        # 생성은 토큰을 yield하는 동안 스레드가 바뀔 수 있어 span 대신 측정한 시간을 그대로 기록
+        observe("generate", timings["generate"])
+        observe("ttft", stats["ttft"])
+        observe("chat", timings["total"])
+
+        ttft_text = f"{stats['ttft'] * 1000:.0f}ms" if stats["ttft"] is not None else "-"
+        print(f"⏱️ {format_timings(timings)} | TTFT {ttft_text} | {stats['tokens_per_sec']:.1f} tok/s")
+
+    # 끝까지 생성된 답변만 캐시에 저장 (중단된 답변은 저장하지 않음)
+    if answer_cache is not None and not stats["cancelled"]:
+        answer_cache.store(question, "".join(answer_parts), docs, query_vector, version)
@@ -1,102 +1,203 @@
+import asyncio
 import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import gradio as gr
 from pdf_processor import process_pdf
-from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.llms import Ollama
+from structured_processor import process_csv, process_json, process_txt
+from resources import CHROMA_DB_PATH, get_embeddings, get_llm, get_sparse_index, get_vectorstore, start_warmup
+from rag_pipeline import stream_answer
+from answer_cache import AnswerCache
+from reranker import create_reranker
+from indexer import (delete_document, document_id, file_sha256, needs_legacy_cleanup, needs_reembed,
+                     reembed_collection, remove_legacy_chunks)
+from index_compaction import format_report, maybe_compact
+from job_queue import JobQueue, format_job
+from watcher import DirectoryWatcher, delete_from_index
+from tracing import profile, register_stats, start_metrics_server
 
 # 파일 저장 경로
 UPLOAD_DIR = 'C:/rag-project/pdf-files/'
-CHROMA_DB_PATH = "C:/rag-project/chroma_db"
-
-# Ollama 임베딩 & 모델 설정
-embeddings = OllamaEmbeddings(model="mxbai-embed-large")  # 임베딩 모델
-vectorstore = Chroma(persist_directory=CHROMA_DB_PATH, embedding_function=embeddings)
-retriever = vectorstore.as_retriever()  # 벡터 DB에서 검색을 위한 retriever
-
-# 프롬프트 템플릿 추가
-def create_prompt(question, relevant_docs):
-    # 문서 내용들을 하나로 합쳐서 context로 사용
-    context = " ".join([doc.page_content for doc in relevant_docs])
-    
-    # 프롬프트를 한글로 응답하도록 강력히 유도
-    return f"""
-    아래의 문서 내용에 대한 질문을 한글로 정확하고 자연스럽게 답변해 주세요:
-    
-    문서 내용: {context}
-    
-    질문: {question}
-    
-    답변은 반드시 한글로 작성해야 하며, 제공된 문서 내용을 기반으로 구체적이고 정확한 답을 작성해주세요.
-    """
-
-qa_chain = RetrievalQA.from_chain_type(
-    llm=Ollama(model="gemma2"),  # gemma2-9b 모델 사용
-    chain_type="stuff",
-    retriever=retriever
-)
+TEXT_DIR = 'C:/rag-project/text-file/'
+
+# Ollama 임베딩/벡터 DB/LLM은 resources의 공유 객체를 처음 사용할 때 생성
+# (인덱싱과 같은 객체를 공유해서 압축 후에도 같은 컬렉션을 사용)
+
+# 💾 같은/비슷한 질문의 답변 캐시 (문서가 추가/변경되면 자동으로 비워짐)
+answer_cache = AnswerCache()
+
+# 🎯 검색 후보 30개를 cross-encoder로 재정렬해서 관련도가 높은 청크만 프롬프트에 사용
+# (시간 예산을 넘으면 검색 순서 그대로, sentence-transformers가 없으면 재정렬 없음)
+reranker = create_reranker()
+
+# 📈 답변 캐시/재정렬 적중률과 횟수를 /metrics에 함께 내보냄 (rag_answer_cache_hit_rate, rag_rerank_fallbacks_total 등)
+register_stats("answer_cache", answer_cache.stats, gauges=("entries", "hit_rate"))
+if reranker is not None:
+    register_stats("rerank", reranker.stats, gauges=("cache_entries", "cache_hit_rate"))
+
+# ⚙️ 동시성 설정: 채팅과 업로드(인덱싱)는 서로 다른 풀/대기열을 사용해서
+# 큰 PDF를 인덱싱하는 동안에도 채팅 응답이 밀리지 않도록 함
+CHAT_CONCURRENCY = 2  # 동시에 생성할 답변 수 (gemma2로 동시에 보내는 요청 수)
+INGEST_CONCURRENCY = 1  # 동시에 처리할 업로드 수
+QUEUE_MAX_SIZE = 64  # 대기열에 쌓일 수 있는 요청 수
+
+_chat_executor = ThreadPoolExecutor(max_workers=CHAT_CONCURRENCY, thread_name_prefix="chat")
+_ingest_executor = ThreadPoolExecutor(max_workers=INGEST_CONCURRENCY, thread_name_prefix="ingest")
+_DONE = object()
+
+async def _iterate_in_executor(iterator, executor):
+    """동기 generator를 executor 스레드에서 한 항목씩 꺼내는 async generator (이벤트 루프를 막지 않음)"""
+    future = None
+    try:
+        while True:
+            future = executor.submit(next, iterator, _DONE)
+            item = await asyncio.wrap_future(future)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # 요청이 취소되어도 실행 중인 next()가 끝난 뒤에 generator를 닫음
+        if future is None or future.done():
+            iterator.close()
+        else:
+            future.add_done_callback(lambda _: iterator.close())
+
+def _store_upload(temp_path):
+    """업로드된 임시 파일을 UPLOAD_DIR로 복사하고 (저장 경로, 파일 해시)를 반환하는 함수"""
+    path = os.path.join(UPLOAD_DIR, os.path.basename(temp_path))
+    if os.path.abspath(temp_path) != os.path.abspath(path):
+        shutil.copyfile(temp_path, path)
+    return path, file_sha256(path)
 
 # 📂 **PDF 업로드 및 분석 함수**
-def handle_upload(file, file_type):
+async def handle_upload(file, file_type):
     if file is None:
         return "❌ 파일을 업로드해주세요."
-    
-    if file_type == 'pdf':
-        process_pdf(file.name)  # PDF 처리 실행
-    elif file_type == 'csv':
-        process_csv(file.name)
-    elif file_type == 'json':
-        process_json(file.name)
-    
-    # 업로드된 PDF 목록 업데이트
-    uploaded_pdfs = os.listdir(UPLOAD_DIR)
-    return uploaded_pdfs
-
-# CSV 파일 처리 함수
-def process_csv(file_path):
-    import pandas as pd
-    df = pd.read_csv(file_path)
-    return df.to_dict(orient="records")
-
-# JSON 파일 처리 함수
-def process_json(file_path):
-    import json
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    return data
-
-# PDF 파일 삭제 기능
+    if file_type not in ("pdf", "txt", "csv", "json"):
+        return "❌ 파일 유형을 선택해주세요."
+
+    # 파일 복사/해시 계산만 하고 인덱싱은 작업 대기열에 맡김 (작업 ID를 바로 반환)
+    loop = asyncio.get_running_loop()
+    path, file_hash = await loop.run_in_executor(_ingest_executor, _store_upload, file.name)
+    job_id, created = job_queue.submit(path, file_type, file_hash)
+    if not created:
+        return f"⏳ 같은 파일이 이미 처리 중입니다. (작업 ID: {job_id})"
+    return f"📥 인덱싱 작업이 등록되었습니다. (작업 ID: {job_id})"
+
+def job_status():
+    """최근 인덱싱 작업 상태 (UI에서 주기적으로 조회)"""
+    jobs = job_queue.recent()
+    if not jobs:
+        return "등록된 작업이 없습니다."
+    return "\n".join(format_job(job) for job in jobs)
+
+# PDF 파일 삭제 기능 (파일과 함께 벡터 DB/키워드 색인의 청크도 삭제)
 def delete_pdf(pdf_filename):
     pdf_path = os.path.join(UPLOAD_DIR, pdf_filename)
     if os.path.exists(pdf_path):
         os.remove(pdf_path)
+        removed = delete_document(get_vectorstore(), document_id(pdf_path), sparse_index=get_sparse_index())
+        # 삭제 표시가 쌓였으면 인덱싱 작업과 같은 대기열에서 색인 압축
+        job_queue.submit(CHROMA_DB_PATH, "compact", "compact")
         uploaded_pdfs = os.listdir(UPLOAD_DIR)  # PDF 목록을 업데이트
-        return f"✅ PDF 파일 '{pdf_filename}'이 삭제되었습니다!", uploaded_pdfs
+        return f"✅ PDF 파일 '{pdf_filename}'이 삭제되었습니다! (청크 {removed}개 삭제)", gr.update(choices=uploaded_pdfs)
     else:
-        return f"❌ 파일 '{pdf_filename}'을(를) 찾을 수 없습니다.", uploaded_pdfs
+        return f"❌ 파일 '{pdf_filename}'을(를) 찾을 수 없습니다.", gr.update(choices=os.listdir(UPLOAD_DIR))
+
+def compact_index():
+    """삭제 표시 비율이 기준을 넘으면 벡터 DB를 압축하는 작업"""
+    report = maybe_compact(get_vectorstore(), sparse_index=get_sparse_index())
+    if report is not None:
+        print(format_report(report))
+
+# 📋 업로드 인덱싱 작업 대기열 (서버를 재시작해도 남은 작업을 이어서 처리)
+job_queue = JobQueue({
+    "pdf": process_pdf,
+    "txt": process_txt,
+    "csv": process_csv,
+    "json": process_json,
+    "delete": lambda path, progress: delete_from_index(path),
+    "compact": lambda path, progress: compact_index(),
+    "reembed": lambda path, progress: reembed_collection(get_vectorstore(), get_embeddings()),
+    "legacy_cleanup": lambda path, progress: remove_legacy_chunks(get_vectorstore(), get_sparse_index()),
+}, workers=INGEST_CONCURRENCY)
+
+# 👀 업로드/텍스트 폴더 감시: 폴더에 직접 넣거나 지운 파일도 작업 대기열을 통해 인덱스에 반영
+watcher = DirectoryWatcher(
+    [UPLOAD_DIR, TEXT_DIR],
+    ingest=lambda path, file_type, file_hash: job_queue.submit(path, file_type, file_hash),
+    delete=lambda path: job_queue.submit(path, "delete", f"delete:{path}"),
+)
+
+# 🛑 브라우저 세션별로 진행 중인 답변 생성의 취소 신호
+# (입력한 채팅 이름은 비어 있거나 겹칠 수 있으므로 Gradio가 세션마다 만드는 session_hash를 키로 사용)
+_active_generations = {}
+_generations_lock = threading.Lock()
+
+def stop_generation(request: gr.Request):
+    """같은 세션에서 진행 중인 답변 생성을 중단시키는 함수 (새 질문 전송 시 즉시 호출)"""
+    with _generations_lock:
+        cancel_event = _active_generations.get(request.session_hash)
+    if cancel_event is not None:
+        cancel_event.set()
+
+def _register_generation(session):
+    """새 답변 생성의 취소 신호를 등록하는 함수"""
+    cancel_event = threading.Event()
+    with _generations_lock:
+        previous = _active_generations.get(session)
+        if previous is not None:
+            previous.set()
+        _active_generations[session] = cancel_event
+    return cancel_event
+
+def _answer_tokens(question, cancel_event, stats):
+    """공유 객체를 채팅 스레드에서 가져와 답변 토큰을 yield하는 generator (첫 생성이 이벤트 루프를 막지 않음)"""
+    with profile("chat"):
+        yield from stream_answer(question, get_vectorstore(), get_embeddings(), get_llm(), cancel_event=cancel_event,
+                                 stats=stats, sparse_index=get_sparse_index(), answer_cache=answer_cache,
+                                 reranker=reranker)
 
 # 📝 **Q&A 시스템 (사용자 질문에 대한 답변)**
-def ask_question(question, chat_history, chat_name):
+async def ask_question(question, chat_history, request: gr.Request):
     if not question.strip():
-        return "❌ 질문을 입력해주세요!", chat_history
+        yield "❌ 질문을 입력해주세요!", chat_history
+        return
 
-    # 문서에서 관련된 내용을 검색
-    retrieved_docs = retriever.get_relevant_documents(question)
-    
-    if not retrieved_docs:
-        return "❌ 관련된 문서를 찾을 수 없습니다.", chat_history
+    session = request.session_hash
+    cancel_event = _register_generation(session)
+    chat_history = list(chat_history or [])
+    chat_history.append((question, ""))
 
-    # 한국어로 답변을 요청하는 프롬프트 생성
-    prompt = create_prompt(question, retrieved_docs)
-    
-    # `qa_chain` 실행, 프롬프트 템플릿을 사용하여 한국어 답변 유도
-    answer = qa_chain.run(prompt)
-    
-    # 대화 기록에 사용자의 질문과 Bot의 답변만 간결하게 저장
-    chat_history.append((question, answer))
+    # 하이브리드 검색 1회(벡터 + 키워드) → 프롬프트 생성 1회 → 토큰 스트리밍 (TTFT, tokens/sec 기록)
+    # (답변 생성은 채팅 전용 스레드 풀에서 진행하고, 토큰만 이벤트 루프로 전달)
+    # 문서가 없어 일찍 끝나거나 클라이언트가 끊겨 yield에서 GeneratorExit가 나도 세션의 취소 신호는 항상 해제
+    stats = {}
+    answer = ""
+    finished = False
+    try:
+        tokens = _answer_tokens(question, cancel_event, stats)
+        async for token in _iterate_in_executor(tokens, _chat_executor):
+            answer += token
+            chat_history[-1] = (question, answer)
+            yield "", chat_history
+        finished = True
 
-    return "", chat_history  # 대화 기록 업데이트 후 출력 값 리턴
+        if not stats.get("docs"):
+            chat_history.pop()
+            yield "❌ 관련된 문서를 찾을 수 없습니다.", chat_history
+            return
+
+        if stats.get("cancelled"):
+            chat_history[-1] = (question, answer + " …(중단됨)")
+            yield "", chat_history
+    finally:
+        if not finished:
+            cancel_event.set()  # 요청이 중간에 끊기면 진행 중인 생성도 중단
+        with _generations_lock:
+            if _active_generations.get(session) is cancel_event:
+                del _active_generations[session]
 
 # 🎨 **Gradio UI 디자인**
 with gr.Blocks() as demo:
@@ -107,11 +208,16 @@ with gr.Blocks() as demo:
             # 네비게이션 관련 UI
             gr.Markdown("**문서**")
             file_input = gr.File(label="Upload File")
-            file_type_dropdown = gr.Dropdown(choices=["pdf", "csv", "json"], label="파일 유형 선택")
+            file_type_dropdown = gr.Dropdown(choices=["pdf", "txt", "csv", "json"], label="파일 유형 선택")
             upload_button = gr.Button("업로드")
             output_text = gr.Textbox(label="처리 상태", interactive=False)
             
-            upload_button.click(fn=handle_upload, inputs=[file_input, file_type_dropdown], outputs=[output_text])
+            upload_button.click(fn=handle_upload, inputs=[file_input, file_type_dropdown], outputs=[output_text],
+                                concurrency_limit=INGEST_CONCURRENCY, concurrency_id="ingest")
+
+            # 인덱싱 작업 진행 상황 (2초마다 갱신)
+            job_output = gr.Textbox(label="인덱싱 작업", interactive=False, lines=5, value=job_status)
+            gr.Timer(2).tick(fn=job_status, outputs=[job_output], queue=False)
 
             # PDF 목록과 삭제 기능
             gr.Markdown("🗂 **업로드된 PDF 목록**")
@@ -136,7 +242,31 @@ with gr.Blocks() as demo:
                 with gr.Column(scale=0.25):
                     submit_btn = gr.Button("전송")
 
-            # submit 버튼을 누르면 질문을 처리하고 답변을 반환하는 함수 연결
-            submit_btn.click(fn=ask_question, inputs=[user_input, chat_output, chat_name_input], outputs=[user_input, chat_output])
+            # submit 버튼을 누르면 진행 중인 답변을 먼저 중단하고(대기열 없이 즉시 실행)
+            # 새 질문의 답변을 토큰 단위로 스트리밍
+            submit_btn.click(fn=stop_generation, inputs=None, outputs=None, queue=False)
+            submit_btn.click(fn=ask_question, inputs=[user_input, chat_output], outputs=[user_input, chat_output], trigger_mode="multiple",
+                             concurrency_limit=CHAT_CONCURRENCY, concurrency_id="chat")
 
-demo.launch()
+if __name__ == "__main__":
+    job_queue.start()
+    if needs_legacy_cleanup():
+        # 매니페스트 도입 전에 저장된 청크(source 없음)는 다시 인덱싱해도 지워지지 않으므로 한 번 정리
+        job_queue.submit(CHROMA_DB_PATH, "legacy_cleanup", "legacy_cleanup")
+    if needs_reembed():
+        # 예전 임베딩 방식으로 저장된 벡터가 있으면 인덱싱 작업과 같은 대기열에서 다시 임베딩
+        job_queue.submit(CHROMA_DB_PATH, "reembed", "reembed")
+    watcher.start()
+    # /metrics는 항상 제공 (답변 캐시/재정렬 지표는 추적이 꺼져 있어도 집계됨)
+    # 구간별 소요 시간과 /traces는 tracing.TRACING_ENABLED = True일 때만 채워짐
+    try:
+        start_metrics_server()
+    except OSError as e:
+        print(f"⚠️ 지표 엔드포인트를 열 수 없습니다: {e}")
+    demo.queue(max_size=QUEUE_MAX_SIZE)
+    # UI가 먼저 요청을 받기 시작한 뒤, 백그라운드에서 벡터 DB를 열고 Ollama 모델을 메모리에 올림
+    demo.launch(prevent_thread_lock=True)
+    start_warmup()
+    if reranker is not None:
+        reranker.warmup()
+    demo.block_thread()
@@ -0,0 +1,184 @@
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from answer_cache import normalize_question
+from sparse_index import tokenize
+
+# 🎯 재정렬 설정
+RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"  # 한국어를 포함한 다국어 cross-encoder (sentence-transformers)
+RERANK_MAX_LENGTH = 512  # cross-encoder 입력(질문 + 청크) 최대 토큰 수
+RERANK_CANDIDATES = 30  # 재정렬을 위해 먼저 가져올 후보 수
+RERANK_BUDGET_MS = 400  # 재정렬에 쓸 수 있는 최대 시간 (CPU에서 후보 30개 점수 계산), 넘으면 원래 순서로 대체
+SCORE_CACHE_SIZE = 20000  # 캐시할 (질문, 청크) 점수 수
+RERANK_WORKERS = 2
+
+class CrossEncoderScorer:
+    """질문과 청크를 함께 읽는 cross-encoder 모델로 관련도를 매기는 scorer (운영용)
+
+    scorer는 name 속성과 score(질문, 텍스트 목록) → 점수 목록 메서드만 있으면 되므로 다른 모델로 바꿔 끼울 수 있다.
+    모델은 처음 점수를 계산할 때 재정렬 워커 스레드에서 불러온다 (그동안의 요청은 검색 순서 사용).
+    """
+
+    def __init__(self, model_name=RERANK_MODEL, max_length=RERANK_MAX_LENGTH):
+        self.name = model_name
+        self.max_length = max_length
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.name, max_length=self.max_length)
+        return self._model
+
+    def score(self, query, texts):
+        if not texts:
+            return []
+        return [float(score) for score in self._load().predict([(query, text) for text in texts])]
+
+class LexicalOverlapScorer:
+    """질문 토큰(한글 bigram + 영문/숫자 코드)이 청크에 얼마나 들어 있는지로 점수를 매기는 가벼운 scorer
+
+    관련도 모델이 아니므로 운영에는 쓰지 않고 테스트/벤치마크에서 Reranker에 직접 넣어 사용한다.
+    """
+
+    name = "lexical-overlap"
+
+    def score(self, query, texts):
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(texts)
+        scores = []
+        for text in texts:
+            tokens = tokenize(text)
+            matched = query_terms.intersection(tokens)
+            coverage = len(matched) / len(query_terms)
+            density = sum(1 for token in tokens if token in matched) / len(tokens) if tokens else 0.0
+            scores.append(coverage + 0.1 * density)
+        return scores
+
+class Reranker:
+    """후보 청크를 scorer 점수로 다시 정렬해 상위 top_n개만 남기는 단계
+
+    - (질문, 청크) 점수는 LRU로 캐시
+    - 점수 계산은 워커 스레드에서 하고 budget_ms 안에 끝나지 않으면 원래 순서(검색 순위)를 그대로 사용
+      (늦게 끝난 점수도 캐시에는 저장되어 다음 같은 질문에서 사용)
+    - 워커가 모두 이전 요청의 점수를 계산 중이면 대기열에 쌓지 않고 바로 원래 순서를 사용
+      (기다리느라 예산을 다 쓰고 매번 시간 초과되는 것을 막음, busy_fallbacks로 따로 집계)
+    """
+
+    def __init__(self, scorer, candidates=RERANK_CANDIDATES, budget_ms=RERANK_BUDGET_MS,
+                 cache_size=SCORE_CACHE_SIZE, workers=RERANK_WORKERS):
+        self.scorer = scorer
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self.workers = workers
+        self.calls = 0
+        self.fallbacks = 0
+        self.busy_fallbacks = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._scores = OrderedDict()  # (scorer 이름, 정규화된 질문, 청크 키) → 점수
+        self._inflight = 0  # 제출했지만 아직 끝나지 않은 점수 계산 수
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+
+    def _cached_scores(self, query, keys):
+        scores = {}
+        with self._lock:
+            for key in keys:
+                score = self._scores.get((self.scorer.name, query, key))
+                if score is not None:
+                    self._scores.move_to_end((self.scorer.name, query, key))
+                    scores[key] = score
+            self.cache_hits += len(scores)
+            self.cache_misses += len(keys) - len(scores)
+        return scores
+
+    def _score_and_cache(self, query, question, keys, texts):
+        scores = dict(zip(keys, self.scorer.score(question, texts)))
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[(self.scorer.name, query, key)] = score
+                self._scores.move_to_end((self.scorer.name, query, key))
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+        return scores
+
+    def _release(self, future):
+        with self._lock:
+            self._inflight -= 1
+
+    def _fallback(self, docs, top_n, start, timings, busy=False):
+        with self._lock:
+            self.fallbacks += 1
+            if busy:
+                self.busy_fallbacks += 1
+        if timings is not None:
+            timings["rerank"] = time.perf_counter() - start
+        return docs[:top_n]
+
+    def rerank(self, question, docs, top_n, key=None, timings=None):
+        """docs를 점수 순으로 정렬해 top_n개를 반환하는 함수 (시간 초과 시 원래 순서의 top_n개)
+
+        key(doc)는 캐시에 사용할 청크 식별자 (기본값: 청크 내용)
+        """
+        key = (lambda doc: doc.page_content) if key is None else key
+        start = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+
+        query = normalize_question(question)
+        keys = [key(doc) for doc in docs]
+        scores = self._cached_scores(query, keys)
+        pending = {k: doc.page_content for k, doc in zip(keys, docs) if k not in scores}
+        if pending:
+            with self._lock:
+                busy = self._inflight >= self.workers
+                if not busy:
+                    self._inflight += 1
+            if busy:
+                return self._fallback(docs, top_n, start, timings, busy=True)
+            future = self._pool.submit(self._score_and_cache, query, question, list(pending), list(pending.values()))
+            future.add_done_callback(self._release)
+            remaining = self.budget_ms / 1000 - (time.perf_counter() - start)
+            try:
+                scores.update(future.result(timeout=max(remaining, 0)))
+            except Exception as e:
+                if not isinstance(e, TimeoutError):
+                    print(f"⚠️ 재정렬 실패, 검색 순서 사용: {e}")
+                future.cancel()  # 아직 시작하지 않았으면 버림 (이미 계산 중이면 끝까지 계산해서 캐시에 저장)
+                return self._fallback(docs, top_n, start, timings)
+
+        # 점수가 같으면 원래 검색 순위를 유지 (sorted는 안정 정렬)
+        order = sorted(range(len(docs)), key=lambda i: -scores[keys[i]])
+        if timings is not None:
+            timings["rerank"] = time.perf_counter() - start
+        return [docs[i] for i in order[:top_n]]
+
+    def warmup(self):
+        """모델을 백그라운드에서 미리 불러오는 함수 (첫 질문이 모델 로딩 때문에 시간 초과되지 않도록)"""
+        return self._pool.submit(self.scorer.score, "워밍업", ["워밍업"])
+
+    def stats(self):
+        """재정렬 횟수, 원래 순서를 사용한 횟수(그중 워커가 모두 바빠서 바로 포기한 횟수), 점수 캐시 적중률"""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "calls": self.calls,
+                "fallbacks": self.fallbacks,
+                "busy_fallbacks": self.busy_fallbacks,
+                "cache_entries": len(self._scores),
+                "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            }
+
+def create_reranker():
+    """운영용 재정렬 단계 (cross-encoder를 쓸 수 없으면 None → 재정렬 없이 검색 순서 그대로 사용)"""
+    if importlib.util.find_spec("sentence_transformers") is None:
+        print("ℹ️ sentence-transformers가 설치되지 않아 재정렬을 사용하지 않습니다. (pip install sentence-transformers)")
+        return None
+    return Reranker(CrossEncoderScorer())
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+
+# 📂 ChromaDB 저장 경로
+CHROMA_DB_PATH = "C:/rag-project/chroma_db"
+# 검색에 사용하는 컬렉션 이름은 이 파일에 기록 (압축할 때 새 이름으로 다시 만든 뒤 이 파일만 바꿔서 전환)
+DEFAULT_COLLECTION = "langchain"  # 파일이 없을 때 사용하는 langchain Chroma 기본 컬렉션 이름
+ACTIVE_COLLECTION_FILE = "active_collection.json"
+
+# 🧠 Ollama 모델
+OLLAMA_BASE_URL = "http://localhost:11434"
+EMBED_MODEL = "mxbai-embed-large"
+LLM_MODEL = "gemma2"  # gemma2-9b 모델 사용
+
+# 🗄️ 벡터 저장소 종류: "chroma"(기본, HNSW) 또는 "numpy"(numpy_store.py, 메모리 매핑 행렬 + 전수 비교)
+# numpy로 바꾸기 전에 python numpy_store.py import로 기존 Chroma 벡터를 옮김
+VECTOR_BACKEND = "chroma"
+# numpy 저장소를 압축 코드로 검색할 때: None(float32 전수 비교), "int8"(청크당 1KB), "pq"(청크당 64바이트)
+# 코드로 후보를 고른 뒤 디스크의 float32 원본으로 다시 계산하며, python quantization.py migrate --quantization pq로 전환
+NUMPY_QUANTIZATION = None
+
+# 🕸️ 벡터 DB HNSW 색인 설정 (비어 있으면 Chroma 기본값)
+# benchmarks/eval_hnsw.py로 우리 문서의 속도/정확도 곡선을 보고 고른 값을 넣음
+# 예: {"hnsw:M": 32, "hnsw:construction_ef": 200, "hnsw:search_ef": 64}
+# 새로 만드는 컬렉션에 적용되고, 이미 있는 컬렉션은 압축(index_compaction.py compact --force)으로 다시 만들 때 적용됨
+HNSW_SETTINGS = {}
+
+# 임베딩/벡터 DB/LLM은 처음 사용할 때 한 번만 만들고 프로세스 안에서 공유
+# (langchain, chromadb 같은 무거운 import도 이때 일어나므로 import만 하는 CLI는 빠르게 시작)
+_instances = {}
+_lock = threading.RLock()  # 벡터 DB를 만들 때 임베딩을 먼저 만들므로 재진입 가능해야 함
+
+def _shared(name, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+def active_collection_name(persist_directory=CHROMA_DB_PATH):
+    """지금 검색에 사용하는 Chroma 컬렉션 이름"""
+    try:
+        with open(os.path.join(persist_directory, ACTIVE_COLLECTION_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)["name"]
+    except (FileNotFoundError, KeyError, json.JSONDecodeError):
+        return DEFAULT_COLLECTION
+
+def set_active_collection(name, persist_directory=CHROMA_DB_PATH):
+    """검색에 사용할 컬렉션을 바꾸는 함수 (임시 파일에 쓴 뒤 교체하므로 중간에 끊겨도 이전 이름이 유지됨)"""
+    path = os.path.join(persist_directory, ACTIVE_COLLECTION_FILE)
+    os.makedirs(persist_directory, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"name": name}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def get_embeddings():
+    """공유 임베딩 객체 (배치 요청 + 디스크 캐시로 한 번 임베딩한 텍스트는 재사용)"""
+    def create():
+        from embedding_cache import CachedEmbeddings
+        from embedding_executor import OllamaBatchEmbeddings
+        return CachedEmbeddings(OllamaBatchEmbeddings(model=EMBED_MODEL, base_url=OLLAMA_BASE_URL),
+                                model_name=f"{EMBED_MODEL}:embed")
+    return _shared("embeddings", create)
+
+def get_vectorstore():
+    """공유 벡터 DB (VECTOR_BACKEND에 따라 Chroma 또는 NumPy 저장소)"""
+    def create():
+        if VECTOR_BACKEND == "numpy" and NUMPY_QUANTIZATION:
+            from quantization import QuantizedVectorStore
+            return QuantizedVectorStore(embedding_function=get_embeddings(), quantization=NUMPY_QUANTIZATION)
+        if VECTOR_BACKEND == "numpy":
+            from numpy_store import NumpyVectorStore
+            return NumpyVectorStore(embedding_function=get_embeddings())
+        from langchain_community.vectorstores import Chroma
+        return Chroma(collection_name=active_collection_name(), persist_directory=CHROMA_DB_PATH,
+                      embedding_function=get_embeddings(),
+                      collection_metadata=dict(HNSW_SETTINGS) or None)
+    return _shared("vectorstore", create)
+
+def get_sparse_index():
+    """공유 키워드(BM25) 색인 — 작물명, 농약 코드, 규정 번호처럼 정확한 단어 검색용
+
+    처음 만들 때 비어 있거나 토큰화 방식이 바뀌었으면 벡터 DB의 청크로 채운다.
+    """
+    def create():
+        from sparse_index import SparseIndex
+        index = SparseIndex()
+        index.sync(get_vectorstore()._collection)
+        return index
+    return _shared("sparse_index", create)
+
+def get_llm():
+    """공유 답변 생성 LLM"""
+    def create():
+        from langchain_community.llms import Ollama
+        return Ollama(model=LLM_MODEL, base_url=OLLAMA_BASE_URL)
+    return _shared("llm", create)
+
+# 🔥 워밍업: 첫 질문이 모델 로딩/색인 열기 시간을 기다리지 않도록 미리 준비
+def _load_ollama_model(endpoint, payload):
+    # 빈 요청을 보내면 Ollama가 모델을 메모리에 올리기만 함
+    request = urllib.request.Request(
+        f"{OLLAMA_BASE_URL}/api/{endpoint}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+
+def warmup():
+    """공유 객체를 만들고 Ollama 모델을 메모리에 올리는 함수 (단계별 소요 시간 반환)"""
+    steps = [
+        ("vectorstore", lambda: get_vectorstore()._collection.count()),
+        ("sparse_index", lambda: get_sparse_index().search("워밍업", k=1)),
+        ("llm", get_llm),
+        ("embed_model", lambda: _load_ollama_model("embed", {"model": EMBED_MODEL, "input": ""})),
+        ("llm_model", lambda: _load_ollama_model("generate", {"model": LLM_MODEL})),
+    ]
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️ 워밍업 실패: {name} ({e})")
+        timings[name] = time.perf_counter() - start
+    print("🔥 워밍업 완료: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
+
+def start_warmup():
+    """백그라운드 스레드에서 워밍업을 시작하는 함수 (UI 응답을 막지 않음)"""
+    thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
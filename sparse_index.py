@@ -0,0 +1,374 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+import numpy as np
+
+# 📂 키워드(희소) 인덱스 경로 (Chroma 컬렉션과 같은 폴더)
+SPARSE_INDEX_PATH = "C:/rag-project/chroma_db/sparse_index.sqlite"
+
+# BM25 파라미터
+K1 = 1.5
+B = 0.75
+
+# 용어별 posting 세그먼트가 이만큼 쌓이면 하나로 병합 (삭제된 청크도 이때 실제로 제거)
+COMPACT_AFTER_SEGMENTS = 64
+
+# 메모리에 유지할 용어별 posting 개수
+POSTINGS_CACHE_SIZE = 4096
+
+# 토큰화 방식이 바뀌면 올림 (저장된 버전과 다르면 벡터 DB에서 다시 색인)
+TOKENIZER_VERSION = 2
+
+# 벡터 DB에서 청크를 읽어 색인을 채울 때 한 번에 읽을 청크 수
+BACKFILL_BATCH_SIZE = 500
+
+# 한글 연속 구간 | 영문/숫자 코드 (예: "pd-123", "2024.3", "npk")
+_TOKEN_RE = re.compile(r"[가-힣]+|[0-9a-z]+(?:[-_./][0-9a-z]+)*")
+
+def tokenize(text):
+    """한국어 인식 토큰화: 한글은 첫 글자 + 글자 bigram, 영문/숫자 코드는 통째로 하나의 토큰
+
+    첫 글자를 따로 넣어서 "벼", "콩", "무"처럼 한 글자 작물명이 "벼를", "콩은"에도 맞는다.
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize("NFC", text).lower()):
+        word = match.group()
+        if "가" <= word[0] <= "힣":
+            tokens.append(word[0])
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+class SparseIndex:
+    """SQLite에 저장되는 BM25 역색인
+
+    posting은 용어별로 (문서 번호 int32 배열, tf uint16 배열) BLOB 세그먼트로 저장한다.
+    추가할 때마다 새 세그먼트가 붙고, 삭제는 청크에 삭제 표시만 한 뒤
+    세그먼트가 많이 쌓이면 compact()에서 병합하면서 실제로 제거한다.
+    """
+
+    def __init__(self, path=SPARSE_INDEX_PATH, cache_size=POSTINGS_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._lengths = None  # 문서 번호 → 길이 (삭제된 청크는 -1)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS docs (
+                doc INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                source TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS docs_source ON docs (source);
+            CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                docs BLOB NOT NULL,
+                tfs BLOB NOT NULL,
+                PRIMARY KEY (term, segment)
+            ) WITHOUT ROWID;
+            INSERT OR IGNORE INTO meta (key, value) VALUES
+                ('docs', 0), ('total_length', 0), ('segment', 0), ('segments_since_compact', 0), ('tokenizer', 1);
+            """
+        )
+        if self._meta()["docs"] == 0:
+            # 살아 있는 청크가 없으면 지금 토큰화 방식으로 시작
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'tokenizer'", (TOKENIZER_VERSION,))
+        self._conn.commit()
+
+    def _meta(self):
+        return dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def count(self):
+        """색인된(삭제되지 않은) 청크 수"""
+        with self._lock:
+            return self._meta()["docs"]
+
+    def needs_rebuild(self):
+        """예전 토큰화 방식으로 만든 색인인지 확인하는 함수"""
+        with self._lock:
+            return self._meta()["tokenizer"] != TOKENIZER_VERSION
+
+    def _bump(self, key, delta):
+        self._conn.execute("UPDATE meta SET value = value + ? WHERE key = ?", (delta, key))
+
+    # ✍️ 증분 추가/삭제
+    def add_many(self, items):
+        """(청크 ID, 문서 ID, 텍스트) 목록을 한 세그먼트로 색인하는 함수 (이미 있는 청크 ID는 건너뜀)"""
+        with self._lock:
+            term_docs = {}
+            new_lengths = {}
+            added = 0
+            for cid, source, text in items:
+                if self._conn.execute("SELECT 1 FROM docs WHERE chunk_id = ? AND deleted = 0", (cid,)).fetchone():
+                    continue
+                # 삭제 표시만 된 같은 ID가 남아있으면 새 번호로 다시 색인
+                self._conn.execute("UPDATE docs SET chunk_id = chunk_id || '#deleted' || doc WHERE chunk_id = ?", (cid,))
+                tokens = tokenize(text)
+                doc = self._conn.execute(
+                    "INSERT INTO docs (chunk_id, source, length) VALUES (?, ?, ?)", (cid, source, len(tokens))
+                ).lastrowid
+                for term, tf in Counter(tokens).items():
+                    term_docs.setdefault(term, []).append((doc, tf))
+                self._bump("docs", 1)
+                self._bump("total_length", len(tokens))
+                new_lengths[doc] = len(tokens)
+                added += 1
+
+            if term_docs:
+                self._bump("segment", 1)
+                self._bump("segments_since_compact", 1)
+                segment = self._meta()["segment"]
+                self._conn.executemany(
+                    "INSERT INTO postings (term, segment, docs, tfs) VALUES (?, ?, ?, ?)",
+                    [
+                        (term, segment, np.array([d for d, _ in pairs], dtype=np.int32).tobytes(),
+                         np.minimum([tf for _, tf in pairs], 65535).astype(np.uint16).tobytes())
+                        for term, pairs in term_docs.items()
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                    [(term, len(pairs)) for term, pairs in term_docs.items()],
+                )
+            self._conn.commit()
+            self._patch_cache(lengths=new_lengths, terms=term_docs)
+            needs_compact = self._meta()["segments_since_compact"] >= COMPACT_AFTER_SEGMENTS
+
+        if needs_compact:
+            self.compact()
+        return added
+
+    def delete(self, chunk_ids):
+        """청크 ID 목록을 색인에서 삭제하는 함수"""
+        return self._delete_where("chunk_id", list(chunk_ids))
+
+    def delete_source(self, source):
+        """문서 하나의 모든 청크를 색인에서 삭제하는 함수"""
+        return self._delete_where("source", [source])
+
+    def _delete_where(self, column, values):
+        removed = {}
+        with self._lock:
+            for value in values:
+                rows = self._conn.execute(
+                    f"SELECT doc, length FROM docs WHERE {column} = ? AND deleted = 0", (value,)
+                ).fetchall()
+                for doc, length in rows:
+                    self._conn.execute("UPDATE docs SET deleted = 1 WHERE doc = ?", (doc,))
+                    self._bump("docs", -1)
+                    self._bump("total_length", -length)
+                    removed[doc] = -1
+            self._conn.commit()
+            self._patch_cache(lengths=removed)
+        return len(removed)
+
+    def compact(self):
+        """용어별 세그먼트를 하나로 병합하고 삭제 표시된 청크를 실제로 제거하는 함수"""
+        with self._lock:
+            deleted = np.array(
+                [row[0] for row in self._conn.execute("SELECT doc FROM docs WHERE deleted = 1")], dtype=np.int32
+            )
+            merged = {}
+            for term, docs, tfs in self._conn.execute("SELECT term, docs, tfs FROM postings ORDER BY term, segment"):
+                merged.setdefault(term, ([], []))
+                merged[term][0].append(np.frombuffer(docs, dtype=np.int32))
+                merged[term][1].append(np.frombuffer(tfs, dtype=np.uint16))
+
+            rows, dfs = [], []
+            for term, (doc_parts, tf_parts) in merged.items():
+                docs = np.concatenate(doc_parts)
+                tfs = np.concatenate(tf_parts)
+                if len(deleted):
+                    keep = ~np.isin(docs, deleted)
+                    docs, tfs = docs[keep], tfs[keep]
+                if len(docs):
+                    rows.append((term, 0, docs.tobytes(), tfs.tobytes()))
+                    dfs.append((term, len(docs)))
+
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM terms")
+            self._conn.executemany("INSERT INTO postings (term, segment, docs, tfs) VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT INTO terms (term, df) VALUES (?, ?)", dfs)
+            self._conn.execute("DELETE FROM docs WHERE deleted = 1")
+            self._conn.execute("UPDATE meta SET value = 0 WHERE key = 'segments_since_compact'")
+            self._conn.commit()
+        return len(rows)
+
+    # 🔁 벡터 DB에서 다시 채우기 (키워드 색인이 생기기 전에 들어간 청크, 토큰화 방식 변경)
+    def clear(self):
+        """모든 청크를 지우고 빈 색인으로 되돌리는 함수"""
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM terms")
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("UPDATE meta SET value = 0")
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'tokenizer'", (TOKENIZER_VERSION,))
+            self._conn.commit()
+            self._cache.clear()
+            self._cache_version = None
+
+    def backfill(self, collection, batch_size=BACKFILL_BATCH_SIZE):
+        """벡터 DB 컬렉션의 청크 중 아직 색인되지 않은 것을 추가하는 함수 (추가한 청크 수 반환)"""
+        added, offset = 0, 0
+        while True:
+            page = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not len(page["ids"]):
+                return added
+            added += self.add_many(
+                (cid, (metadata or {}).get("source", ""), text or "")
+                for cid, text, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            )
+            offset += len(page["ids"])
+
+    def rebuild(self, collection, batch_size=BACKFILL_BATCH_SIZE):
+        """색인을 비우고 벡터 DB 컬렉션 전체로 다시 만드는 함수"""
+        self.clear()
+        added = self.backfill(collection, batch_size)
+        self.compact()
+        return added
+
+    def sync(self, collection):
+        """토큰화 방식이 바뀌었으면 다시 만들고, 비어 있으면 벡터 DB의 기존 청크로 채우는 함수"""
+        if self.needs_rebuild():
+            print("🔁 토큰화 방식이 바뀌어 키워드 색인을 다시 만듭니다...")
+            added = self.rebuild(collection)
+        elif self.count() == 0 and collection.count():
+            print("🔁 키워드 색인이 비어 있어 벡터 DB의 기존 청크로 채웁니다...")
+            added = self.backfill(collection)
+        else:
+            return 0
+        print(f"✅ 키워드 색인 {added}개 청크 추가")
+        return added
+
+    # 🔎 검색
+    def _patch_cache(self, lengths=None, terms=()):
+        """이 연결에서 쓴 변경을 메모리 캐시에 바로 반영하는 함수 (다른 연결의 변경이 없었을 때만)"""
+        if self._cache_version is None or self._lengths is None:
+            return
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._cache_version[0]:
+            return  # 다음 검색에서 전체를 다시 읽음
+        if lengths:
+            size = max(lengths) + 1
+            if size > len(self._lengths):
+                grown = np.full(max(size, len(self._lengths) * 2), -1, dtype=np.int32)
+                grown[:len(self._lengths)] = self._lengths
+                self._lengths = grown
+            self._lengths[list(lengths)] = list(lengths.values())
+        for term in terms:
+            self._cache.pop(term, None)
+        self._cache_version = (data_version, self._conn.total_changes)
+
+    def _refresh(self):
+        """다른 연결(예: 별도 프로세스의 인덱싱)이나 이 연결에서 색인이 바뀌면 메모리 캐시를 비움"""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0], self._conn.total_changes
+        if version == self._cache_version:
+            return
+        self._cache.clear()
+        self._cache_version = version
+        rows = np.array(
+            self._conn.execute("SELECT doc, CASE WHEN deleted THEN -1 ELSE length END FROM docs").fetchall(),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self._lengths = np.full(int(rows[:, 0].max(initial=0)) + 1, -1, dtype=np.int32)
+        self._lengths[rows[:, 0]] = rows[:, 1]
+
+    def _postings(self, term):
+        """용어의 (문서 번호 배열, tf 배열) — 모든 세그먼트를 이어붙인 결과"""
+        cached = self._cache.get(term)
+        if cached is not None:
+            self._cache.move_to_end(term)
+            return cached
+        rows = self._conn.execute("SELECT docs, tfs FROM postings WHERE term = ? ORDER BY segment", (term,)).fetchall()
+        docs = np.concatenate([np.frombuffer(d, dtype=np.int32) for d, _ in rows]) if rows else np.empty(0, np.int32)
+        tfs = np.concatenate([np.frombuffer(t, dtype=np.uint16) for _, t in rows]) if rows else np.empty(0, np.uint16)
+        self._cache[term] = (docs, tfs)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return docs, tfs
+
+    def search(self, query, k=20):
+        """BM25 점수 상위 k개의 (청크 ID, 점수) 목록"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._refresh()
+            meta = self._meta()
+            n_docs = meta["docs"]
+            if n_docs <= 0:
+                return []
+            avg_length = meta["total_length"] / n_docs
+
+            # 색인에 없는 용어는 posting을 읽지 않음 (흔한 용어는 idf가 작아서 점수에 적게 반영됨)
+            placeholders = ",".join("?" * len(terms))
+            dfs = dict(self._conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms).fetchall())
+            terms = [term for term in terms if dfs.get(term, 0) > 0]
+
+            doc_parts, contribution_parts = [], []
+            for term in terms:
+                docs, tfs = self._postings(term)
+                lengths = self._lengths[docs]
+                live = lengths >= 0
+                docs, tfs, lengths = docs[live], tfs[live].astype(np.float64), lengths[live]
+                if not len(docs):
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                doc_parts.append(docs)
+                contribution_parts.append(idf * tfs * (K1 + 1) / (tfs + K1 * (1 - B + B * lengths / avg_length)))
+            if not doc_parts:
+                return []
+
+            unique_docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(contribution_parts))
+
+            top = np.argpartition(-scores, k)[:k] if len(scores) > k else np.arange(len(scores))
+            top = top[np.argsort(-scores[top])]
+            top_docs = unique_docs[top].tolist()
+            placeholders = ",".join("?" * len(top_docs))
+            chunk_ids = dict(self._conn.execute(
+                f"SELECT doc, chunk_id FROM docs WHERE doc IN ({placeholders})", top_docs
+            ).fetchall())
+        return [(chunk_ids[doc], float(scores[i])) for doc, i in zip(top_docs, top.tolist())]
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """여러 검색 결과 순위(ID 목록)를 RRF 점수로 합쳐 하나의 순위로 만드는 함수"""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+# 🛠️ CLI: python sparse_index.py stats | backfill | rebuild
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="키워드(BM25) 색인 관리")
+    parser.add_argument("command", choices=["stats", "backfill", "rebuild"],
+                        help="stats: 청크 수 출력, backfill: 벡터 DB에서 빠진 청크 추가, rebuild: 벡터 DB로 전체 재색인")
+    args = parser.parse_args()
+
+    from resources import get_vectorstore
+    collection = get_vectorstore()._collection
+    index = SparseIndex()
+    if args.command == "backfill":
+        print(f"✅ {index.backfill(collection)}개 청크 추가")
+    elif args.command == "rebuild":
+        print(f"✅ {index.rebuild(collection)}개 청크로 다시 만들었습니다")
+    print(f"🧾 키워드 색인 청크 {index.count()}개 / 벡터 DB 청크 {collection.count()}개")
@@ -0,0 +1,161 @@
+import codecs
+import json
+import os
+import time
+from indexer import document_id, file_sha256, index_chunks, is_unchanged
+from pdf_processor import CHUNK_SIZE
+from resources import get_embeddings, get_sparse_index, get_vectorstore
+
+# 📑 CSV/JSON/텍스트 스트리밍 설정
+CSV_READ_ROWS = 5000  # pandas가 한 번에 읽을 행 수 (메모리에는 이만큼의 행만 올라감)
+TEXT_READ_CHARS = 64 * 1024  # 텍스트 파일을 나눠 읽을 단위 (문단 경계에서 끊음)
+ENCODING_SNIFF_BYTES = 64 * 1024
+_JSON_SCALARS = {"string", "number", "boolean", "null"}
+
+def detect_encoding(path):
+    """CSV/텍스트 인코딩 판별 (UTF-8로 읽히지 않으면 한글 Windows 기본값인 cp949)"""
+    with open(path, "rb") as f:
+        head = f.read(ENCODING_SNIFF_BYTES)
+    try:
+        # 점진적 디코더는 끝에서 잘린 멀티바이트 글자를 다음 입력을 기다리는 것으로 처리 (파일 끝까지 읽었으면 final)
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) < ENCODING_SNIFF_BYTES)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp949"
+
+def iter_csv_chunks(path, chunk_size=CHUNK_SIZE, read_rows=CSV_READ_ROWS, stats=None):
+    """CSV를 read_rows행씩 읽어 (열 이름 + 여러 행) 청크로 yield하는 generator
+
+    각 청크는 chunk_size 글자 안에서 행을 묶고, 맨 앞에 열 이름을 붙여 청크만 봐도 값의 의미를 알 수 있게 한다.
+    메타데이터에는 청크에 담긴 데이터 행 범위(0부터 시작)를 기록한다.
+    """
+    import pandas as pd
+
+    stats = {} if stats is None else stats
+    stats["rows"] = 0
+    lines, size, start = [], 0, 0
+    header = None  # "열: a | b | c" 줄 (모든 청크 맨 앞에 붙임)
+    frames = pd.read_csv(path, chunksize=read_rows, dtype=str, keep_default_na=False, encoding=detect_encoding(path))
+    for frame in frames:
+        if header is None:
+            header = "열: " + " | ".join(str(column) for column in frame.columns)
+        for values in frame.itertuples(index=False, name=None):
+            line = " | ".join(values)
+            if lines and len(header) + size + 1 + len(line) > chunk_size:
+                yield "\n".join([header] + lines), {"row_start": start, "row_end": stats["rows"] - 1}
+                lines, size, start = [], 0, stats["rows"]
+            lines.append(line)
+            size += len(line) + 1
+            stats["rows"] += 1
+    if lines:
+        yield "\n".join([header] + lines), {"row_start": start, "row_end": stats["rows"] - 1}
+
+def _json_path(prefix):
+    # ijson 경로의 배열 표시(item)는 빼고 키 이름만 남김 (예: "item.crop.name" → "crop.name")
+    return ".".join(part for part in prefix.split(".") if part != "item") or "value"
+
+def _json_value(value):
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+def iter_json_chunks(path, chunk_size=CHUNK_SIZE, stats=None):
+    """JSON을 ijson으로 끝까지 한 번만 훑으면서 "경로: 값" 줄을 청크로 묶어 yield하는 generator
+
+    파일 전체를 메모리에 올리지 않는다. 최상위 배열의 항목(또는 최상위 객체의 키)을 레코드로 보고
+    메타데이터에 청크가 시작/끝나는 레코드 번호를 기록한다.
+    """
+    import ijson
+
+    stats = {} if stats is None else stats
+    stats["rows"] = 0
+    lines, size, start = [], 0, 0
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if event in _JSON_SCALARS:
+                line = f"{_json_path(prefix)}: {_json_value(value)}"
+                # 아주 긴 문자열 값은 chunk_size 단위로 나눔
+                for offset in range(0, len(line), chunk_size):
+                    piece = line[offset:offset + chunk_size]
+                    if lines and size + len(piece) > chunk_size:
+                        yield "\n".join(lines), {"row_start": start, "row_end": stats["rows"]}
+                        lines, size, start = [], 0, stats["rows"]
+                    lines.append(piece)
+                    size += len(piece) + 1
+            # 최상위 배열 항목/최상위 키의 값이 끝나면 레코드 하나가 끝난 것
+            if "." not in prefix and prefix and (event in ("end_map", "end_array") or event in _JSON_SCALARS):
+                stats["rows"] += 1
+    if lines:
+        yield "\n".join(lines), {"row_start": start, "row_end": max(start, stats["rows"] - 1)}
+
+def iter_text_chunks(path, stats=None):
+    """텍스트 파일을 문단 경계에서 TEXT_READ_CHARS 글자씩 읽어 PDF와 같은 크기의 청크로 yield하는 generator
+
+    메타데이터에는 청크가 들어 있는 블록의 시작 줄 번호(1부터 시작)를 기록한다.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from pdf_processor import CHUNK_OVERLAP
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    stats = {} if stats is None else stats
+    stats["rows"] = 0
+    block, size, block_start = [], 0, 1
+    with open(path, "r", encoding=detect_encoding(path), errors="replace") as f:
+        for line in f:
+            stats["rows"] += 1
+            block.append(line)
+            size += len(line)
+            if size >= TEXT_READ_CHARS and not line.strip():
+                for chunk in text_splitter.split_text("".join(block)):
+                    yield chunk, {"line_start": block_start}
+                block, size, block_start = [], 0, stats["rows"] + 1
+    if block:
+        for chunk in text_splitter.split_text("".join(block)):
+            yield chunk, {"line_start": block_start}
+
+def _process_structured(path, chunk_iter, progress=None):
+    """CSV/JSON/텍스트 청크 스트림을 PDF와 같은 배치 임베딩/저장 경로로 인덱싱하고 처리량을 출력하는 함수"""
+    doc_id = document_id(path)
+    file_hash = file_sha256(path)
+    if is_unchanged(doc_id, file_hash):
+        print(f"⏭️ 변경되지 않은 문서입니다: {doc_id}")
+        return None
+
+    counts = {}
+    on_batch = None if progress is None else (lambda written: progress(chunks_done=written))
+    start = time.perf_counter()
+    result = index_chunks(get_vectorstore(), doc_id, file_hash, chunk_iter(path, stats=counts),
+                          sparse_index=get_sparse_index(), on_batch=on_batch)
+    seconds = max(time.perf_counter() - start, 1e-9)
+
+    result.update({
+        "rows": counts.get("rows", 0),
+        "bytes": os.path.getsize(path),
+        "seconds": seconds,
+    })
+    if not result["chunks"]:
+        print(f"❌ {doc_id}에서 내용을 찾을 수 없습니다.")
+        return result
+
+    print(f"✅ {doc_id} 저장 완료! (추가 {result['added']}, 삭제 {result['deleted']}, 유지 {result['unchanged']})")
+    print(
+        f"📊 {result['rows']} rows, {result['chunks']} chunks, {seconds:.1f}s | "
+        f"{result['rows'] / seconds:.0f} rows/s, {result['chunks'] / seconds:.1f} chunks/s, "
+        f"{result['bytes'] / seconds / 1024 / 1024:.2f} MB/s"
+    )
+    cache = get_embeddings().stats()
+    print(f"🧠 임베딩 캐시: 적중 {cache['hits']} / 미스 {cache['misses']} (적중률 {cache['hit_rate']:.0%})")
+    return result
+
+# 텍스트 파일 처리 함수
+def process_txt(file_path, progress=None):
+    """텍스트 파일을 문단 단위로 스트리밍하여 벡터 DB에 저장하는 함수"""
+    return _process_structured(file_path, iter_text_chunks, progress)
+
+# CSV 파일 처리 함수
+def process_csv(file_path, progress=None):
+    """CSV를 행 묶음 단위로 스트리밍하여 벡터 DB에 저장하는 함수"""
+    return _process_structured(file_path, iter_csv_chunks, progress)
+
+# JSON 파일 처리 함수
+def process_json(file_path, progress=None):
+    """JSON을 점진적으로 파싱하여 벡터 DB에 저장하는 함수"""
+    return _process_structured(file_path, iter_json_chunks, progress)
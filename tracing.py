@@ -0,0 +1,291 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 📈 추적/지표 설정 (기본은 꺼짐: span()/observe()/count()는 전역 플래그 하나만 확인하고 바로 반환)
+TRACING_ENABLED = False  # True면 구간별 소요 시간과 횟수를 기록 (rag_ui의 /metrics, /traces에 표시)
+PROFILE_SLOW_REQUESTS = False  # True면 요청 동안 스택을 샘플링해서 느린 요청의 프로파일을 파일로 저장
+SLOW_REQUEST_SECONDS = 10.0  # 이보다 오래 걸린 요청만 프로파일 저장
+PROFILE_INTERVAL = 0.01  # 스택 샘플링 간격(초)
+PROFILE_DIR = "C:/rag-project/profiles"
+
+# 🌐 Prometheus 지표 엔드포인트 (Gradio 앱 옆에서 로컬로만 열림)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # 초
+RECENT_TRACES = 100  # /traces에서 보여줄 최근 최상위 span 수
+
+_enabled = TRACING_ENABLED
+_profile_slow = PROFILE_SLOW_REQUESTS
+_lock = threading.Lock()
+_histograms = {}  # (span 이름, 라벨) → [구간별 개수, 합계, 개수]
+_counters = {}  # (지표 이름, 라벨) → 값
+_stats_providers = {}  # 지표 접두사 → (stats() 함수, 게이지로 내보낼 키)
+_traces = deque(maxlen=RECENT_TRACES)
+_local = threading.local()
+
+def enable(profile_slow=PROFILE_SLOW_REQUESTS):
+    """추적을 켜는 함수 (profile_slow=True면 느린 요청 프로파일도 저장)"""
+    global _enabled, _profile_slow
+    _enabled = True
+    _profile_slow = profile_slow
+
+def disable():
+    global _enabled, _profile_slow
+    _enabled = False
+    _profile_slow = False
+
+def is_enabled():
+    return _enabled
+
+# 📊 지표 기록
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def observe(name, seconds, **labels):
+    """이미 측정한 소요 시간(초)을 name 구간의 히스토그램에 기록하는 함수"""
+    if not _enabled or seconds is None:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(HISTOGRAM_BUCKETS) + 1), 0.0, 0]
+        histogram[0][bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+def count(name, value=1, **labels):
+    """횟수 지표(rag_<name>_total)를 value만큼 늘리는 함수"""
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def register_stats(prefix, provider, gauges=()):
+    """stats() 함수가 돌려주는 숫자들을 /metrics에 rag_<prefix>_<키>로 내보내도록 등록하는 함수
+
+    답변 캐시/재정렬처럼 자체 카운터를 가진 객체용 (추적이 꺼져 있어도 객체가 직접 세므로 값이 유지됨)
+    gauges에 있는 키(적중률, 캐시 크기 등)는 gauge, 나머지는 누적 횟수(counter, _total)로 내보낸다.
+    """
+    with _lock:
+        _stats_providers[prefix] = (provider, frozenset(gauges))
+
+# ⏱️ span: with span("retrieve"): ... (같은 스레드 안에서 중첩되면 최상위 span의 하위 구간으로 기록)
+class _Span:
+    __slots__ = ("name", "labels", "start", "parent", "children")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.children = []
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        stack = _local.stack
+        if self in stack:
+            stack.remove(self)
+        observe(self.name, seconds, **self.labels)
+        if exc_type is not None:
+            count("span_errors", span=self.name)
+        if self.parent is not None:
+            self.parent.children.append((self.name, self.start - self.parent.start, seconds))
+        else:
+            _traces.append({
+                "span": self.name,
+                "time": time.time() - seconds,
+                "ms": seconds * 1000,
+                "children": [{"span": name, "offset_ms": offset * 1000, "ms": child * 1000}
+                             for name, offset, child in self.children],
+            })
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpan()
+
+def span(name, **labels):
+    """구간 소요 시간을 기록하는 context manager (추적이 꺼져 있으면 아무것도 하지 않는 공용 객체)"""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, labels)
+
+# 🔬 느린 요청 샘플링 프로파일러
+_profiles = set()
+_sampler = None
+
+def _collapse(frame, thread_name):
+    """프레임 스택 → "스레드;파일:함수;..." (flamegraph.pl, speedscope가 읽는 folded 형식)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+def _sample_loop():
+    global _sampler
+    me = threading.get_ident()
+    while True:
+        time.sleep(PROFILE_INTERVAL)
+        with _lock:
+            active = list(_profiles)
+            if not active:
+                _sampler = None
+                return
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = [_collapse(frame, thread_names.get(ident, str(ident)))
+                  for ident, frame in sys._current_frames().items() if ident != me]
+        for profile in active:
+            profile.samples.update(stacks)
+
+class _Profile:
+    """요청이 진행되는 동안 프로세스의 모든 스레드 스택을 샘플링하고, 느렸으면 파일로 저장"""
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = Counter()
+
+    def __enter__(self):
+        global _sampler
+        self.start = time.perf_counter()
+        with _lock:
+            _profiles.add(self)
+            if _sampler is None:
+                _sampler = threading.Thread(target=_sample_loop, name="profiler", daemon=True)
+                _sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            _profiles.discard(self)
+        if seconds >= SLOW_REQUEST_SECONDS and self.samples:
+            count("slow_requests", request=self.name)
+            try:
+                print(f"🔬 느린 요청 프로파일 저장: {self.dump(seconds)}")
+            except OSError as e:
+                print(f"⚠️ 프로파일 저장 실패: {e}")
+        return False
+
+    def dump(self, seconds):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{self.name}_{seconds:.1f}s.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, samples in self.samples.most_common():
+                f.write(f"{stack} {samples}\n")
+        return path
+
+def profile(name):
+    """요청 하나를 감싸는 context manager (느린 요청 프로파일링이 꺼져 있으면 아무것도 하지 않음)
+
+    여러 요청이 동시에 진행되면 서로의 스택도 함께 담긴다 (맨 앞의 스레드 이름으로 구분).
+    """
+    if not _profile_slow:
+        return _NOOP
+    return _Profile(name)
+
+# 🌐 Prometheus 텍스트 형식 & 엔드포인트
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+def render_metrics():
+    """지금까지의 지표를 Prometheus 텍스트 형식으로 만드는 함수"""
+    with _lock:
+        histograms = {key: (list(value[0]), value[1], value[2]) for key, value in _histograms.items()}
+        counters = dict(_counters)
+        providers = dict(_stats_providers)
+
+    lines = ["# HELP rag_span_seconds 구간별 소요 시간(초)", "# TYPE rag_span_seconds histogram"]
+    for (name, labels), (buckets, total, samples) in sorted(histograms.items()):
+        labels = (("span", name),) + labels
+        cumulative = 0
+        for bound, bucket in zip(HISTOGRAM_BUCKETS, buckets):
+            cumulative += bucket
+            lines.append(f"rag_span_seconds_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"rag_span_seconds_bucket{_format_labels(labels, [('le', '+Inf')])} {samples}")
+        lines.append(f"rag_span_seconds_sum{_format_labels(labels)} {total}")
+        lines.append(f"rag_span_seconds_count{_format_labels(labels)} {samples}")
+
+    declared = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"rag_{name}_total"
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    for prefix, (provider, gauges) in sorted(providers.items()):
+        try:
+            stats = provider()
+        except Exception as e:
+            print(f"⚠️ 지표 수집 실패: {prefix} ({e})")
+            continue
+        for key, value in sorted(stats.items()):
+            if key in gauges:
+                lines += [f"# TYPE rag_{prefix}_{key} gauge", f"rag_{prefix}_{key} {value}"]
+            else:
+                lines += [f"# TYPE rag_{prefix}_{key}_total counter", f"rag_{prefix}_{key}_total {value}"]
+    return "\n".join(lines) + "\n"
+
+def recent_traces():
+    """최근 최상위 span과 하위 구간 목록 (최신순)"""
+    return list(reversed(_traces))
+
+def _make_handler():
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, content_type, body):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._reply("text/plain; version=0.0.4; charset=utf-8", render_metrics().encode("utf-8"))
+            elif self.path == "/traces":
+                body = json.dumps(recent_traces(), ensure_ascii=False, indent=2).encode("utf-8")
+                self._reply("application/json; charset=utf-8", body)
+            else:
+                self.send_error(404)
+
+    return Handler
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """/metrics(Prometheus), /traces(JSON) 엔드포인트를 백그라운드 스레드로 시작하는 함수"""
+    server = ThreadingHTTPServer((host, port), _make_handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 지표 엔드포인트: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import threading
+import time
+from indexer import DOCUMENT_ROOTS, delete_document, document_id, file_sha256, is_unchanged
+
+# 👀 감시할 폴더 (하위 폴더 포함)
+# 하위 폴더의 파일은 indexer.DOCUMENT_ROOTS 기준 상대 경로가 문서 ID이므로, 다른 폴더를 감시하면 그 폴더도 DOCUMENT_ROOTS에 추가
+WATCH_DIRS = list(DOCUMENT_ROOTS)
+
+# 마지막으로 본 파일 상태(mtime, 크기, 해시) 저장 경로
+WATCH_STATE_PATH = "C:/rag-project/chroma_db/watch_state.json"
+
+POLL_INTERVAL = 2.0  # 폴더를 다시 훑는 간격(초), 쉬는 동안은 stat 몇 번 외에 CPU를 쓰지 않음
+DEBOUNCE_SECONDS = 3.0  # 파일 상태가 이 시간 동안 바뀌지 않아야 처리 (복사 중인 파일/연속 저장 무시)
+
+# 확장자 → 파일 유형 (job_queue/rag_ui의 file_type과 같은 이름)
+FILE_TYPES = {".pdf": "pdf", ".txt": "txt", ".csv": "csv", ".json": "json"}
+
+def default_handlers():
+    """파일 유형별 인덱싱 함수 (CLI로 실행할 때 사용)"""
+    from pdf_processor import process_pdf
+    from structured_processor import process_csv, process_json, process_txt
+    return {"pdf": process_pdf, "txt": process_txt, "csv": process_csv, "json": process_json}
+
+def delete_from_index(path):
+    """삭제된 파일의 청크를 벡터 DB/키워드 색인에서 지우고, 삭제 표시가 많이 쌓였으면 압축하는 함수"""
+    from index_compaction import format_report, maybe_compact
+    from resources import get_sparse_index, get_vectorstore
+    removed = delete_document(get_vectorstore(), document_id(path), sparse_index=get_sparse_index())
+    print(f"🗑️ 삭제된 파일의 청크 {removed}개를 제거했습니다: {document_id(path)}")
+    report = maybe_compact(get_vectorstore(), sparse_index=get_sparse_index())
+    if report is not None:
+        print(format_report(report))
+
+class DirectoryWatcher:
+    """폴더를 주기적으로 훑어서 새/수정된 파일은 인덱싱하고, 삭제된 파일은 벡터 DB에서도 삭제하는 감시기
+
+    - mtime/크기가 바뀐 파일만 후보로 보고, debounce 시간 동안 더 바뀌지 않으면 해시로 실제 변경을 확인
+    - ingest(path, file_type, file_hash), delete(path)를 넘기면 직접 처리하는 대신 그 함수를 호출
+      (rag_ui는 인덱싱 작업 대기열에 넣어서 업로드 작업과 순서대로 처리)
+    """
+
+    def __init__(self, directories=WATCH_DIRS, ingest=None, delete=None, state_path=WATCH_STATE_PATH,
+                 poll_interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS):
+        self.directories = list(directories)
+        self.ingest = ingest
+        self.delete = delete_from_index if delete is None else delete
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._handlers = None
+        self._state = self._load_state()  # 경로 → {"mtime_ns", "size", "hash"}
+        self._pending = {}  # 경로 → ((mtime_ns, size), 처음 본 시각)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def scan(self):
+        """감시 폴더의 지원 파일 → (mtime_ns, 크기)"""
+        found = {}
+        stack = [d for d in self.directories if os.path.isdir(d)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in FILE_TYPES:
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        found[os.path.normpath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def poll_once(self, now=None):
+        """한 번 훑어서 변경을 처리하는 함수 (처리한 파일 수와 삭제한 파일 수 반환)"""
+        now = time.monotonic() if now is None else now
+        current = self.scan()
+        changed = deleted = 0
+
+        for path, stat in current.items():
+            known = self._state.get(path)
+            if known is not None and (known["mtime_ns"], known["size"]) == stat:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != stat:
+                self._pending[path] = (stat, now)  # 새로 바뀌었거나 아직 쓰는 중
+                continue
+            if now - pending[1] < self.debounce:
+                continue
+            del self._pending[path]
+            if self._ingest(path, stat):
+                changed += 1
+
+        for path in [path for path in self._pending if path not in current]:
+            del self._pending[path]
+
+        doc_ids = {document_id(path) for path in current}
+        for path in [path for path in self._state if path not in current]:
+            del self._state[path]
+            # 다른 문서 폴더에 같은 상대 경로의 파일이 남아 있으면 같은 문서이므로 지우지 않음
+            if document_id(path) not in doc_ids:
+                try:
+                    self.delete(path)
+                except Exception as e:
+                    print(f"❌ 삭제 반영 실패: {path} ({e})")
+                deleted += 1
+
+        if changed or deleted:
+            self._save_state()
+        return changed, deleted
+
+    def _ingest(self, path, stat):
+        try:
+            digest = file_sha256(path)
+        except FileNotFoundError:
+            return False
+        known = self._state.get(path)
+        self._state[path] = {"mtime_ns": stat[0], "size": stat[1], "hash": digest}
+        # mtime만 바뀌고 내용이 같거나, 이미 같은 내용으로 인덱싱된 파일(업로드 등)은 건너뜀
+        if (known is not None and known["hash"] == digest) or is_unchanged(document_id(path), digest):
+            return True
+
+        file_type = FILE_TYPES[os.path.splitext(path)[1].lower()]
+        print(f"👀 변경 감지: {path}")
+        try:
+            if self.ingest is not None:
+                self.ingest(path, file_type, digest)
+            else:
+                if self._handlers is None:
+                    self._handlers = default_handlers()
+                self._handlers[file_type](path)
+        except Exception as e:
+            # 같은 내용으로 계속 재시도하지 않도록 상태는 기록하고, 파일이 다시 바뀌면 재시도
+            print(f"❌ 인덱싱 실패: {path} ({e})")
+        return True
+
+    def run(self):
+        """stop()이 호출될 때까지 poll_interval마다 폴더를 훑는 함수"""
+        print(f"👀 폴더 감시 시작: {', '.join(self.directories)}")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"❌ 폴더 감시 오류: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """백그라운드 스레드에서 감시를 시작하는 함수"""
+        self._thread = threading.Thread(target=self.run, name="watcher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+# 🛠️ CLI: python watcher.py [폴더 ...] [--interval 2] [--debounce 3] [--once]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="폴더를 감시하며 txt/pdf/csv/json 파일을 증분 인덱싱")
+    parser.add_argument("directories", nargs="*", default=WATCH_DIRS)
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="폴더를 훑는 간격(초)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="변경 후 대기 시간(초)")
+    parser.add_argument("--once", action="store_true", help="한 번만 훑어서 바로 처리하고 종료")
+    args = parser.parse_args()
+
+    watcher = DirectoryWatcher(args.directories, poll_interval=args.interval, debounce=args.debounce)
+    if args.once:
+        # 첫 번째로 훑을 때 상태를 기록하고, 두 번째에 debounce 없이 처리
+        watcher.debounce = 0
+        watcher.poll_once()
+        changed, deleted = watcher.poll_once()
+        print(f"🏁 처리 {changed}개, 삭제 {deleted}개")
+    else:
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("👋 폴더 감시를 종료합니다.")